@@ -0,0 +1,78 @@
+"""Alembic environment: every migration runs once per branch schema.
+
+Each branch keeps its own alembic_version table in its schema, so branches
+can be at different revisions (e.g. while a migration is rolled out branch by
+branch). Migrations reference settings.DB_SCHEMA or unqualified names; they
+are pointed at a branch's schema through schema_translate_map and the
+search_path, and run on the node that holds the branch. Restrict a run to
+some branches with:
+
+    alembic -x branches=main,uttara upgrade head
+"""
+
+import asyncio
+from typing import List
+
+from alembic import context
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.db.base import Base
+from app.db.branches import Branch, branches
+from app.db.dbconnection import db_manager
+
+target_metadata = Base.metadata
+
+def selected_branches() -> List[Branch]:
+    names = context.get_x_argument(as_dictionary=True).get("branches")
+    if not names:
+        return list(branches.values())
+    selected = []
+    for name in names.split(","):
+        if name.strip() not in branches:
+            raise SystemExit(f"Unknown branch '{name.strip()}' (configured: {', '.join(branches)})")
+        selected.append(branches[name.strip()])
+    return selected
+
+def run_branch_migrations(connection: Connection, branch: Branch) -> None:
+    connection.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{branch.schema}"'))
+    # Unqualified names in raw SQL (op.execute) resolve to the branch; enum types stay shared in public
+    connection.execute(text(f'SET search_path TO "{branch.schema}", public'))
+    # Session-level settings survive the commit; alembic must begin its transactions itself,
+    # or autocommit_block() in a migration has no transaction of its own to end
+    connection.commit()
+    translate = branch.schema_translate_map
+    if translate:
+        connection = connection.execution_options(schema_translate_map=translate)
+    context.configure(
+        connection=connection, target_metadata=target_metadata, version_table_schema=branch.schema,
+        transaction_per_migration=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+async def run_migrations_online() -> None:
+    try:
+        for branch in selected_branches():
+            print(f"Migrating branch '{branch.name}' (schema {branch.schema})")
+            async with db_manager.engine_for(branch).connect() as conn:
+                await conn.run_sync(run_branch_migrations, branch)
+                await conn.commit()
+    finally:
+        await db_manager.dispose()
+
+def run_migrations_offline() -> None:
+    """Emit one script covering every branch; schema-qualified names are not translated here"""
+    for branch in selected_branches():
+        context.configure(
+            url=branch.url, target_metadata=target_metadata, literal_binds=True,
+            dialect_opts={"paramstyle": "named"}, version_table_schema=branch.schema,
+        )
+        with context.begin_transaction():
+            context.execute(f'SET search_path TO "{branch.schema}", public')
+            context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    asyncio.run(run_migrations_online())
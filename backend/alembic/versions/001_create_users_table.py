@@ -17,42 +17,52 @@ down_revision: Union[str, None] = None
 branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
+# Enum types are shared by every branch in public (as create_all leaves them); create it once
+USERROLE = postgresql.ENUM('ADMIN', 'LAB_ASSISTANT', name='userrole', create_type=False)
+
 def upgrade() -> None:
-    # Create users table
+    op.execute(
+        "DO $$ BEGIN CREATE TYPE public.userrole AS ENUM ('ADMIN', 'LAB_ASSISTANT'); "
+        "EXCEPTION WHEN duplicate_object THEN NULL; END $$"
+    )
+
+    # Create users table, in the branch schema being migrated (first on the search_path)
     op.create_table(
         'users',
         sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False, primary_key=True),
         sa.Column('username', sa.String(length=50), nullable=False),
         sa.Column('password_hash', sa.String(length=255), nullable=False),
         sa.Column('full_name', sa.String(length=100), nullable=False),
-        sa.Column('role', sa.Enum('ADMIN', 'LAB_ASSISTANT', name='userrole'), nullable=False),
+        sa.Column('role', USERROLE, nullable=False),
         sa.Column('is_active', sa.Boolean(), nullable=False, default=True),
         sa.Column('refresh_token', sa.Text(), nullable=True),
         sa.Column('refresh_token_expires_at', sa.DateTime(), nullable=True),
         sa.Column('created_at', sa.DateTime(), nullable=False, default=sa.func.now()),
         sa.Column('updated_at', sa.DateTime(), nullable=False, default=sa.func.now()),
         sa.PrimaryKeyConstraint('id'),
-        sa.UniqueConstraint('username'),
-        schema='public'
+        sa.UniqueConstraint('username')
     )
     
     # Create index on username for faster lookups
-    op.create_index(op.f('ix_users_username'), 'users', ['username'], unique=True, schema='public')
+    op.create_index(op.f('ix_users_username'), 'users', ['username'], unique=True)
     
     # Create index on role for role-based queries
-    op.create_index(op.f('ix_users_role'), 'users', ['role'], schema='public')
+    op.create_index(op.f('ix_users_role'), 'users', ['role'])
     
     # Create index on is_active for filtering active users
-    op.create_index(op.f('ix_users_is_active'), 'users', ['is_active'], schema='public')
+    op.create_index(op.f('ix_users_is_active'), 'users', ['is_active'])
 
 def downgrade() -> None:
     # Drop indexes
-    op.drop_index(op.f('ix_users_is_active'), table_name='users', schema='public')
-    op.drop_index(op.f('ix_users_role'), table_name='users', schema='public')
-    op.drop_index(op.f('ix_users_username'), table_name='users', schema='public')
+    op.drop_index(op.f('ix_users_is_active'), table_name='users')
+    op.drop_index(op.f('ix_users_role'), table_name='users')
+    op.drop_index(op.f('ix_users_username'), table_name='users')
     
     # Drop users table
-    op.drop_table('users', schema='public')
+    op.drop_table('users')
     
-    # Drop enum type
-    op.execute('DROP TYPE IF EXISTS userrole') 
\ No newline at end of file
+    # Drop enum type, unless another branch still uses it
+    op.execute(
+        "DO $$ BEGIN DROP TYPE IF EXISTS public.userrole; "
+        "EXCEPTION WHEN dependent_objects_still_exist THEN NULL; END $$"
+    )
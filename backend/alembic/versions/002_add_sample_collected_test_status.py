@@ -0,0 +1,25 @@
+"""Add SAMPLE_COLLECTED to the order test status enum
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '002'
+down_revision: Union[str, None] = '001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    # ADD VALUE cannot run inside a transaction block on older Postgres versions
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE teststatus ADD VALUE IF NOT EXISTS 'SAMPLE_COLLECTED' AFTER 'PENDING'")
+
+def downgrade() -> None:
+    # Postgres cannot drop enum values; move rows back so the value is unused
+    op.execute("UPDATE order_tests SET status = 'PENDING' WHERE status = 'SAMPLE_COLLECTED'")
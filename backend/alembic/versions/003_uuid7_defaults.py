@@ -0,0 +1,53 @@
+"""Time-ordered UUIDv7 primary key defaults
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-19 00:00:00.000000
+
+New rows get UUIDv7 keys from the app (app.core.ids.uuid7); this adds the
+matching SQL function and makes it the server default, so rows inserted from
+SQL are time-ordered too. Existing v4 keys stay as they are: they are
+referenced by foreign keys, tokens, links and exports, and a v4 key remains a
+valid uuid that simply sorts at a random position. The primary key indexes
+only stop growing randomly from here on; to compact the pages the random
+inserts left half empty, rebuild them without blocking writes:
+
+    alembic upgrade head -x reindex=true
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+
+# revision identifiers, used by Alembic.
+revision: str = '003'
+down_revision: Union[str, None] = '002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = [
+    "users", "patients", "consultants", "lab_tests", "reference_ranges", "orders", "order_tests", "test_reports",
+    "billings", "payments", "jobs", "audit_events", "patient_match_keys",
+]
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE OR REPLACE FUNCTION uuid_generate_v7() RETURNS uuid AS $$
+            SELECT encode(set_bit(set_bit(overlay(uuid_send(gen_random_uuid())
+                PLACING substring(int8send((extract(epoch FROM clock_timestamp()) * 1000)::bigint) FROM 3)
+                FROM 1 FOR 6), 52, 1), 53, 1), 'hex')::uuid
+        $$ LANGUAGE sql VOLATILE
+    """)
+    for table in TABLES:
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT uuid_generate_v7()")
+
+    if context.get_x_argument(as_dictionary=True).get("reindex") == "true":
+        # REINDEX CONCURRENTLY cannot run inside a transaction block
+        with op.get_context().autocommit_block():
+            for table in TABLES:
+                op.execute(f"REINDEX INDEX CONCURRENTLY {table}_pkey")
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN id DROP DEFAULT")
+    op.execute("DROP FUNCTION IF EXISTS uuid_generate_v7()")
@@ -0,0 +1,36 @@
+"""Accession numbers on order tests
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '004'
+down_revision: Union[str, None] = '003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    op.create_table(
+        "accession_counters",
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("next_value", sa.Integer(), nullable=False),
+    )
+    op.add_column("order_tests", sa.Column("accession_number", sa.String(20), nullable=True))
+    # order_tests is large and written all day: build the index without blocking writes
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_order_tests_accession_number", "order_tests", ["accession_number"],
+            unique=True, postgresql_concurrently=True,
+        )
+
+def downgrade() -> None:
+    op.drop_index("ix_order_tests_accession_number", table_name="order_tests")
+    op.drop_column("order_tests", "accession_number")
+    op.drop_table("accession_counters")
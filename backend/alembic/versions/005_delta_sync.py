@@ -0,0 +1,114 @@
+"""Change tracking for delta sync
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19 00:00:00.000000
+
+Adds the (change_txid, change_seq) stream position to the synced tables and
+the tombstones of deleted rows, and the sync_track / sync_tombstone triggers
+that keep them current (app.db.triggers installs the same functions again at
+startup). Existing rows are then stamped in batches of BACKFILL_BATCH rows,
+each committed on its own, so a first sync sends them all without one
+long transaction rewriting and locking a whole table.
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '005'
+down_revision: Union[str, None] = '004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ["patients", "consultants", "lab_tests", "orders", "order_tests"]
+
+BACKFILL_BATCH = 5000
+
+# Bodies as in app.db.triggers; SET search_path FROM CURRENT keeps them on this branch's schema when fired
+SYNC_FUNCTIONS = [
+    """
+    CREATE OR REPLACE FUNCTION sync_track() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'UPDATE' AND NEW IS NOT DISTINCT FROM OLD THEN
+            RETURN NEW;
+        END IF;
+        NEW.change_txid := txid_current();
+        NEW.change_seq := nextval('sync_change_seq');
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql SET search_path FROM CURRENT
+    """,
+    """
+    CREATE OR REPLACE FUNCTION sync_tombstone() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO sync_tombstones (entity, entity_id, change_txid, change_seq, deleted_at)
+        VALUES (TG_TABLE_NAME, OLD.id, txid_current(), nextval('sync_change_seq'), now() AT TIME ZONE 'utc')
+        ON CONFLICT (entity, entity_id) DO UPDATE
+        SET change_txid = EXCLUDED.change_txid, change_seq = EXCLUDED.change_seq, deleted_at = EXCLUDED.deleted_at;
+        RETURN OLD;
+    END;
+    $$ LANGUAGE plpgsql SET search_path FROM CURRENT
+    """,
+]
+
+def backfill(table: str) -> None:
+    """Stamp the table's unstamped rows, BACKFILL_BATCH rows per statement"""
+    stamp = f"UPDATE {table} SET change_txid = txid_current(), change_seq = nextval('sync_change_seq')"
+    if op.get_context().as_sql:
+        # An offline script cannot loop on row counts
+        op.execute(f"{stamp} WHERE change_txid IS NULL")
+        return
+    batch = sa.text(
+        f"{stamp} WHERE id IN (SELECT id FROM {table} WHERE change_txid IS NULL LIMIT {BACKFILL_BATCH})"
+    )
+    while op.get_bind().execute(batch).rowcount:
+        pass
+
+def upgrade() -> None:
+    op.execute("CREATE SEQUENCE IF NOT EXISTS sync_change_seq")
+    for table in TABLES:
+        op.add_column(table, sa.Column("change_txid", sa.BigInteger(), nullable=True))
+        op.add_column(table, sa.Column("change_seq", sa.BigInteger(), nullable=True))
+    op.create_table(
+        "sync_tombstones",
+        sa.Column("entity", sa.String(30), primary_key=True),
+        sa.Column("entity_id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("change_txid", sa.BigInteger(), nullable=False),
+        sa.Column("change_seq", sa.BigInteger(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_sync_tombstones_change", "sync_tombstones", ["change_txid", "change_seq"])
+    op.create_index("ix_sync_tombstones_deleted_at", "sync_tombstones", ["deleted_at"])
+    # From here on every write stamps its rows, so the backfill only has to catch up on older ones
+    for statement in SYNC_FUNCTIONS:
+        op.execute(statement)
+    for table in TABLES:
+        op.execute(
+            f"CREATE TRIGGER {table}_sync_track BEFORE INSERT OR UPDATE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION sync_track()"
+        )
+        op.execute(
+            f"CREATE TRIGGER {table}_sync_tombstone AFTER DELETE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION sync_tombstone()"
+        )
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            # Built without blocking writes, and first: each backfill batch finds its NULLs through it
+            op.create_index(f"ix_{table}_sync", table, ["change_txid", "change_seq"], postgresql_concurrently=True)
+            backfill(table)
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_sync_track ON {table}")
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_sync_tombstone ON {table}")
+        op.drop_index(f"ix_{table}_sync", table_name=table)
+        op.drop_column(table, "change_seq")
+        op.drop_column(table, "change_txid")
+    op.execute("DROP FUNCTION IF EXISTS sync_track()")
+    op.execute("DROP FUNCTION IF EXISTS sync_tombstone()")
+    op.drop_table("sync_tombstones")
+    op.execute("DROP SEQUENCE IF EXISTS sync_change_seq")
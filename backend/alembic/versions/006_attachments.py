@@ -0,0 +1,49 @@
+"""Attachments of orders and reports
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '006'
+down_revision: Union[str, None] = '005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    op.create_table(
+        "attachment_blobs",
+        sa.Column("sha256", sa.String(64), primary_key=True),
+        sa.Column("size", sa.BigInteger(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("linked_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_attachment_blobs_linked_at", "attachment_blobs", ["linked_at"])
+    op.create_table(
+        "attachments",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True, server_default=sa.text("uuid_generate_v7()")),
+        sa.Column("order_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("orders.id"), nullable=False),
+        sa.Column(
+            "report_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("test_reports.id", ondelete="CASCADE"),
+            nullable=True,
+        ),
+        sa.Column("blob_sha256", sa.String(64), sa.ForeignKey("attachment_blobs.sha256"), nullable=False),
+        sa.Column("filename", sa.String(255), nullable=False),
+        sa.Column("media_type", sa.String(100), nullable=False),
+        sa.Column("uploaded_by", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_attachments_order_id", "attachments", ["order_id"])
+    op.create_index("ix_attachments_report_id", "attachments", ["report_id"])
+    op.create_index("ix_attachments_blob_sha256", "attachments", ["blob_sha256"])
+
+def downgrade() -> None:
+    op.drop_table("attachments")
+    op.drop_table("attachment_blobs")
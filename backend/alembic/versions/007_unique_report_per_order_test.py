@@ -0,0 +1,43 @@
+"""One report per order test
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19 00:00:00.000000
+
+Re-sent analyzer results could store a second report for the same order
+test. Existing duplicates are folded into the earliest report of their order
+test (attachments are moved over; the later reports and their trend rows are
+deleted), then a unique index is built without blocking writes.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '007'
+down_revision: Union[str, None] = '006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TEMPORARY TABLE duplicate_reports ON COMMIT DROP AS
+        SELECT id, first_value(id) OVER (PARTITION BY order_test_id ORDER BY created_at, id) AS kept_id
+        FROM test_reports
+        WHERE order_test_id IN (SELECT order_test_id FROM test_reports GROUP BY order_test_id HAVING count(*) > 1)
+    """)
+    op.execute("""
+        UPDATE attachments a SET report_id = d.kept_id
+        FROM duplicate_reports d
+        WHERE a.report_id = d.id AND d.id <> d.kept_id
+    """)
+    op.execute("DELETE FROM test_reports WHERE id IN (SELECT id FROM duplicate_reports WHERE id <> kept_id)")
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ux_test_reports_order_test_id", "test_reports", ["order_test_id"],
+            unique=True, postgresql_concurrently=True,
+        )
+
+def downgrade() -> None:
+    op.drop_index("ux_test_reports_order_test_id", table_name="test_reports")
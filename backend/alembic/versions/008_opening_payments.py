@@ -0,0 +1,40 @@
+"""Opening ledger entries for billings paid before the payments ledger
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-19 00:00:00.000000
+
+Balances are read from the payments ledger only, so a billing settled while
+paid_amount was updated in place would show as unpaid. Each such billing
+gets one payment of its legacy paid_amount (frozen since the ledger took
+over), received when it was paid (or created) and marked by its counter.
+Billings that already have an opening entry are skipped, so the migration
+can be re-run safely.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '008'
+down_revision: Union[str, None] = '007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+OPENING_COUNTER = "opening balance"
+
+def upgrade() -> None:
+    op.execute(f"""
+        INSERT INTO payments (billing_id, amount, method, counter, received_at)
+        SELECT b.id, b.paid_amount, coalesce(b.payment_method, 'CASH'), '{OPENING_COUNTER}',
+               coalesce(b.paid_at, b.created_at, now() AT TIME ZONE 'utc')
+        FROM billings b
+        WHERE b.paid_amount > 0
+          AND NOT EXISTS (SELECT 1 FROM payments p WHERE p.billing_id = b.id AND p.counter = '{OPENING_COUNTER}')
+    """)
+
+def downgrade() -> None:
+    # The entries may already be folded into billing_balances and are the only record of these
+    # payments in the ledger: keep them
+    pass
@@ -0,0 +1,33 @@
+"""Idempotency-Key of attachment uploads
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-19 00:00:00.000000
+
+Uploads stream their bodies past the idempotency middleware, so a retried
+upload is recognised by the key stored on the attachment itself. The unique
+index is built without blocking writes.
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '009'
+down_revision: Union[str, None] = '008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    op.add_column("attachments", sa.Column("idempotency_key", sa.String(64), nullable=True))
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ux_attachments_idempotency_key", "attachments", ["idempotency_key"],
+            unique=True, postgresql_where=sa.text("idempotency_key IS NOT NULL"), postgresql_concurrently=True,
+        )
+
+def downgrade() -> None:
+    op.drop_index("ux_attachments_idempotency_key", table_name="attachments")
+    op.drop_column("attachments", "idempotency_key")
@@ -0,0 +1,30 @@
+"""Result schemas of lab tests; flagging time of reports
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '010'
+down_revision: Union[str, None] = '009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    op.add_column("test_reports", sa.Column("flagged_at", sa.DateTime(), nullable=True))
+    op.add_column("lab_tests", sa.Column("result_schema", postgresql.JSONB(), nullable=True))
+    op.add_column(
+        "lab_tests", sa.Column("result_schema_version", sa.Integer(), nullable=False, server_default="0")
+    )
+
+def downgrade() -> None:
+    op.drop_column("lab_tests", "result_schema_version")
+    op.drop_column("lab_tests", "result_schema")
+    op.drop_column("test_reports", "flagged_at")
@@ -0,0 +1,322 @@
+"""Write-behind audit log.
+
+`audit_log.record(...)` only appends to a bounded in-memory queue, so audited
+requests never wait on the database. A background task COPYs the queue into
+audit_events when AUDIT_BATCH_SIZE events are waiting or every
+AUDIT_FLUSH_INTERVAL seconds, over its own connection (not the request pool).
+When the queue is full or a flush fails, events go to a local JSON-lines spool
+file instead, which is replayed once the database is reachable again. Stopping
+the log flushes whatever is still queued.
+
+Events recorded with a `session` wait on that session and are queued only
+once it commits; a rollback drops them, so a write that never happened is
+never audited as if it had.
+
+Events are written to the audit_events table of the branch that was current
+when they were recorded, with one connection per Postgres node.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, Hashable, List, Optional, TextIO, Tuple
+
+import asyncpg
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.ids import uuid7
+from app.db.branches import Branch, branches, current_branch
+from app.models.audit import AuditAction
+
+logger = logging.getLogger(__name__)
+
+AUDIT_COLUMNS = ["id", "occurred_at", "actor_id", "action", "entity_type", "entity_id", "details"]
+MAX_RECONNECT_DELAY = 60
+# Session.info key of the events waiting for the session's commit
+PENDING_EVENTS = "audit_pending_events"
+
+# (id, occurred_at, actor_id, action, entity_type, entity_id, details json)
+AuditRecord = Tuple[uuid.UUID, datetime, Optional[uuid.UUID], str, str, Optional[str], Optional[str]]
+# (branch name, record)
+QueuedEvent = Tuple[str, AuditRecord]
+
+class AuditLog:
+    def __init__(self, queue_size: int, batch_size: int, flush_interval: float, spool_path: str):
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spool_path = Path(spool_path)
+        self._queue: Deque[QueuedEvent] = deque()
+        self._spool: Optional[TextIO] = None
+        # Per node DSN: connection, earliest reconnect time and current backoff
+        self._conns: Dict[str, asyncpg.Connection] = {}
+        self._retry_at: Dict[str, float] = {}
+        self._reconnect_delay: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+
+        self.recorded = 0
+        self.written = 0
+        self.spooled = 0
+        self.replayed = 0
+        self.failed_flushes = 0
+
+    def record(self, action: AuditAction, entity_type: str, entity_id: Optional[Hashable] = None,
+               actor_id: Optional[uuid.UUID] = None, details: Optional[Dict[str, Any]] = None,
+               session: Optional[AsyncSession] = None) -> None:
+        """Queue an audit event (after `session` commits, if given); never blocks on the database"""
+        queued = current_branch().name, (
+            uuid7(),
+            datetime.utcnow(),
+            actor_id,
+            action.value,
+            entity_type,
+            str(entity_id) if entity_id is not None else None,
+            json.dumps(details, default=str) if details is not None else None,
+        )
+        if session is not None:
+            session.sync_session.info.setdefault(PENDING_EVENTS, []).append(queued)
+            return
+        self.enqueue([queued])
+
+    def enqueue(self, events: List[QueuedEvent]) -> None:
+        self.recorded += len(events)
+        for queued in events:
+            if len(self._queue) >= self.queue_size:
+                self._spool_events([queued])
+                continue
+            self._queue.append(queued)
+        if len(self._queue) >= self.batch_size:
+            self._wakeup.set()
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run(), name="audit-log-writer")
+
+    async def stop(self) -> None:
+        """Flush everything still queued (spooling what cannot be written) and close"""
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+        for conn in self._conns.values():
+            if not conn.is_closed():
+                await conn.close()
+        self._conns.clear()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+                if self._stopping:
+                    return
+                await self._replay_spool()
+            except Exception:
+                logger.exception("Audit log writer iteration failed")
+
+    async def flush(self) -> None:
+        while self._queue:
+            batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+            failed: List[QueuedEvent] = []
+            for name, records in _by_branch(batch).items():
+                if not await self._write(branches.get(name), records):
+                    failed.extend((name, record) for record in records)
+            if failed:
+                self._spool_events(failed + list(self._queue))
+                self._queue.clear()
+                return
+
+    async def _write(self, branch: Optional[Branch], batch: List[AuditRecord]) -> bool:
+        if branch is None:
+            return False  # branch no longer configured; keep the events spooled
+        conn = await self._connection(branch.dsn)
+        if conn is None:
+            return False
+        try:
+            await conn.copy_records_to_table(
+                "audit_events", records=batch, columns=AUDIT_COLUMNS, schema_name=branch.schema
+            )
+        except (asyncpg.PostgresError, OSError) as e:
+            self.failed_flushes += 1
+            logger.error(f"Audit flush of {len(batch)} events failed: {str(e)}")
+            await self._drop_connection(branch.dsn)
+            return False
+        self.written += len(batch)
+        return True
+
+    async def _connection(self, dsn: str) -> Optional[asyncpg.Connection]:
+        conn = self._conns.get(dsn)
+        if conn is not None and not conn.is_closed():
+            return conn
+        if time.monotonic() < self._retry_at.get(dsn, 0.0):
+            return None
+        delay = self._reconnect_delay.get(dsn, 1)
+        try:
+            conn = self._conns[dsn] = await asyncpg.connect(dsn)
+            self._reconnect_delay[dsn] = 1
+            return conn
+        except (asyncpg.PostgresError, OSError) as e:
+            logger.warning(f"Audit log cannot connect, spooling for {delay}s: {str(e)}")
+            self._retry_at[dsn] = time.monotonic() + delay
+            self._reconnect_delay[dsn] = min(delay * 2, MAX_RECONNECT_DELAY)
+            return None
+
+    async def _drop_connection(self, dsn: str) -> None:
+        conn = self._conns.pop(dsn, None)
+        if conn is not None:
+            try:
+                await conn.close(timeout=5)
+            except Exception:
+                conn.terminate()
+
+    def _spool_events(self, events: List[QueuedEvent]) -> None:
+        """Append events to the spool file; a plain buffered write, no database involved"""
+        try:
+            if self._spool is None:
+                self.spool_path.parent.mkdir(parents=True, exist_ok=True)
+                self._spool = open(self.spool_path, "a", encoding="utf-8")
+            for name, event in events:
+                self._spool.write(json.dumps({"branch": name, **dict(zip(AUDIT_COLUMNS, event))}, default=str) + "\n")
+            self._spool.flush()
+            self.spooled += len(events)
+        except OSError as e:
+            logger.critical(f"Lost {len(events)} audit events, spool file unwritable: {str(e)}")
+
+    async def _replay_spool(self) -> None:
+        """Move spooled events into the table once the database is reachable again"""
+        replay_path = self.spool_path.with_name(self.spool_path.name + ".replay")
+        if not replay_path.exists():
+            if self._spool is None and not self.spool_path.exists():
+                return
+            if self._spool is not None:
+                self._spool.close()
+                self._spool = None
+            os.replace(self.spool_path, replay_path)
+
+        events = await asyncio.to_thread(self._read_spool, replay_path)
+        by_node: Dict[str, List[Tuple[Branch, List[AuditRecord]]]] = {}
+        remaining: List[QueuedEvent] = []
+        for name, records in _by_branch(events).items():
+            branch = branches.get(name)
+            if branch is None:
+                remaining.extend((name, record) for record in records)
+            else:
+                by_node.setdefault(branch.dsn, []).append((branch, records))
+
+        replayed = 0
+        for dsn, groups in by_node.items():
+            pending = [(branch.name, record) for branch, records in groups for record in records]
+            conn = await self._connection(dsn)
+            if conn is None:
+                remaining.extend(pending)
+                continue
+            try:
+                # One transaction per node: a failure leaves that node's events intact and nothing half-written
+                async with conn.transaction():
+                    for branch, records in groups:
+                        for start in range(0, len(records), self.batch_size):
+                            await conn.copy_records_to_table(
+                                "audit_events", records=records[start:start + self.batch_size],
+                                columns=AUDIT_COLUMNS, schema_name=branch.schema
+                            )
+                replayed += len(pending)
+            except (asyncpg.PostgresError, OSError) as e:
+                self.failed_flushes += 1
+                logger.error(f"Audit spool replay failed, will retry: {str(e)}")
+                await self._drop_connection(dsn)
+                remaining.extend(pending)
+
+        if remaining:
+            if replayed:
+                await asyncio.to_thread(self._rewrite_spool, replay_path, remaining)
+        else:
+            replay_path.unlink(missing_ok=True)
+        if replayed:
+            self.replayed += replayed
+            logger.info(f"Replayed {replayed} spooled audit events")
+
+    @staticmethod
+    def _rewrite_spool(path: Path, events: List[QueuedEvent]) -> None:
+        """Replace the replay file with the events that still have to be written"""
+        partial = path.with_name(path.name + ".tmp")
+        with open(partial, "w", encoding="utf-8") as spool:
+            for name, event in events:
+                spool.write(json.dumps({"branch": name, **dict(zip(AUDIT_COLUMNS, event))}, default=str) + "\n")
+        os.replace(partial, path)
+
+    @staticmethod
+    def _read_spool(path: Path) -> List[QueuedEvent]:
+        records = []
+        with open(path, encoding="utf-8") as spool:
+            for line in spool:
+                try:
+                    event = json.loads(line)
+                    # Spools written before branches existed belong to the default branch
+                    records.append((event.get("branch", settings.DEFAULT_BRANCH), (
+                        uuid.UUID(event["id"]),
+                        datetime.fromisoformat(event["occurred_at"]),
+                        uuid.UUID(event["actor_id"]) if event["actor_id"] else None,
+                        event["action"],
+                        event["entity_type"],
+                        event["entity_id"],
+                        event["details"],
+                    )))
+                except (ValueError, KeyError, TypeError):
+                    logger.warning(f"Skipping unreadable audit spool line in {path}")
+        return records
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "queued": len(self._queue),
+            "recorded": self.recorded,
+            "written": self.written,
+            "spooled": self.spooled,
+            "replayed": self.replayed,
+            "failed_flushes": self.failed_flushes,
+            "spool_pending": self.spool_path.exists()
+                or self.spool_path.with_name(self.spool_path.name + ".replay").exists(),
+        }
+
+def _by_branch(events: List[QueuedEvent]) -> Dict[str, List[AuditRecord]]:
+    grouped: Dict[str, List[AuditRecord]] = {}
+    for name, record in events:
+        grouped.setdefault(name, []).append(record)
+    return grouped
+
+audit_log = AuditLog(
+    settings.AUDIT_QUEUE_SIZE, settings.AUDIT_BATCH_SIZE, settings.AUDIT_FLUSH_INTERVAL, settings.AUDIT_SPOOL_PATH
+)
+
+# Both events also fire for savepoints; only the outermost transaction settles the events
+@event.listens_for(Session, "after_commit")
+def _enqueue_committed(session: Session) -> None:
+    if session.in_nested_transaction():
+        return
+    pending = session.info.pop(PENDING_EVENTS, None)
+    if pending:
+        audit_log.enqueue(pending)
+
+@event.listens_for(Session, "after_rollback")
+def _drop_rolled_back(session: Session) -> None:
+    if not session.in_nested_transaction():
+        session.info.pop(PENDING_EVENTS, None)
@@ -4,11 +4,16 @@ from typing import Optional, Dict, Any
 from fastapi import HTTPException, status, Depends, Request, Cookie
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
 
 from app.core.config import settings
-from app.db.session import get_db
+from app.core.cache import row_version, user_cache
+from app.core.tracing import start_span
+from app.db.branches import current_branch
+from app.db.session import get_db, get_db_context
 from app.models.user import User, UserRole
 
 # JWT Configuration
@@ -19,14 +24,22 @@ REFRESH_TOKEN_EXPIRE_DAYS = settings.REFRESH_TOKEN_EXPIRE_DAYS
 
 security = HTTPBearer(auto_error=False)
 
+# Columns of the authenticated user. The cache holds the immutable Row, never an
+# ORM instance, since every concurrent request of that user shares the entry.
+CURRENT_USER_COLUMNS = (
+    User.id, User.username, User.full_name, User.role, User.is_active, User.created_at, User.updated_at
+)
+
 class TokenType:
     ACCESS = "access"
     REFRESH = "refresh"
+    PROFILE = "profile"
 
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+    to_encode.setdefault("branch", current_branch().name)
     to_encode.update({
         "exp": expire,
         "type": TokenType.ACCESS,
@@ -38,6 +51,7 @@ def create_refresh_token(data: Dict[str, Any]) -> str:
     """Create JWT refresh token"""
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    to_encode.setdefault("branch", current_branch().name)
     to_encode.update({
         "exp": expire,
         "type": TokenType.REFRESH,
@@ -45,6 +59,25 @@ def create_refresh_token(data: Dict[str, Any]) -> str:
     })
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+def create_profile_token(data: Dict[str, Any]) -> str:
+    """Create short-lived JWT that switches on profiling for the requests carrying it"""
+    to_encode = data.copy()
+    expire = datetime.utcnow() + timedelta(minutes=settings.PROFILING_TOKEN_EXPIRE_MINUTES)
+    to_encode.update({
+        "exp": expire,
+        "type": TokenType.PROFILE,
+        "iat": datetime.utcnow()
+    })
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+def token_branch(token: str) -> Optional[str]:
+    """Branch claim of a genuine token, expired or not (None if the signature does not verify)"""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], options={"verify_exp": False})
+    except jwt.PyJWTError:
+        return None
+    return payload.get("branch")
+
 def decode_token(token: str, expected_type: str = TokenType.ACCESS) -> Dict[str, Any]:
     """Decode and validate JWT token"""
     try:
@@ -74,8 +107,8 @@ async def get_current_user(
     db: AsyncSession = Depends(get_db),
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
     access_token: Optional[str] = Cookie(None)
-) -> User:
-    """Get current authenticated user from token (Bearer or Cookie)"""
+) -> Row:
+    """Get current authenticated user (a CURRENT_USER_COLUMNS row) from token (Bearer or Cookie)"""
     token = None
     
     # Try to get token from Authorization header first
@@ -92,7 +125,8 @@ async def get_current_user(
         )
     
     # Decode token and get user ID
-    payload = decode_token(token, TokenType.ACCESS)
+    with start_span("auth.decode_token"):
+        payload = decode_token(token, TokenType.ACCESS)
     user_id = payload.get("sub")
     
     if not user_id:
@@ -101,12 +135,20 @@ async def get_current_user(
             detail="Invalid token payload"
         )
     
-    # Get user from database
-    from sqlalchemy import select
-    result = await db.execute(
-        select(User).where(User.id == user_id, User.is_active == True)
-    )
-    user = result.scalar_one_or_none()
+    # Get user from the local cache, falling back to the database
+    with start_span("auth.user_lookup") as span:
+        user = user_cache.get(user_id)
+        if span:
+            span.set_attribute("cache.hit", user is not None)
+        if user is None:
+            # Taken before the read: an eviction landing meanwhile means the row may be stale
+            generation = user_cache.generation
+            result = await db.execute(
+                select(*CURRENT_USER_COLUMNS).where(User.id == user_id, User.is_active == True)
+            )
+            user = result.one_or_none()
+            if user:
+                user_cache.set(user_id, user, version=row_version(user.updated_at), generation=generation)
     
     if not user:
         raise HTTPException(
@@ -116,7 +158,20 @@ async def get_current_user(
     
     return user
 
-async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_streaming_user(
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    access_token: Optional[str] = Cookie(None)
+) -> Row:
+    """Authenticate a long-lived (streaming) request.
+
+    Uses a short-lived session so no pooled connection stays checked out for
+    the lifetime of the response, as it would with the get_db dependency.
+    """
+    async with get_db_context() as db:
+        return await get_current_user(request, db, credentials, access_token)
+
+async def get_current_active_user(current_user: Row = Depends(get_current_user)) -> Row:
     """Get current active user"""
     if not current_user.is_active:
         raise HTTPException(
@@ -130,7 +185,7 @@ class RoleChecker:
     def __init__(self, allowed_roles: list[UserRole]):
         self.allowed_roles = allowed_roles
 
-    def __call__(self, current_user: User = Depends(get_current_active_user)) -> User:
+    def __call__(self, current_user: Row = Depends(get_current_active_user)) -> Row:
         if current_user.role not in self.allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -0,0 +1,190 @@
+"""In-process caches kept coherent across workers through Postgres NOTIFY.
+
+Writers call `invalidation_bus.publish(db, entity, id, version)` inside their
+transaction; every worker (including the writer) evicts the entry when the
+NOTIFY is delivered on commit. Entries are only served while the listener is
+connected, and all caches are flushed after a reconnect, since invalidations
+sent in between are lost.
+"""
+
+import json
+import logging
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Hashable, Optional, Tuple, Union
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.notify import notification_listener, notify
+
+logger = logging.getLogger(__name__)
+
+LAG_SAMPLES = 1000
+
+def row_version(updated_at: datetime) -> float:
+    """Cache version of a row from its updated_at: ordered, and JSON-safe for NOTIFY"""
+    return updated_at.timestamp()
+
+class LocalCache:
+    """Bounded LRU cache of (entity id -> value) with a TTL safety net"""
+
+    def __init__(self, entity: str, max_entries: int, ttl_seconds: int):
+        self.entity = entity
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # id -> (version, expires_at, value)
+        self._entries: "OrderedDict[str, Tuple[Any, float, Any]]" = OrderedDict()
+        # Bumped by every eviction, so a reader can tell its row may be stale
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, entity_id: Hashable) -> Optional[Any]:
+        key = str(entity_id)
+        entry = self._entries.get(key)
+        if entry is None or entry[1] < time.monotonic() or not notification_listener.connected:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[2]
+
+    def set(self, entity_id: Hashable, value: Any, version: Any = None, generation: Optional[int] = None) -> None:
+        """Store `value`, unless an eviction happened since `generation` was read"""
+        # Without a live listener we could miss invalidations, so do not cache at all
+        if not notification_listener.connected:
+            return
+        if generation is not None and generation != self.generation:
+            return
+        key = str(entity_id)
+        self._entries[key] = (version, time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def evict(self, entity_id: Hashable, version: Any = None) -> bool:
+        """Drop an entry unless it is already newer than `version`"""
+        key = str(entity_id)
+        self.generation += 1
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+        cached_version = entry[0]
+        if version is not None and cached_version is not None and cached_version > version:
+            return False
+        del self._entries[key]
+        return True
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+class InvalidationHook:
+    """Bus registration for state kept outside a LocalCache.
+
+    `callback(id)` runs for each invalidation of `entity`, and `callback(None)`
+    on a flush. The state is still used while the listener is disconnected, so
+    it must bound its own staleness (e.g. with a TTL).
+    """
+
+    def __init__(self, entity: str, callback: Callable[[Optional[str]], None]):
+        self.entity = entity
+        self.callback = callback
+        self.calls = 0
+
+    def evict(self, entity_id: Hashable, version: Any = None) -> bool:
+        self.calls += 1
+        self.callback(str(entity_id))
+        return True
+
+    def clear(self) -> None:
+        self.calls += 1
+        self.callback(None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"calls": self.calls}
+
+class InvalidationBus:
+    def __init__(self):
+        self._caches: Dict[str, Union[LocalCache, InvalidationHook]] = {}
+        self._lag_ms: Deque[float] = deque(maxlen=LAG_SAMPLES)
+        self.published = 0
+        self.received = 0
+        self.evictions = 0
+        self.flushes = 0
+
+    def register(self, cache: Union[LocalCache, InvalidationHook]) -> Union[LocalCache, InvalidationHook]:
+        self._caches[cache.entity] = cache
+        return cache
+
+    async def start(self) -> None:
+        await notification_listener.subscribe(settings.CACHE_NOTIFY_CHANNEL, self._on_notify)
+        notification_listener.on_reconnect(self.flush)
+
+    async def publish(self, db: AsyncSession, entity: str, entity_id: Hashable, version: Any = None) -> None:
+        """Announce a write; delivered to every worker when `db` commits"""
+        cache = self._caches.get(entity)
+        if cache is not None:
+            cache.evict(entity_id)
+        payload = {"entity": entity, "id": str(entity_id), "version": version, "ts": time.time()}
+        await notify(db, settings.CACHE_NOTIFY_CHANNEL, json.dumps(payload))
+        self.published += 1
+
+    def flush(self) -> None:
+        for cache in self._caches.values():
+            cache.clear()
+        self.flushes += 1
+        logger.info("Flushed all local caches")
+
+    def _on_notify(self, channel: str, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+            entity, entity_id = message["entity"], message["id"]
+        except (ValueError, KeyError) as e:
+            logger.warning(f"Ignoring malformed invalidation: {str(e)}")
+            return
+        self.received += 1
+        # Publish time is taken before commit, so lag includes the writer's transaction
+        if "ts" in message:
+            self._lag_ms.append(max(time.time() - message["ts"], 0) * 1000)
+        cache = self._caches.get(entity)
+        if cache is not None and cache.evict(entity_id, message.get("version")):
+            self.evictions += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        lags = sorted(self._lag_ms)
+
+        def percentile(p: float) -> Optional[float]:
+            return round(lags[min(int(len(lags) * p), len(lags) - 1)], 2) if lags else None
+
+        return {
+            "listener_connected": notification_listener.connected,
+            "published": self.published,
+            "received": self.received,
+            "evictions": self.evictions,
+            "flushes": self.flushes,
+            "lag_ms": {
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "p99": percentile(0.99),
+                "max": round(lags[-1], 2) if lags else None,
+                "samples": len(lags),
+            },
+            "caches": {entity: cache.stats() for entity, cache in self._caches.items()},
+        }
+
+invalidation_bus = InvalidationBus()
+
+user_cache = invalidation_bus.register(
+    LocalCache("user", settings.USER_CACHE_MAX_ENTRIES, settings.USER_CACHE_TTL_SECONDS)
+)
+
+# Compiled reference-range table used for result flagging (one entry per branch)
+reference_range_cache = invalidation_bus.register(
+    LocalCache("reference_ranges", 1, settings.USER_CACHE_TTL_SECONDS)
+)
@@ -0,0 +1,160 @@
+"""Content-encoding negotiation and precompressed payloads.
+
+gzip is always available; brotli and zstd are used when their (optional)
+packages are installed. Streaming responses are compressed on the fly by
+CompressionMiddleware; payloads that rarely change (the OpenAPI document, the
+lab-test catalog) are compressed once at maximum level with PrecompressedPayload
+and served as-is.
+"""
+
+import asyncio
+import hashlib
+import time
+import zlib
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+def available_encodings() -> List[str]:
+    """Supported encodings in server preference order"""
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.append("gzip")
+    return encodings
+
+ENCODINGS = available_encodings()
+
+def negotiate_encoding(accept_encoding: str, offered: Optional[List[str]] = None) -> Optional[str]:
+    """Pick the preferred offered encoding the client accepts (q > 0), or None for identity"""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.strip().lower()] = q
+    wildcard = accepted.get("*", 0.0)
+    for encoding in offered if offered is not None else ENCODINGS:
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+class StreamCompressor:
+    """Incremental compressor: feed chunks with compress(), end with finish()"""
+
+    def __init__(self, encoding: str, level: Optional[int] = None):
+        self.encoding = encoding
+        if encoding == "gzip":
+            level = settings.COMPRESSION_GZIP_LEVEL if level is None else level
+            compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip container
+            self._compress, self._finish = compressor.compress, compressor.flush
+        elif encoding == "br":
+            quality = settings.COMPRESSION_BROTLI_QUALITY if level is None else level
+            compressor = brotli.Compressor(quality=quality)
+            self._compress, self._finish = compressor.process, compressor.finish
+        elif encoding == "zstd":
+            level = settings.COMPRESSION_ZSTD_LEVEL if level is None else level
+            compressor = zstandard.ZstdCompressor(level=level).compressobj()
+            self._compress, self._finish = compressor.compress, compressor.flush
+        else:
+            raise ValueError(f"Unsupported encoding: {encoding}")
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compress(data)
+
+    def finish(self) -> bytes:
+        return self._finish()
+
+MAX_LEVELS = {"gzip": 9, "br": 11, "zstd": 19}
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    compressor = StreamCompressor(encoding, level)
+    return compressor.compress(data) + compressor.finish()
+
+class PrecompressedPayload:
+    """A fixed response body stored once per encoding at maximum compression"""
+
+    def __init__(self, body: bytes, media_type: str = "application/json"):
+        self.body = body
+        self.media_type = media_type
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        self.encoded: Dict[str, bytes] = {}
+        if len(body) >= settings.COMPRESSION_MIN_SIZE:
+            for encoding in ENCODINGS:
+                self.encoded[encoding] = compress(body, encoding, MAX_LEVELS[encoding])
+
+    def response(self, request: Request, max_age: int = 0) -> Response:
+        headers = {
+            "ETag": self.etag,
+            "Vary": "Accept-Encoding",
+            "Cache-Control": f"private, max-age={max_age}",
+        }
+        if self.etag in request.headers.get("if-none-match", ""):
+            return Response(status_code=304, headers=headers)
+
+        encoding = negotiate_encoding(request.headers.get("accept-encoding", ""), list(self.encoded))
+        if encoding is None:
+            return Response(self.body, media_type=self.media_type, headers=headers)
+        headers["Content-Encoding"] = encoding
+        return Response(self.encoded[encoding], media_type=self.media_type, headers=headers)
+
+class PayloadCache:
+    """Builds a PrecompressedPayload on first use and keeps it for `ttl_seconds` (None: forever)"""
+
+    def __init__(self, build: Callable[[], Awaitable[bytes]], ttl_seconds: Optional[int] = None,
+                 media_type: str = "application/json"):
+        self.build = build
+        self.ttl_seconds = ttl_seconds
+        self.media_type = media_type
+        self._payload: Optional[PrecompressedPayload] = None
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def get(self) -> PrecompressedPayload:
+        if self._payload is not None and (self.ttl_seconds is None or time.monotonic() < self._expires_at):
+            return self._payload
+        async with self._lock:
+            if self._payload is None or (self.ttl_seconds is not None and time.monotonic() >= self._expires_at):
+                body = await self.build()
+                # Maximum-level brotli/zstd takes a while on large bodies; keep it off the loop
+                self._payload = await asyncio.to_thread(PrecompressedPayload, body, self.media_type)
+                self._expires_at = time.monotonic() + (self.ttl_seconds or 0)
+        return self._payload
+
+    def invalidate(self) -> None:
+        self._payload = None
+
+def serve_precompressed_openapi(app: FastAPI) -> None:
+    """Replace FastAPI's OpenAPI route with one serving the schema precompressed"""
+    openapi_url = app.openapi_url
+    app.router.routes = [route for route in app.router.routes if getattr(route, "path", None) != openapi_url]
+
+    async def build() -> bytes:
+        return JSONResponse(app.openapi()).body
+
+    cache = PayloadCache(build)
+
+    async def openapi(request: Request) -> Response:
+        return (await cache.get()).response(request)
+
+    app.add_route(openapi_url, openapi, include_in_schema=False)
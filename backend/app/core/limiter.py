@@ -0,0 +1,155 @@
+"""Adaptive concurrency limits per route class (gradient algorithm).
+
+Each limiter tracks a baseline RTT (latency without queueing) and the recent RTT. While recent
+latency stays near the baseline the limit grows by roughly sqrt(limit) per
+window. When requests start queueing somewhere downstream (DB pool, CPU) and
+latency rises, the gradient baseline / recent drops below 1 and the limit
+shrinks proportionally. Requests over the limit wait briefly in a bounded queue
+and are otherwise rejected, instead of piling up until DB_POOL_TIMEOUT.
+"""
+
+import asyncio
+import math
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from app.core.config import settings
+
+class GradientLimiter:
+    def __init__(self, name: str, initial_limit: int, min_limit: int, max_limit: int,
+                 max_queue: int, smoothing: float = 0.2, tolerance: float = 1.5,
+                 sample_window: int = 20, baseline_drift: float = 0.01):
+        self.name = name
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue = max_queue
+        self.smoothing = smoothing
+        self.tolerance = tolerance  # how much latency growth counts as "no queueing"
+        self.sample_window = sample_window
+        self.baseline_drift = baseline_drift
+
+        self.inflight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._long_rtt: Optional[float] = None
+        self._window_sum = 0.0
+        self._window_count = 0
+        self._window_max_inflight = 0
+        self.short_rtt: Optional[float] = None
+
+        self.accepted = 0
+        self.rejected = 0
+        self.dropped = 0
+
+    async def acquire(self, timeout: float) -> bool:
+        """Take a slot, waiting up to `timeout` seconds in the queue; False means shed"""
+        if self.inflight < int(self.limit) and not self._waiters:
+            self._take()
+            return True
+        if len(self._waiters) >= self.max_queue or timeout <= 0:
+            self.rejected += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait({waiter}, timeout=timeout)
+        except asyncio.CancelledError:
+            if waiter.done():
+                # Handed a slot just as we were cancelled: pass it on, nobody will release it
+                self.inflight -= 1
+                self._wake()
+            else:
+                self._waiters.remove(waiter)
+                waiter.cancel()
+            raise
+        if waiter.done():
+            return True  # the releasing request handed its slot over
+        self._waiters.remove(waiter)
+        waiter.cancel()
+        self.rejected += 1
+        return False
+
+    def release(self, rtt: float, ok: bool) -> None:
+        """Return a slot and feed the request's latency (seconds) into the limit"""
+        self.inflight -= 1
+        if ok:
+            self._sample(rtt)
+        else:
+            # Errors and timeouts under load are the strongest overload signal
+            self.dropped += 1
+            self.limit = max(self.min_limit, self.limit * 0.9)
+        self._wake()
+
+    def _wake(self) -> None:
+        """Hand free slots to queued requests, oldest first"""
+        while self._waiters and self.inflight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._take()
+                waiter.set_result(True)
+
+    def _take(self) -> None:
+        self.inflight += 1
+        self.accepted += 1
+        self._window_max_inflight = max(self._window_max_inflight, self.inflight)
+
+    def _sample(self, rtt: float) -> None:
+        self._window_sum += rtt
+        self._window_count += 1
+        if self._window_count < self.sample_window:
+            return
+
+        short = self._window_sum / self._window_count
+        max_inflight = self._window_max_inflight
+        self._window_sum, self._window_count, self._window_max_inflight = 0.0, 0, self.inflight
+        self.short_rtt = short
+
+        # Baseline ("no queueing") latency: follows drops immediately and creeps up
+        # only slowly, so sustained overload cannot redefine itself as normal
+        if self._long_rtt is None or short < self._long_rtt:
+            self._long_rtt = short
+        else:
+            self._long_rtt += (short - self._long_rtt) * self.baseline_drift
+
+        # App-limited: we never used half the limit, so latency says nothing about it
+        if max_inflight * 2 < self.limit:
+            return
+
+        gradient = max(0.5, min(1.0, self.tolerance * self._long_rtt / short))
+        new_limit = self.limit * gradient + math.sqrt(self.limit)
+        self.limit = self.limit * (1 - self.smoothing) + new_limit * self.smoothing
+        self.limit = max(self.min_limit, min(self.max_limit, self.limit))
+
+    def retry_after(self) -> int:
+        """Seconds a shed client should wait: roughly one queue drain at current latency"""
+        rtt = self.short_rtt or self._long_rtt or 1.0
+        return max(1, math.ceil(rtt * (len(self._waiters) + 1)))
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "limit": round(self.limit, 2),
+            "inflight": self.inflight,
+            "queued": len(self._waiters),
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "dropped": self.dropped,
+            "short_rtt_ms": round(self.short_rtt * 1000, 2) if self.short_rtt else None,
+            "long_rtt_ms": round(self._long_rtt * 1000, 2) if self._long_rtt else None,
+        }
+
+def _build_limiter(name: str, initial_limit: int) -> GradientLimiter:
+    return GradientLimiter(
+        name,
+        initial_limit=initial_limit,
+        min_limit=settings.ADMISSION_MIN_LIMIT,
+        max_limit=settings.ADMISSION_MAX_LIMIT,
+        max_queue=settings.ADMISSION_MAX_QUEUE,
+    )
+
+# Route classes: auth is bcrypt/CPU bound, reads and writes mostly wait on the DB pool
+route_limiters: Dict[str, GradientLimiter] = {
+    "auth": _build_limiter("auth", settings.ADMISSION_AUTH_INITIAL_LIMIT),
+    "read": _build_limiter("read", settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW),
+    "write": _build_limiter("write", settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW),
+}
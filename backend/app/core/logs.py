@@ -0,0 +1,227 @@
+"""Non-blocking logging.
+
+Loggers keep their usual API, but the root logger has a single QueueHandler:
+a logging call renders its message (and traceback) in the calling thread and
+appends the record to a bounded in-memory queue, and a QueueListener thread
+does the formatting and the stdout writes. The event loop never waits on
+terminal or disk I/O, and when the queue is full records are dropped and
+counted rather than blocking.
+
+Before a record is queued it is tagged with the request id (RequestIdMiddleware,
+or the job for background jobs), the branch and the trace id, and written out
+as one JSON object per line (LOG_FORMAT=text for local development). Repeated
+warnings and errors are rate limited per call site (the message text varies
+with its arguments, so it is not part of the key): past LOG_DEDUPE_BURST
+records within LOG_DEDUPE_WINDOW_SECONDS the rest are only counted, and the next one
+logged after the window carries the count as `suppressed`.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.tracing import current_span
+from app.db.branches import current_branch
+
+logger = logging.getLogger(__name__)
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s"
+MAX_DEDUPE_KEYS = 10000
+
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+def current_request_id() -> Optional[str]:
+    return _request_id.get()
+
+class use_request_id:
+    """Tag log records of the block with `request_id` (restored on exit)"""
+
+    __slots__ = ("request_id", "token")
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+
+    def __enter__(self) -> str:
+        self.token = _request_id.set(self.request_id)
+        return self.request_id
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        _request_id.reset(self.token)
+
+class ContextFilter(logging.Filter):
+    """Copy request id, branch and trace id onto the record while still in the caller's context"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get() or "-"
+        record.branch = current_branch().name
+        span = current_span()
+        record.trace_id = span.trace_id if span is not None else None
+        return True
+
+class DedupeFilter(logging.Filter):
+    """Rate limit repeated warnings and errors (same logger, level, call site and exception type)"""
+
+    def __init__(self, window_seconds: float, burst: int):
+        super().__init__()
+        self.window_seconds = window_seconds
+        self.burst = burst
+        # -> [window start, records in window, suppressed, first message of the window]
+        self._windows: Dict[Hashable, List[Any]] = {}
+        self._lock = threading.Lock()
+        self.suppressed = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING or self.burst <= 0:
+            return True
+        key = (
+            record.name, record.levelno, record.pathname, record.lineno,
+            record.exc_info[0] if record.exc_info else None,
+        )
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.window_seconds:
+                if window is not None and window[2]:
+                    record.suppressed = window[2]
+                if window is None and len(self._windows) >= MAX_DEDUPE_KEYS:
+                    self._prune(now)
+                self._windows[key] = [now, 1, 0, record.getMessage()]
+                return True
+            window[1] += 1
+            if window[1] <= self.burst:
+                return True
+            window[2] += 1
+            self.suppressed += 1
+            return False
+
+    def _prune(self, now: float) -> None:
+        for key in [key for key, window in self._windows.items() if now - window[0] >= self.window_seconds]:
+            del self._windows[key]
+
+    def pending(self) -> List[Tuple[Hashable, int, str]]:
+        """(key, count, first message) of records suppressed in windows no later record has reported yet"""
+        with self._lock:
+            return [(key, window[2], window[3]) for key, window in self._windows.items() if window[2]]
+
+class BoundedQueueHandler(QueueHandler):
+    """QueueHandler that drops (and counts) records when the listener falls behind"""
+
+    def __init__(self, maxsize: int):
+        super().__init__(queue.Queue(maxsize))
+        self.dropped = 0
+        self._exc_formatter = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render now: args may be mutated later and tracebacks pin their frames.
+        # Unlike QueueHandler.prepare, keep the traceback apart from the message.
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = self._exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {
+    "message", "asctime", "request_id", "branch", "trace_id",
+}
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record; `extra=` fields are included as is"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id and request_id != "-":
+            entry["request_id"] = request_id
+        for key in ("branch", "trace_id"):
+            value = getattr(record, key, None)
+            if value:
+                entry[key] = value
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+_handler: Optional[BoundedQueueHandler] = None
+_listener: Optional[QueueListener] = None
+_dedupe: Optional[DedupeFilter] = None
+
+def setup_logging() -> None:
+    """Route every record through the queue; safe to call more than once"""
+    global _handler, _listener, _dedupe
+    if _listener is not None:
+        return
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter() if settings.LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT))
+
+    _dedupe = DedupeFilter(settings.LOG_DEDUPE_WINDOW_SECONDS, settings.LOG_DEDUPE_BURST)
+    _handler = BoundedQueueHandler(settings.LOG_QUEUE_SIZE)
+    _handler.addFilter(_dedupe)
+    _handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(_handler)
+    root.setLevel(settings.LOG_LEVEL)
+    # uvicorn installs stream handlers of its own; send its records (access log included) through the queue too
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers.clear()
+        uvicorn_logger.propagate = True
+
+    _listener = QueueListener(_handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    # Flush what is still queued when the process exits
+    atexit.register(stop_logging)
+    logger.info(f"Settings loaded from {settings.model_config.get('env_file')} (ENV={settings.ENV})")
+
+def stop_logging() -> None:
+    """Report pending suppressed counts and write out the queue"""
+    global _listener
+    if _listener is None:
+        return
+    # The reports all come from this call site: keep them from rate limiting each other
+    _handler.removeFilter(_dedupe)
+    for (name, level, *_), count, message in _dedupe.pending():
+        logging.getLogger(name).log(level, f"{count} more like: {message}", extra={"suppressed": count})
+    _listener.stop()
+    _listener = None
+
+def log_metrics() -> Dict[str, Any]:
+    if _handler is None:
+        return {"enabled": False}
+    return {
+        "enabled": True,
+        "queued": _handler.queue.qsize(),
+        "dropped": _handler.dropped,
+        "suppressed": _dedupe.suppressed,
+    }
@@ -0,0 +1,235 @@
+"""Lightweight in-process span tracing.
+
+Spans propagate through contextvars (including into SQLAlchemy's greenlets),
+finished spans go to a bounded ring buffer, and a background task flushes the
+buffer to OTLP/JSON files under TRACES_DIR, so no collector is needed. A trace
+is sampled once at its root; inside an unsampled trace `start_span` is a no-op.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from collections import deque
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = f"{error.__class__.__name__}: {error}"
+        _buffer.append(self)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 2 if self.parent_id is None else 1,  # SERVER for roots, INTERNAL otherwise
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+_buffer: Deque[Span] = deque(maxlen=settings.TRACING_BUFFER_SIZE)
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+class start_span:
+    """Context manager opening a child of the current span, if the trace is sampled"""
+
+    __slots__ = ("name", "attributes", "span", "token")
+
+    def __init__(self, name: str, **attributes: Any):
+        self.name = name
+        self.attributes = attributes
+        self.span: Optional[Span] = None
+
+    def __enter__(self) -> Optional[Span]:
+        parent = _current_span.get()
+        if parent is None:
+            return None
+        self.span = Span(self.name, parent.trace_id, parent.span_id, self.attributes)
+        self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self.span is not None:
+            _current_span.reset(self.token)
+            self.span.end(exc)
+
+def start_trace(name: str, trace_id: Optional[str] = None, parent_id: Optional[str] = None,
+                sampled: Optional[bool] = None, **attributes: Any) -> Optional[Span]:
+    """Create a root span (sampled at TRACING_SAMPLE_RATE unless the caller decided).
+
+    TRACING_ENABLED overrides every decision, including one propagated by a caller.
+    """
+    if sampled is None:
+        sampled = random.random() < settings.TRACING_SAMPLE_RATE
+    sampled = settings.TRACING_ENABLED and sampled
+    if not sampled:
+        return None
+    return Span(name, trace_id or os.urandom(16).hex(), parent_id, attributes)
+
+class use_span:
+    """Make `span` current for the block and end it on exit"""
+
+    __slots__ = ("span", "token")
+
+    def __init__(self, span: Span):
+        self.span = span
+
+    def __enter__(self) -> Span:
+        self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        _current_span.reset(self.token)
+        self.span.end(exc)
+
+def start_detached_span(name: str, **attributes: Any) -> Optional[Span]:
+    """Child of the current span that is ended explicitly (for callback-style hooks)"""
+    parent = _current_span.get()
+    if parent is None:
+        return None
+    return Span(name, parent.trace_id, parent.span_id, attributes)
+
+def instrument_engine(engine) -> None:
+    """Record a span per SQL statement executed on an (async) engine"""
+    from sqlalchemy import event
+
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        span = start_detached_span(
+            "db.query", **{"db.system": "postgresql", "db.statement": statement[:1000], "db.executemany": executemany}
+        )
+        conn.info.setdefault("trace_spans", []).append(span)
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        spans = conn.info.get("trace_spans")
+        span = spans.pop() if spans else None
+        if span is not None:
+            if cursor.rowcount is not None and cursor.rowcount >= 0:
+                span.set_attribute("db.rowcount", cursor.rowcount)
+            span.end()
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(exception_context):
+        conn = exception_context.connection
+        spans = conn.info.get("trace_spans") if conn is not None else None
+        span = spans.pop() if spans else None
+        if span is not None:
+            span.end(exception_context.original_exception)
+
+def instrument_fastapi() -> None:
+    """Record a span for FastAPI's response validation and serialization step"""
+    import fastapi.routing as routing
+
+    original = routing.serialize_response
+    if getattr(original, "_traced", False):
+        return
+
+    async def serialize_response(*args, **kwargs):
+        with start_span("fastapi.serialize_response"):
+            return await original(*args, **kwargs)
+
+    serialize_response._traced = True
+    routing.serialize_response = serialize_response
+
+class TraceExporter:
+    """Periodically drains the ring buffer into OTLP/JSON files, keeping the last TRACES_KEEP"""
+
+    def __init__(self, directory: str, interval: float, keep: int):
+        self.directory = Path(directory)
+        self.interval = interval
+        self.keep = keep
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if settings.TRACING_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._run(), name="trace-exporter")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        spans: List[Span] = []
+        while _buffer:
+            spans.append(_buffer.popleft())
+        if spans:
+            try:
+                await asyncio.to_thread(self._write, spans)
+            except OSError as e:
+                logger.error(f"Failed to export {len(spans)} spans: {str(e)}")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    def _write(self, spans: List[Span]) -> None:
+        document = {
+            "resourceSpans": [{
+                "resource": {"attributes": [
+                    {"key": "service.name", "value": {"stringValue": settings.PROJECT_NAME}},
+                    {"key": "service.instance.id", "value": {"stringValue": str(os.getpid())}},
+                ]},
+                "scopeSpans": [{
+                    "scope": {"name": "app.core.tracing"},
+                    "spans": [span.to_otlp() for span in spans],
+                }],
+            }]
+        }
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"traces-{time.time_ns()}-{os.getpid()}.json"
+        path.write_text(json.dumps(document))
+        for stale in sorted(self.directory.glob("traces-*.json"), key=lambda p: p.stat().st_mtime)[:-self.keep]:
+            stale.unlink(missing_ok=True)
+
+trace_exporter = TraceExporter(settings.TRACES_DIR, settings.TRACING_FLUSH_INTERVAL, settings.TRACES_KEEP)
@@ -7,8 +7,14 @@ Base = declarative_base()
 # Import all models here so Alembic can detect them
 from app.models.patient import Patient
 from app.models.consultant import Consultant
-from app.models.test import LabTest
-from app.models.order import Order, OrderTest
-from app.models.report import TestReport
-from app.models.billing import Billing
+from app.models.test import LabTest, ReferenceRange
+from app.models.order import Order, OrderTest, AccessionCounter
+from app.models.report import TestReport, AnalyteObservation
+from app.models.billing import Billing, Payment, BillingBalance, PaymentRollupState
 from app.models.user import User
+from app.models.job import Job
+from app.models.idempotency import IdempotencyKey
+from app.models.audit import AuditEvent
+from app.models.patient_match import PatientMatchKey
+from app.models.sync import SyncTombstone
+from app.models.attachment import AttachmentBlob, Attachment
@@ -0,0 +1,80 @@
+"""Branch routing: which schema, and which Postgres node, a unit of work uses.
+
+Every model is declared in settings.DB_SCHEMA. A branch maps that schema onto
+its own through `schema_translate_map` on a shared engine, or onto an engine
+of its own when it lives on another node (BRANCH_DSNS). The branch of the
+current request or job is held in a contextvar, set by BranchMiddleware from
+the token or host and by the job worker per branch; sessions, raw SQL and
+the audit log all follow it.
+"""
+
+import re
+from contextvars import ContextVar
+from typing import Dict, NamedTuple, Optional
+
+from app.core.config import settings
+
+class Branch(NamedTuple):
+    name: str
+    schema: str
+    dsn: str  # plain postgresql:// DSN of the node holding the schema
+
+    @property
+    def url(self) -> str:
+        """SQLAlchemy async URL of the branch's node"""
+        return self.dsn.replace("postgresql://", "postgresql+asyncpg://", 1)
+
+    @property
+    def schema_translate_map(self) -> Optional[Dict[str, str]]:
+        return {settings.DB_SCHEMA: self.schema} if self.schema != settings.DB_SCHEMA else None
+
+# Branch names end up in host names and SQL literals, schemas in quoted identifiers
+NAME_PATTERN = re.compile(r"^[a-z0-9_]{1,63}$")
+
+def _load_branches() -> Dict[str, Branch]:
+    loaded = {settings.DEFAULT_BRANCH: Branch(settings.DEFAULT_BRANCH, settings.DB_SCHEMA, settings.DATABASE_DSN)}
+    for name, schema in settings.BRANCH_SCHEMAS.items():
+        loaded[name] = Branch(name, schema, settings.BRANCH_DSNS.get(name, settings.DATABASE_DSN))
+    for name in settings.BRANCH_DSNS.keys() - loaded.keys():
+        raise ValueError(f"BRANCH_DSNS names branch '{name}' that has no entry in BRANCH_SCHEMAS")
+    for branch in loaded.values():
+        if not NAME_PATTERN.match(branch.name) or not NAME_PATTERN.match(branch.schema):
+            raise ValueError(f"Invalid branch '{branch.name}' / schema '{branch.schema}': use [a-z0-9_]")
+    return loaded
+
+branches: Dict[str, Branch] = _load_branches()
+default_branch = branches[settings.DEFAULT_BRANCH]
+
+_current_branch: ContextVar[Branch] = ContextVar("current_branch", default=default_branch)
+
+def current_branch() -> Branch:
+    return _current_branch.get()
+
+def current_schema() -> str:
+    """Schema of the current branch, for raw SQL that schema_translate_map does not rewrite"""
+    return _current_branch.get().schema
+
+def branch_from_host(host: Optional[str]) -> Optional[str]:
+    """Branch name encoded in a Host header as "<branch><BRANCH_HOST_SUFFIX>", if any"""
+    suffix = settings.BRANCH_HOST_SUFFIX
+    if not suffix or not host:
+        return None
+    host = host.split(":", 1)[0].lower()
+    if not host.endswith(suffix) or len(host) == len(suffix):
+        return None
+    return host[:-len(suffix)]
+
+class use_branch:
+    """Run the block against `branch` (restored on exit)"""
+
+    __slots__ = ("branch", "token")
+
+    def __init__(self, branch: Branch):
+        self.branch = branch
+
+    def __enter__(self) -> Branch:
+        self.token = _current_branch.set(self.branch)
+        return self.branch
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        _current_branch.reset(self.token)
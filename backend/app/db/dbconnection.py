@@ -1,5 +1,5 @@
 import logging
-from typing import Optional
+from typing import Dict
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine
 from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
@@ -7,28 +7,47 @@ from tenacity import retry, stop_after_attempt, wait_exponential
 
 from app.core.config import settings
 from app.db.base import Base
+from app.db.branches import Branch, branches, default_branch
+from app.db.triggers import install_triggers
+from app.core.tracing import instrument_engine
 
 logger = logging.getLogger(__name__)
 
 class DatabaseManager:
+    """One engine (connection pool) per Postgres node; branches on the same node share it"""
+
     def __init__(self):
-        self._engine: Optional[AsyncEngine] = None
+        self._engines: Dict[str, AsyncEngine] = {}
 
     @property
     def engine(self) -> AsyncEngine:
-        if self._engine is None:
-            self._engine = self._create_engine()
-        return self._engine
+        """Engine of the primary node"""
+        return self.engine_for(default_branch)
+
+    def engine_for(self, branch: Branch) -> AsyncEngine:
+        engine = self._engines.get(branch.dsn)
+        if engine is None:
+            engine = self._engines[branch.dsn] = self._create_engine(branch.url)
+        return engine
+
+    def branch_engine(self, branch: Branch) -> AsyncEngine:
+        """Engine proxy whose statements address the branch's schema"""
+        engine = self.engine_for(branch)
+        translate = branch.schema_translate_map
+        return engine.execution_options(schema_translate_map=translate) if translate else engine
 
-    def _create_engine(self) -> AsyncEngine:
-        return create_async_engine(
-            settings.DATABASE_URL.replace("postgresql+psycopg2", "postgresql+asyncpg"),
+    def _create_engine(self, url: str) -> AsyncEngine:
+        engine = create_async_engine(
+            url,
             pool_size=settings.DB_POOL_SIZE,
             max_overflow=settings.DB_MAX_OVERFLOW,
             pool_timeout=settings.DB_POOL_TIMEOUT,
             pool_recycle=settings.DB_POOL_RECYCLE,
             echo=settings.DB_ECHO,
         )
+        if settings.TRACING_ENABLED:
+            instrument_engine(engine)
+        return engine
 
     @retry(
         stop=stop_after_attempt(3),
@@ -36,24 +55,27 @@ class DatabaseManager:
     )
     async def init_db(self) -> None:
         try:
-            # Ensure the schema exists
-            async with self.engine.begin() as conn:
-                await conn.execute(
-                    text(f'CREATE SCHEMA IF NOT EXISTS "{settings.DB_SCHEMA}"')
-                )
-                await conn.commit()
-
-            async with self.engine.begin() as conn:
-                await conn.run_sync(Base.metadata.create_all)
-            logger.info("Database initialized successfully")
+            for branch in branches.values():
+                await self.init_branch(branch)
+            logger.info(f"Database initialized successfully for branches: {', '.join(branches)}")
         except SQLAlchemyError as e:
             logger.error(f"Database initialization failed: {str(e)}")
             raise
 
+    async def init_branch(self, branch: Branch) -> None:
+        """Create the branch's schema, tables and triggers where missing"""
+        async with self.engine_for(branch).begin() as conn:
+            await conn.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{branch.schema}"'))
+
+        async with self.branch_engine(branch).begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await install_triggers(conn, branch)
+
     async def dispose(self) -> None:
-        if self._engine:
-            await self._engine.dispose()
-            self._engine = None
-            logger.info("Database connection disposed")
+        # Engines stay registered (sessions are bound to them) and reconnect if used again
+        for engine in self._engines.values():
+            await engine.dispose()
+        if self._engines:
+            logger.info("Database connections disposed")
 
 db_manager = DatabaseManager()
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+from typing import Callable, Dict, List
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.branches import branches
+
+logger = logging.getLogger(__name__)
+
+# (channel, payload) -> None; called on the event loop, must not block
+NotificationCallback = Callable[[str, str], None]
+ReconnectCallback = Callable[[], None]
+
+HEALTHCHECK_INTERVAL = 30
+MAX_RECONNECT_DELAY = 30
+
+async def notify(db: AsyncSession, channel: str, payload: str = "") -> None:
+    """Queue a NOTIFY on the session's transaction (delivered on commit)"""
+    await db.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": channel, "payload": payload}
+    )
+
+class NotificationListener:
+    """One LISTEN connection per Postgres node per process, fanned out to in-process subscribers.
+
+    Branches sharded onto other nodes send their NOTIFYs there, so every node
+    in use gets its own connection. Notifications sent while a connection is
+    down are lost, so subscribers register an on_reconnect callback to
+    resynchronise their state.
+    """
+
+    def __init__(self):
+        self._conns: Dict[str, asyncpg.Connection] = {}
+        self._callbacks: Dict[str, List[NotificationCallback]] = {}
+        self._reconnect_callbacks: List[ReconnectCallback] = []
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = asyncio.Event()
+        # Per DSN; set on stop or when that connection drops
+        self._wakeups: Dict[str, asyncio.Event] = {}
+
+    @property
+    def connected(self) -> bool:
+        """True only while every node is listened to (otherwise invalidations may be missed)"""
+        return bool(self._tasks) and all(
+            dsn in self._conns and not self._conns[dsn].is_closed() for dsn in self._wakeups
+        )
+
+    async def subscribe(self, channel: str, callback: NotificationCallback) -> None:
+        """Register a callback for a channel, LISTENing immediately where connected"""
+        is_new_channel = channel not in self._callbacks
+        self._callbacks.setdefault(channel, []).append(callback)
+        if is_new_channel:
+            for conn in list(self._conns.values()):
+                if not conn.is_closed():
+                    await conn.add_listener(channel, self._dispatch)
+
+    def on_reconnect(self, callback: ReconnectCallback) -> None:
+        """Register a callback fired after a connection is re-established"""
+        self._reconnect_callbacks.append(callback)
+
+    async def start(self) -> None:
+        if not self._tasks:
+            self._stopping.clear()
+            for dsn in sorted({branch.dsn for branch in branches.values()}):
+                self._wakeups[dsn] = asyncio.Event()
+                self._tasks.append(asyncio.create_task(self._run(dsn), name="notification-listener"))
+
+    async def stop(self) -> None:
+        if not self._tasks:
+            return
+        self._stopping.set()
+        for wakeup in self._wakeups.values():
+            wakeup.set()
+        await asyncio.gather(*self._tasks)
+        self._tasks = []
+
+    def _dispatch(self, connection, pid: int, channel: str, payload: str) -> None:
+        for callback in self._callbacks.get(channel, []):
+            try:
+                callback(channel, payload)
+            except Exception:
+                logger.exception(f"Notification callback failed on channel '{channel}'")
+
+    async def _run(self, dsn: str) -> None:
+        wakeup = self._wakeups[dsn]
+        delay = 1
+        has_connected = False
+        while not self._stopping.is_set():
+            wakeup.clear()
+            conn = None
+            try:
+                conn = self._conns[dsn] = await asyncpg.connect(dsn)
+                conn.add_termination_listener(lambda _: wakeup.set())
+                for channel in list(self._callbacks):
+                    await conn.add_listener(channel, self._dispatch)
+                logger.info(f"Listening on channels: {', '.join(self._callbacks) or '-'}")
+
+                if has_connected:
+                    for callback in self._reconnect_callbacks:
+                        try:
+                            callback()
+                        except Exception:
+                            logger.exception("Reconnect callback failed")
+                has_connected = True
+                delay = 1
+
+                # Idle connections can die silently; ping so we notice and reconnect
+                while not wakeup.is_set():
+                    try:
+                        await asyncio.wait_for(wakeup.wait(), timeout=HEALTHCHECK_INTERVAL)
+                    except asyncio.TimeoutError:
+                        await conn.execute("SELECT 1")
+            except (OSError, asyncio.TimeoutError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+                logger.warning(f"Notification listener connection lost: {str(e)}")
+            finally:
+                self._conns.pop(dsn, None)
+                if conn is not None:
+                    try:
+                        await conn.close(timeout=5)
+                    except Exception:
+                        conn.terminate()
+
+            if not self._stopping.is_set():
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+notification_listener = NotificationListener()
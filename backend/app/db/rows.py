@@ -0,0 +1,35 @@
+"""Column-only read path for list endpoints.
+
+A `RowMapper` selects just the columns an endpoint returns. Rows come back
+as SQLAlchemy's tuple-backed `Row`, with no ORM instances, identity map or
+attribute instrumentation, and `to_json` serializes them straight to response
+bytes with pydantic-core. The output matches what the endpoint's response
+model would produce (ISO datetimes, string UUIDs and decimals, enum values),
+so the response model can stay on the route for documentation while the
+handler returns the bytes itself.
+"""
+
+from typing import Any, Iterable, Sequence, Tuple
+
+from fastapi import Response
+from pydantic_core import to_json
+from sqlalchemy import Select, select
+from sqlalchemy.sql.elements import ColumnElement
+
+class RowMapper:
+    """A fixed column list, selected and serialized without ORM hydration"""
+
+    def __init__(self, *columns: ColumnElement[Any]):
+        self.columns = columns
+        # Response field names: the attribute name of mapped columns, else the label
+        self.keys: Tuple[str, ...] = tuple(column.key for column in columns)
+
+    def select(self) -> Select:
+        return select(*self.columns)
+
+    def to_json(self, rows: Iterable[Sequence[Any]]) -> bytes:
+        keys = self.keys
+        return to_json([dict(zip(keys, row)) for row in rows])
+
+    def response(self, rows: Iterable[Sequence[Any]]) -> Response:
+        return Response(self.to_json(rows), media_type="application/json")
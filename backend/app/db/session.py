@@ -1,26 +1,39 @@
-from typing import AsyncGenerator, Generator
+from typing import AsyncGenerator, Dict, Generator
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.exc import SQLAlchemyError
 import logging
 from contextlib import asynccontextmanager, contextmanager
+from app.db.branches import Branch, current_branch
 from app.db.dbconnection import db_manager
+from app.core.tracing import current_span, start_span
 
 logger = logging.getLogger(__name__)
 
-SessionLocal = async_sessionmaker(
-    bind=db_manager.engine,
-    expire_on_commit=False,
-    autoflush=False,
-    autocommit=False,
-)
+_session_factories: Dict[str, async_sessionmaker] = {}
+
+def session_factory(branch: Branch) -> async_sessionmaker:
+    """Sessions bound to the branch's node, addressing the branch's schema"""
+    factory = _session_factories.get(branch.name)
+    if factory is None:
+        factory = _session_factories[branch.name] = async_sessionmaker(
+            bind=db_manager.branch_engine(branch),
+            expire_on_commit=False,
+            autoflush=False,
+            autocommit=False,
+        )
+    return factory
 
 
 # For FastAPI Dependency
 # @asynccontextmanager
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    async with SessionLocal() as session:
+    async with session_factory(current_branch())() as session:
         try:
+            # In traced requests, check the connection out up front so pool wait shows up as its own span
+            if current_span() is not None:
+                with start_span("db.get_db.connect"):
+                    await session.connection()
             yield session
             await session.commit()
         except Exception as e:
@@ -31,6 +44,19 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
+# For background jobs / CLI scripts
+@asynccontextmanager
+async def get_db_context() -> AsyncGenerator[AsyncSession, None]:
+    async with session_factory(current_branch())() as session:
+        try:
+            yield session
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            logger.error(f"Database error: {str(e)}")
+            raise
+
+
 # SessionLocalSync = sessionmaker(
 #     autocommit=False,
 #     autoflush=False,
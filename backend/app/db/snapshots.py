@@ -0,0 +1,156 @@
+"""Fast resets for QA and demo environments.
+
+`truncate_ddl` empties every table of a branch in one TRUNCATE, which keeps
+the schema, indexes and triggers and so avoids the catalog work of dropping
+and recreating them.
+
+Snapshots are whole-database copies made with `CREATE DATABASE ... TEMPLATE`,
+which copies the files of the source database rather than replaying its
+rows: a seeded dataset is saved once and restored in about the time it takes
+to copy its files. A snapshot of database "lab" named "seeded" is the
+database "lab__snapshot_seeded" on every node that holds a branch, kept with
+connections disallowed so it stays usable as a template. Postgres refuses to
+copy a database anyone is connected to, so saving or restoring disconnects
+every client of the database, other app processes included; their pools and
+the notification listener reconnect on their own.
+"""
+
+import logging
+from typing import List
+
+import asyncpg
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+from app.db.base import Base
+from app.db.branches import NAME_PATTERN, Branch, branches, default_branch
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_INFIX = "__snapshot_"
+STAGING_SUFFIX = "__staging"
+
+def truncate_ddl(branch: Branch) -> str:
+    """Empty every table of the branch; one statement, so foreign keys between them need no ordering"""
+    tables = ", ".join(f'"{branch.schema}"."{table.name}"' for table in reversed(Base.metadata.sorted_tables))
+    return f"TRUNCATE {tables} RESTART IDENTITY"
+
+def _nodes() -> List[str]:
+    return sorted({branch.dsn for branch in branches.values()})
+
+def _database(dsn: str) -> str:
+    return make_url(dsn).database
+
+def snapshot_database(dsn: str, name: str) -> str:
+    return f"{_database(dsn)}{SNAPSHOT_INFIX}{name}"
+
+def staging_database(dsn: str) -> str:
+    """Where a snapshot is copied to before it takes its final name"""
+    return f"{_database(dsn)}{STAGING_SUFFIX}"
+
+def validate_snapshot_name(name: str) -> None:
+    """Raises ValueError unless `name` makes a valid database name on every node"""
+    if not NAME_PATTERN.match(name):
+        raise ValueError(f"Invalid snapshot name '{name}': use [a-z0-9_]")
+    for dsn in _nodes():
+        if len(staging_database(dsn)) > 63:
+            raise ValueError(f"Database name '{_database(dsn)}' is too long to take snapshots of")
+        if len(snapshot_database(dsn, name)) > 63:
+            raise ValueError(f"Snapshot name '{name}' is too long for database '{_database(dsn)}'")
+
+async def _maintenance_connection(dsn: str) -> asyncpg.Connection:
+    """A connection to the node's maintenance database: CREATE / DROP DATABASE cannot run from the database itself"""
+    url = make_url(dsn).set(database=settings.SNAPSHOT_MAINTENANCE_DB)
+    return await asyncpg.connect(url.render_as_string(hide_password=False))
+
+async def _disconnect_all(conn: asyncpg.Connection, database: str) -> None:
+    await conn.execute(
+        "SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = $1 AND pid <> pg_backend_pid()",
+        database
+    )
+
+def _clone_ddl(target: str, template: str) -> str:
+    strategy = f" STRATEGY {settings.SNAPSHOT_STRATEGY}" if settings.SNAPSHOT_STRATEGY else ""
+    return f'CREATE DATABASE "{target}" TEMPLATE "{template}"{strategy}'
+
+async def list_snapshots() -> List[str]:
+    """Names of the snapshots of the primary node's database"""
+    prefix = snapshot_database(default_branch.dsn, "")
+    conn = await _maintenance_connection(default_branch.dsn)
+    try:
+        rows = await conn.fetch(
+            "SELECT datname FROM pg_database WHERE starts_with(datname, $1) ORDER BY datname", prefix
+        )
+    finally:
+        await conn.close()
+    return [row["datname"][len(prefix):] for row in rows]
+
+async def _drop_staging(conn: asyncpg.Connection, staging: str) -> None:
+    await conn.execute(f'DROP DATABASE IF EXISTS "{staging}"')
+
+async def create_snapshot(name: str) -> None:
+    """Save every node's database as snapshot `name`.
+
+    The copy is made under a staging name and only renamed once it is
+    complete and closed to connections, so a failed save leaves no
+    half-made snapshot behind.
+    """
+    for dsn in _nodes():
+        database, snapshot, staging = _database(dsn), snapshot_database(dsn, name), staging_database(dsn)
+        conn = await _maintenance_connection(dsn)
+        try:
+            await _drop_staging(conn, staging)
+            # Keep clients from reconnecting while the files are copied
+            await conn.execute(f'ALTER DATABASE "{database}" WITH ALLOW_CONNECTIONS false')
+            try:
+                await _disconnect_all(conn, database)
+                await conn.execute(_clone_ddl(staging, database))
+            finally:
+                await conn.execute(f'ALTER DATABASE "{database}" WITH ALLOW_CONNECTIONS true')
+            try:
+                await conn.execute(f'ALTER DATABASE "{staging}" WITH ALLOW_CONNECTIONS false')
+                await conn.execute(f'ALTER DATABASE "{staging}" RENAME TO "{snapshot}"')
+            except BaseException:
+                await _drop_staging(conn, staging)
+                raise
+        finally:
+            await conn.close()
+        logger.info(f"Saved database '{database}' as snapshot '{snapshot}'")
+
+async def restore_snapshot(name: str) -> None:
+    """Replace every node's database with its copy from snapshot `name`.
+
+    The snapshot is cloned under a staging name first, while the database
+    stays in use; only then is the database dropped and the clone renamed
+    in its place. A failure before the drop leaves the database as it was
+    and open to connections again.
+    """
+    for dsn in _nodes():
+        database, snapshot, staging = _database(dsn), snapshot_database(dsn, name), staging_database(dsn)
+        conn = await _maintenance_connection(dsn)
+        try:
+            await _drop_staging(conn, staging)
+            # The clone allows connections: datallowconn is not inherited from the template
+            await conn.execute(_clone_ddl(staging, snapshot))
+            dropped = False
+            await conn.execute(f'ALTER DATABASE "{database}" WITH ALLOW_CONNECTIONS false')
+            try:
+                await _disconnect_all(conn, database)
+                await conn.execute(f'DROP DATABASE "{database}"')
+                dropped = True
+            finally:
+                if not dropped:
+                    await conn.execute(f'ALTER DATABASE "{database}" WITH ALLOW_CONNECTIONS true')
+                    await _drop_staging(conn, staging)
+            await conn.execute(f'ALTER DATABASE "{staging}" RENAME TO "{database}"')
+        finally:
+            await conn.close()
+        logger.info(f"Restored database '{database}' from snapshot '{snapshot}'")
+
+async def drop_snapshot(name: str) -> None:
+    for dsn in _nodes():
+        conn = await _maintenance_connection(dsn)
+        try:
+            await conn.execute(f'DROP DATABASE IF EXISTS "{snapshot_database(dsn, name)}"')
+        finally:
+            await conn.close()
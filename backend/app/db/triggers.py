@@ -0,0 +1,96 @@
+"""Database triggers installed at startup and after a reset.
+
+Every statement is idempotent so it can run against an existing schema.
+"""
+
+from typing import List
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.config import settings
+from app.db.branches import Branch
+from app.models.sync import SYNC_TABLES
+
+def trigger_ddl(branch: Branch) -> List[str]:
+    schema = branch.schema
+    statements = [
+        # UUIDv7 for rows inserted from SQL (the app generates its own with app.core.ids.uuid7):
+        # a random v4 with the 48-bit millisecond timestamp over its first bytes and version bits 0100 -> 0111
+        f'''
+        CREATE OR REPLACE FUNCTION "{schema}".uuid_generate_v7() RETURNS uuid AS $$
+            SELECT encode(set_bit(set_bit(overlay(uuid_send(gen_random_uuid())
+                PLACING substring(int8send((extract(epoch FROM clock_timestamp()) * 1000)::bigint) FROM 3)
+                FROM 1 FOR 6), 52, 1), 53, 1), 'hex')::uuid
+        $$ LANGUAGE sql VOLATILE
+        ''',
+        # Worklist: one NOTIFY per order test insert or status change
+        f'CREATE SEQUENCE IF NOT EXISTS "{schema}".worklist_event_seq',
+        f'''
+        CREATE OR REPLACE FUNCTION "{schema}".notify_order_test_change() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'UPDATE' AND OLD.status IS NOT DISTINCT FROM NEW.status THEN
+                RETURN NEW;
+            END IF;
+            PERFORM pg_notify('{settings.WORKLIST_NOTIFY_CHANNEL}', json_build_object(
+                'event_id', nextval('"{schema}".worklist_event_seq'),
+                'branch', '{branch.name}',
+                'op', TG_OP,
+                'id', NEW.id,
+                'order_id', NEW.order_id,
+                'test_id', NEW.test_id,
+                'status', NEW.status,
+                'old_status', CASE WHEN TG_OP = 'UPDATE' THEN OLD.status END,
+                'sample_required', (SELECT sample_required FROM "{schema}".lab_tests WHERE id = NEW.test_id),
+                'sample_collected_at', NEW.sample_collected_at
+            )::text);
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        ''',
+        f'DROP TRIGGER IF EXISTS order_tests_notify ON "{schema}".order_tests',
+        f'''
+        CREATE TRIGGER order_tests_notify
+        AFTER INSERT OR UPDATE OF status ON "{schema}".order_tests
+        FOR EACH ROW EXECUTE FUNCTION "{schema}".notify_order_test_change()
+        ''',
+        # Delta sync: stamp every change of a synced row with (txid, sequence), record deletes as tombstones
+        f'CREATE SEQUENCE IF NOT EXISTS "{schema}".sync_change_seq',
+        f'''
+        CREATE OR REPLACE FUNCTION "{schema}".sync_track() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'UPDATE' AND NEW IS NOT DISTINCT FROM OLD THEN
+                RETURN NEW;
+            END IF;
+            NEW.change_txid := txid_current();
+            NEW.change_seq := nextval('"{schema}".sync_change_seq');
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        ''',
+        f'''
+        CREATE OR REPLACE FUNCTION "{schema}".sync_tombstone() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO "{schema}".sync_tombstones (entity, entity_id, change_txid, change_seq, deleted_at)
+            VALUES (TG_TABLE_NAME, OLD.id, txid_current(), nextval('"{schema}".sync_change_seq'), now() AT TIME ZONE 'utc')
+            ON CONFLICT (entity, entity_id) DO UPDATE
+            SET change_txid = EXCLUDED.change_txid, change_seq = EXCLUDED.change_seq, deleted_at = EXCLUDED.deleted_at;
+            RETURN OLD;
+        END;
+        $$ LANGUAGE plpgsql
+        ''',
+    ]
+    for table in SYNC_TABLES:
+        statements += [
+            f'DROP TRIGGER IF EXISTS {table}_sync_track ON "{schema}".{table}',
+            f'CREATE TRIGGER {table}_sync_track BEFORE INSERT OR UPDATE ON "{schema}".{table} '
+            f'FOR EACH ROW EXECUTE FUNCTION "{schema}".sync_track()',
+            f'DROP TRIGGER IF EXISTS {table}_sync_tombstone ON "{schema}".{table}',
+            f'CREATE TRIGGER {table}_sync_tombstone AFTER DELETE ON "{schema}".{table} '
+            f'FOR EACH ROW EXECUTE FUNCTION "{schema}".sync_tombstone()',
+        ]
+    return statements
+
+async def install_triggers(conn: AsyncConnection, branch: Branch) -> None:
+    # asyncpg runs one statement per execute
+    for statement in trigger_ddl(branch):
+        await conn.execute(text(statement))
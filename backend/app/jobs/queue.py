@@ -0,0 +1,129 @@
+"""Postgres-backed job queue: enqueue, claim (SKIP LOCKED), ack and retry"""
+
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import select, update, or_, and_, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.notify import notify
+from app.models.job import Job, JobStatus
+
+async def enqueue_job(
+    db: AsyncSession,
+    task: str,
+    payload: Optional[Dict[str, Any]] = None,
+    queue: str = "default",
+    priority: int = 0,
+    run_at: Optional[datetime] = None,
+    max_attempts: Optional[int] = None,
+) -> Job:
+    """Add a job in the caller's transaction; workers are woken on commit"""
+    job = Job(
+        queue=queue,
+        task=task,
+        payload=payload or {},
+        priority=priority,
+        run_at=run_at or datetime.utcnow(),
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+    db.add(job)
+    await db.flush()
+    await notify(db, settings.JOB_NOTIFY_CHANNEL, queue)
+    return job
+
+async def ensure_job_scheduled(
+    db: AsyncSession,
+    task: str,
+    run_at: Optional[datetime] = None,
+    queue: str = "default",
+) -> Optional[Job]:
+    """Enqueue `task` unless a pending run of it already exists (one chain per recurring task)"""
+    # Serialize concurrent schedulers of the same task until the transaction ends
+    await db.execute(select(func.pg_advisory_xact_lock(func.hashtext(f"job:{task}"))))
+    pending = await db.execute(
+        select(Job.id).where(Job.task == task, Job.status == JobStatus.PENDING).limit(1)
+    )
+    if pending.scalar_one_or_none() is not None:
+        return None
+    return await enqueue_job(db, task, queue=queue, run_at=run_at)
+
+async def claim_jobs(db: AsyncSession, queue: str, limit: int, worker_id: str) -> List[Job]:
+    """Claim up to `limit` due jobs without blocking on rows other workers hold.
+
+    A RUNNING job whose visibility timeout has passed belongs to a dead or
+    stuck worker and is claimed again.
+    """
+    now = datetime.utcnow()
+    candidates = (
+        select(Job.id)
+        .where(
+            Job.queue == queue,
+            or_(
+                and_(Job.status == JobStatus.PENDING, Job.run_at <= now),
+                and_(Job.status == JobStatus.RUNNING, Job.locked_until < now),
+            ),
+        )
+        .order_by(Job.priority.desc(), Job.run_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    result = await db.execute(
+        update(Job)
+        .where(Job.id.in_(candidates))
+        .values(
+            status=JobStatus.RUNNING,
+            attempts=Job.attempts + 1,
+            locked_until=now + timedelta(seconds=settings.JOB_VISIBILITY_TIMEOUT),
+            locked_by=worker_id,
+            updated_at=now,
+        )
+        .returning(Job)
+        .execution_options(synchronize_session=False)
+    )
+    return list(result.scalars().all())
+
+async def complete_job(db: AsyncSession, job_id: UUID, worker_id: str) -> bool:
+    """Mark a claimed job as done; False if the claim was lost to another worker"""
+    now = datetime.utcnow()
+    result = await db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status == JobStatus.RUNNING, Job.locked_by == worker_id)
+        .values(status=JobStatus.COMPLETED, locked_until=None, completed_at=now, updated_at=now)
+    )
+    return result.rowcount > 0
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter, capped at JOB_RETRY_MAX_DELAY"""
+    ceiling = min(settings.JOB_RETRY_BASE_DELAY * 2 ** max(attempts - 1, 0), settings.JOB_RETRY_MAX_DELAY)
+    return random.uniform(ceiling / 2, ceiling)
+
+async def fail_job(db: AsyncSession, job: Job, worker_id: str, error: str) -> bool:
+    """Reschedule a failed job with backoff, or mark it FAILED once attempts run out"""
+    now = datetime.utcnow()
+    values: Dict[str, Any] = {"locked_until": None, "last_error": error, "updated_at": now}
+    if job.attempts >= job.max_attempts:
+        values["status"] = JobStatus.FAILED
+    else:
+        values["status"] = JobStatus.PENDING
+        values["run_at"] = now + timedelta(seconds=retry_delay(job.attempts))
+
+    result = await db.execute(
+        update(Job)
+        .where(Job.id == job.id, Job.status == JobStatus.RUNNING, Job.locked_by == worker_id)
+        .values(**values)
+    )
+    return result.rowcount > 0
+
+async def next_run_at(db: AsyncSession, queue: str) -> Optional[datetime]:
+    """Earliest time a pending job of the queue becomes due"""
+    result = await db.execute(
+        select(Job.run_at)
+        .where(Job.queue == queue, Job.status == JobStatus.PENDING)
+        .order_by(Job.run_at)
+        .limit(1)
+    )
+    return result.scalar_one_or_none()
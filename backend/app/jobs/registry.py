@@ -0,0 +1,32 @@
+"""Task name -> handler registry for background jobs"""
+
+from typing import Any, Awaitable, Callable, Dict, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Handlers receive their own session (committed on success) and the job payload
+JobHandler = Callable[[AsyncSession, Dict[str, Any]], Awaitable[None]]
+
+_handlers: Dict[str, JobHandler] = {}
+# task -> seconds between runs, for tasks the worker keeps scheduled itself
+_recurring: Dict[str, int] = {}
+
+def job_handler(task: str, every: Optional[int] = None) -> Callable[[JobHandler], JobHandler]:
+    """Register an async function as the handler for a task name.
+
+    With `every`, the task is recurring: workers schedule it on startup and
+    enqueue the next run `every` seconds after each successful one.
+    """
+    def decorator(func: JobHandler) -> JobHandler:
+        if task in _handlers:
+            raise ValueError(f"Handler already registered for task '{task}'")
+        _handlers[task] = func
+        if every is not None:
+            _recurring[task] = every
+        return func
+    return decorator
+
+def get_handler(task: str) -> Optional[JobHandler]:
+    return _handlers.get(task)
+
+def get_recurring_tasks() -> Dict[str, int]:
+    return dict(_recurring)
@@ -0,0 +1,108 @@
+"""Built-in background tasks"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict
+from uuid import UUID
+
+from sqlalchemy import update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.jobs.registry import job_handler
+from app.models.user import User
+from app.models.idempotency import IdempotencyKey
+from app.jobs.queue import enqueue_job
+from app.v1.api.billing.crud import get_billing_crud
+from app.v1.api.patient.crud import get_patient_crud
+from app.v1.api.report.crud import get_report_crud
+from app.v1.api.report.flagging import flag_columns
+from app.v1.api.sync.crud import get_sync_crud
+from app.v1.api.attachment.crud import get_attachment_crud
+from app.v1.api.attachment.storage import attachment_store
+
+logger = logging.getLogger(__name__)
+
+@job_handler("purge_expired_refresh_tokens", every=settings.REFRESH_TOKEN_PURGE_INTERVAL)
+async def purge_expired_refresh_tokens(db: AsyncSession, payload: Dict[str, Any]) -> None:
+    """Clear refresh tokens that have passed their expiry"""
+    result = await db.execute(
+        update(User)
+        .where(User.refresh_token_expires_at < datetime.utcnow())
+        .values(refresh_token=None, refresh_token_expires_at=None)
+    )
+    logger.info(f"Purged {result.rowcount} expired refresh tokens")
+
+@job_handler("purge_expired_idempotency_keys", every=settings.IDEMPOTENCY_PURGE_INTERVAL)
+async def purge_expired_idempotency_keys(db: AsyncSession, payload: Dict[str, Any]) -> None:
+    """Delete stored idempotent responses past their TTL"""
+    result = await db.execute(
+        delete(IdempotencyKey).where(IdempotencyKey.expires_at < datetime.utcnow())
+    )
+    logger.info(f"Purged {result.rowcount} expired idempotency keys")
+
+@job_handler("rollup_billing_balances", every=settings.BILLING_ROLLUP_INTERVAL)
+async def rollup_billing_balances(db: AsyncSession, payload: Dict[str, Any]) -> None:
+    """Fold new payments into the per-billing running totals"""
+    touched = await get_billing_crud(db).rollup_balances()
+    logger.info(f"Rolled up payments of {touched} billings")
+
+@job_handler("rebuild_patient_match_keys")
+async def rebuild_patient_match_keys(db: AsyncSession, payload: Dict[str, Any]) -> None:
+    """Key one batch of patients, then enqueue the next batch after the last id"""
+    after = UUID(payload["after"]) if payload.get("after") else None
+    crud = get_patient_crud(db)
+    patients = await crud.get_patients_needing_keys(after, settings.PATIENT_MATCH_BATCH_SIZE)
+    keys = await crud.replace_match_keys(patients)
+    logger.info(f"Wrote {keys} match keys for {len(patients)} patients")
+    if len(patients) == settings.PATIENT_MATCH_BATCH_SIZE:
+        await enqueue_job(db, "rebuild_patient_match_keys", {"after": str(patients[-1].id)})
+
+@job_handler("reflag_reports")
+async def reflag_reports(db: AsyncSession, payload: Dict[str, Any]) -> None:
+    """Re-flag one batch of reports (of one test, or all) and enqueue the next batch"""
+    test_id = UUID(payload["test_id"]) if payload.get("test_id") else None
+    after = UUID(payload["after"]) if payload.get("after") else None
+    crud = get_report_crud(db)
+    rows = await crud.get_flag_inputs(test_id, after, settings.REFLAG_BATCH_SIZE)
+    if not rows:
+        return
+    last_id, batch_size = rows[-1][0], len({row[0] for row in rows})
+    rows = [row for row in rows if row[2] is not None]  # reports without any analyte
+    if rows:
+        # Straight from the database: this job usually runs right after the ranges changed
+        table = await crud.get_range_table(use_cache=False)
+        report_ids, test_ids, analytes, values, ages, genders = zip(*rows)
+        flags, lows, highs = flag_columns(table, test_ids, analytes, values, ages, genders)
+        updated = await crud.apply_flags(report_ids, analytes, flags, lows, highs)
+        logger.info(f"Re-flagged {updated} reports")
+    if batch_size == settings.REFLAG_BATCH_SIZE:
+        await enqueue_job(db, "reflag_reports", {**payload, "after": str(last_id)})
+
+@job_handler("backfill_analyte_observations")
+async def backfill_analyte_observations(db: AsyncSession, payload: Dict[str, Any]) -> None:
+    """Extract trend rows for one batch of existing reports, then enqueue the next batch"""
+    after = UUID(payload["after"]) if payload.get("after") else None
+    crud = get_report_crud(db)
+    report_ids = await crud.get_report_ids(after, settings.OBSERVATION_BACKFILL_BATCH_SIZE)
+    written = await crud.record_observations(report_ids)
+    logger.info(f"Wrote {written} analyte observations for {len(report_ids)} reports")
+    if len(report_ids) == settings.OBSERVATION_BACKFILL_BATCH_SIZE:
+        await enqueue_job(db, "backfill_analyte_observations", {"after": str(report_ids[-1])})
+
+@job_handler("purge_sync_tombstones", every=settings.SYNC_TOMBSTONE_PURGE_INTERVAL)
+async def purge_sync_tombstones(db: AsyncSession, payload: Dict[str, Any]) -> None:
+    """Drop delete markers older than any sync token still accepted"""
+    cutoff = datetime.utcnow() - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+    purged = await get_sync_crud(db).purge_tombstones(cutoff)
+    logger.info(f"Purged {purged} sync tombstones")
+
+@job_handler("purge_attachment_blobs", every=settings.ATTACHMENT_GC_INTERVAL)
+async def purge_attachment_blobs(db: AsyncSession, payload: Dict[str, Any]) -> None:
+    """Delete stored files no attachment uses any more"""
+    cutoff = datetime.utcnow() - timedelta(minutes=settings.ATTACHMENT_GC_GRACE_MINUTES)
+    hashes = await get_attachment_crud(db).delete_unreferenced_blobs(cutoff, limit=1000)
+    # Files go before the rows are committed: until then an upload of the same content waits on the row lock
+    for sha256 in hashes:
+        await attachment_store.remove(sha256)
+    logger.info(f"Purged {len(hashes)} unreferenced attachment files")
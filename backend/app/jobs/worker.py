@@ -0,0 +1,170 @@
+"""Background job worker.
+
+Runs inside the API lifespan (JOB_WORKER_ENABLED) or as its own process:
+
+    python -m app.jobs.worker
+
+Each branch has its own jobs table, so every queue is polled once per branch
+with the branch made current for claiming and for the handlers it runs.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Set, Tuple
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.config import settings
+from app.core.logs import setup_logging, use_request_id
+from app.db.branches import Branch, branches, use_branch
+from app.db.notify import notification_listener
+from app.db.session import get_db_context
+from app.jobs.queue import claim_jobs, complete_job, ensure_job_scheduled, fail_job, next_run_at
+from app.jobs.registry import get_handler, get_recurring_tasks
+from app.models.job import Job
+import app.jobs.tasks  # noqa: F401  registers built-in task handlers
+
+logger = logging.getLogger(__name__)
+
+class JobWorker:
+    """Claims and runs jobs for a set of queues, each with its own concurrency limit"""
+
+    def __init__(self, queues: Optional[Dict[str, int]] = None, worker_id: Optional[str] = None):
+        self.queues = queues or settings.JOB_QUEUES
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        # Keyed by (branch name, queue)
+        self._active: Dict[Tuple[str, str], int] = {(name, queue): 0 for name in branches for queue in self.queues}
+        self._wakeups: Dict[Tuple[str, str], asyncio.Event] = {key: asyncio.Event() for key in self._active}
+        self._running: Set[asyncio.Task] = set()
+        self._loops: Set[asyncio.Task] = set()
+        self._stopping = asyncio.Event()
+
+    async def start(self) -> None:
+        await notification_listener.subscribe(settings.JOB_NOTIFY_CHANNEL, self._on_notify)
+        notification_listener.on_reconnect(self._wake_all)
+        for branch in branches.values():
+            with use_branch(branch):
+                await self._schedule_recurring()
+                # Tasks copy the current context, so the loop and its jobs stay on this branch
+                for queue, concurrency in self.queues.items():
+                    self._loops.add(asyncio.create_task(
+                        self._run_queue(branch, queue, concurrency), name=f"jobs:{branch.name}:{queue}"
+                    ))
+        logger.info(f"Job worker {self.worker_id} started for queues: {self.queues}")
+
+    async def stop(self) -> None:
+        """Stop claiming and wait for in-flight jobs to finish"""
+        self._stopping.set()
+        self._wake_all()
+        await asyncio.gather(*self._loops, return_exceptions=True)
+        await asyncio.gather(*self._running, return_exceptions=True)
+        self._loops.clear()
+        logger.info(f"Job worker {self.worker_id} stopped")
+
+    async def _schedule_recurring(self) -> None:
+        for task in get_recurring_tasks():
+            try:
+                async with get_db_context() as db:
+                    await ensure_job_scheduled(db, task)
+            except (SQLAlchemyError, OSError) as e:
+                logger.error(f"Could not schedule recurring task '{task}': {str(e)}")
+
+    def _on_notify(self, channel: str, queue: str) -> None:
+        # The payload names only the queue, so wake that queue on every branch
+        for name in branches:
+            wakeup = self._wakeups.get((name, queue))
+            if wakeup is not None:
+                wakeup.set()
+
+    def _wake_all(self) -> None:
+        for wakeup in self._wakeups.values():
+            wakeup.set()
+
+    async def _run_queue(self, branch: Branch, queue: str, concurrency: int) -> None:
+        key = (branch.name, queue)
+        wakeup = self._wakeups[key]
+        while not self._stopping.is_set():
+            wakeup.clear()
+            timeout = settings.JOB_POLL_INTERVAL
+            free_slots = concurrency - self._active[key]
+            try:
+                if free_slots > 0:
+                    async with get_db_context() as db:
+                        jobs = await claim_jobs(db, queue, free_slots, self.worker_id)
+                    for job in jobs:
+                        self._active[key] += 1
+                        task = asyncio.create_task(self._execute(key, job))
+                        self._running.add(task)
+                        task.add_done_callback(self._running.discard)
+
+                    # Sleep no longer than until the next delayed retry is due
+                    async with get_db_context() as db:
+                        due = await next_run_at(db, queue)
+                    if due is not None:
+                        timeout = min(timeout, max((due - datetime.utcnow()).total_seconds(), 1))
+            except (SQLAlchemyError, OSError) as e:
+                logger.error(f"Failed to claim jobs from queue '{queue}' of branch '{branch.name}': {str(e)}")
+
+            # Woken by NOTIFY on enqueue, a finished job freeing a slot, or stop()
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _execute(self, key: Tuple[str, str], job: Job) -> None:
+        # Log records of the job are correlated like those of a request
+        with use_request_id(f"job-{job.id}"):
+            await self._run_job(key, job)
+
+    async def _run_job(self, key: Tuple[str, str], job: Job) -> None:
+        queue = key[1]
+        try:
+            handler = get_handler(job.task)
+            if handler is None:
+                raise LookupError(f"No handler registered for task '{job.task}'")
+            if job.attempts > job.max_attempts:
+                raise RuntimeError("Attempts exhausted after visibility timeout expired")
+
+            # Finish before the claim expires so no other worker picks the job up concurrently
+            async with get_db_context() as db:
+                await asyncio.wait_for(handler(db, job.payload), timeout=settings.JOB_VISIBILITY_TIMEOUT)
+            async with get_db_context() as db:
+                if await complete_job(db, job.id, self.worker_id):
+                    interval = get_recurring_tasks().get(job.task)
+                    if interval is not None:
+                        run_at = datetime.utcnow() + timedelta(seconds=interval)
+                        await ensure_job_scheduled(db, job.task, run_at=run_at, queue=queue)
+        except Exception as e:
+            logger.error(f"Job {job.id} ({job.task}) failed on attempt {job.attempts}: {str(e)}")
+            try:
+                async with get_db_context() as db:
+                    await fail_job(db, job, self.worker_id, str(e) or e.__class__.__name__)
+            except SQLAlchemyError as db_error:
+                logger.error(f"Could not record failure of job {job.id}: {str(db_error)}")
+        finally:
+            self._active[key] -= 1
+            self._wakeups[key].set()
+
+async def run_worker() -> None:
+    """Standalone worker process"""
+    from app.db.dbconnection import db_manager
+
+    worker = JobWorker()
+    await notification_listener.start()
+    await worker.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await worker.stop()
+        await notification_listener.stop()
+        await db_manager.dispose()
+
+if __name__ == "__main__":
+    setup_logging()
+    try:
+        asyncio.run(run_worker())
+    except KeyboardInterrupt:
+        pass
@@ -5,6 +5,15 @@ from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.v1.api import reset_database
 from app.v1.api.user import router as user_router
+from app.v1.api.order import router as order_router
+from app.v1.api.worklist import router as worklist_router
+from app.v1.api.admin import router as admin_router
+from app.v1.api.test import router as lab_test_router
+from app.v1.api.billing import router as billing_router
+from app.v1.api.patient import router as patient_router
+from app.v1.api.report import router as report_router
+from app.v1.api.sync import router as sync_router
+from app.v1.api.attachment import router as attachment_router
 # from app.api.account import router as account_router
 # from app.api.consultant import router as consultant_router
 # from app.api.tests import router as test_router
@@ -14,7 +23,21 @@ from app.v1.api.user import router as user_router
 # from app.api.registrations import router as registrations_router
 # from app.api.reports import router as reports_router
 from app.db.dbconnection import db_manager
+from app.db.notify import notification_listener
+from app.core.cache import invalidation_bus
+from app.core.audit import audit_log
+from app.jobs.worker import JobWorker
 from app.middleware.error_handler import error_handler_middleware
+from app.middleware.idempotency import IdempotencyMiddleware
+from app.middleware.profiling import ProfilingMiddleware
+from app.middleware.tracing import TracingMiddleware, SpanMiddleware
+from app.middleware.load_shedding import AdmissionControlMiddleware
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.branch import BranchMiddleware
+from app.middleware.request_id import RequestIdMiddleware
+from app.core.compression import serve_precompressed_openapi
+from app.core.tracing import trace_exporter, instrument_fastapi
+from app.core.logs import setup_logging
 
 # Default settings if config module is not available
 STATIC_DIR = "static"
@@ -29,15 +52,30 @@ except ImportError:
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    job_worker = JobWorker() if settings.JOB_WORKER_ENABLED else None
     try:
         # Initialize database schema
         await db_manager.init_db()
+        await invalidation_bus.start()
+        await notification_listener.start()
+        await trace_exporter.start()
+        await audit_log.start()
+        if job_worker:
+            await job_worker.start()
         yield
     finally:
         # Cleanup on shutdown
+        if job_worker:
+            await job_worker.stop()
+        await audit_log.stop()
+        await notification_listener.stop()
+        await trace_exporter.stop()
         await db_manager.dispose()
 
 def create_app() -> FastAPI:
+    # Before anything logs: every record goes through the background writer
+    setup_logging()
+
     app = FastAPI(
         title="Diagnosis Application",
         description="Medical Diagnosis Application API Service",
@@ -48,6 +86,13 @@ def create_app() -> FastAPI:
         openapi_url="/api/openapi.json"
     )
 
+    # Opt-in per-request profiling (innermost, so only the handler's own task is sampled)
+    app.add_middleware(ProfilingMiddleware)
+
+    # Replay stored responses for retried requests carrying an Idempotency-Key
+    app.add_middleware(IdempotencyMiddleware)
+    app.add_middleware(SpanMiddleware, name="middleware.idempotency")
+
     # Configure CORS
     app.add_middleware(
         CORSMiddleware,
@@ -56,9 +101,28 @@ def create_app() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    app.add_middleware(SpanMiddleware, name="middleware.cors")
+
+    # Negotiated gzip/brotli/zstd for responses above COMPRESSION_MIN_SIZE
+    app.add_middleware(CompressionMiddleware)
+    app.add_middleware(SpanMiddleware, name="middleware.compression")
 
     # Add error handling middleware
     app.middleware("http")(error_handler_middleware)
+    app.add_middleware(SpanMiddleware, name="middleware.error_handler")
+
+    # Lab branch (schema / node) of the request, from the token or host
+    app.add_middleware(BranchMiddleware)
+
+    # Adaptive concurrency limits: shed excess load early with 503 + Retry-After
+    app.add_middleware(AdmissionControlMiddleware)
+
+    # Request tracing (outermost, so the root span covers every middleware)
+    app.add_middleware(TracingMiddleware)
+    instrument_fastapi()
+
+    # Request id for log correlation (outside tracing, so its logs carry the id too)
+    app.add_middleware(RequestIdMiddleware)
 
     # Serve static files
     # app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
@@ -74,6 +138,15 @@ def create_app() -> FastAPI:
         # registrations_router.router,
         # reports_router.router,
         user_router.router,
+        order_router.router,
+        worklist_router.router,
+        admin_router.router,
+        lab_test_router.router,
+        billing_router.router,
+        patient_router.router,
+        report_router.router,
+        sync_router.router,
+        attachment_router.router,
         reset_database.router
     ]
 
@@ -81,6 +154,9 @@ def create_app() -> FastAPI:
     for router in api_routers:
         app.include_router(router)
 
+    # The OpenAPI document only changes on deploy: compress it once
+    serve_precompressed_openapi(app)
+
     return app
 
 app = create_app()
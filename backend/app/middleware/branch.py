@@ -0,0 +1,93 @@
+import json
+from http.cookies import CookieError, SimpleCookie
+from typing import Optional, Tuple
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.auth import token_branch
+from app.core.tracing import current_span
+from app.db.branches import branch_from_host, branches, default_branch, use_branch
+
+BRANCH_HEADER = b"x-branch"
+TOKEN_COOKIES = ("access_token", "refresh_token")
+
+class BranchMiddleware:
+    """Decide which branch (schema / node) a request runs against.
+
+    The branch claim of the caller's token wins; before login it comes from
+    the host ("<branch>.<BRANCH_HOST_SUFFIX>") or an X-Branch header, else the
+    default branch. A token presented on another branch's host is refused
+    rather than silently served from the token's branch.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.multi_branch = len(branches) > 1
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket") or not self.multi_branch:
+            return await self.app(scope, receive, send)
+
+        name, error = self._resolve(scope)
+        if error is not None:
+            return await self._reject(send, error)
+        branch = branches[name] if name is not None else default_branch
+        span = current_span()
+        if span is not None:
+            span.set_attribute("lab.branch", branch.name)
+        with use_branch(branch):
+            await self.app(scope, receive, send)
+
+    def _resolve(self, scope: Scope) -> Tuple[Optional[str], Optional[Tuple[int, str]]]:
+        """(branch name or None for the default, (status, detail) if the request must be refused)"""
+        host = header = token = None
+        for key, value in scope["headers"]:
+            if key == b"host":
+                host = value.decode("latin-1")
+            elif key == BRANCH_HEADER:
+                header = value.decode("latin-1").strip().lower()
+            elif key == b"authorization" and value[:7].lower() == b"bearer ":
+                token = value[7:].decode("latin-1").strip()
+            elif key == b"cookie" and token is None:
+                token = self._cookie_token(value.decode("latin-1"))
+
+        host_branch = branch_from_host(host)
+        if host_branch is not None and host_branch not in branches:
+            return None, (404, f"Unknown branch '{host_branch}'")
+
+        claimed = token_branch(token) if token else None
+        if claimed is not None:
+            if claimed not in branches:
+                return None, (403, "Token issued for a branch that is not served here")
+            if host_branch is not None and claimed != host_branch:
+                return None, (403, "Token belongs to another branch")
+            return claimed, None
+
+        name = host_branch or header
+        if name is not None and name not in branches:
+            return None, (404, f"Unknown branch '{name}'")
+        return name, None
+
+    @staticmethod
+    def _cookie_token(cookie_header: str) -> Optional[str]:
+        try:
+            cookies = SimpleCookie(cookie_header)
+        except CookieError:
+            return None
+        for name in TOKEN_COOKIES:
+            if name in cookies:
+                return cookies[name].value
+        return None
+
+    async def _reject(self, send: Send, error: Tuple[int, str]) -> None:
+        status_code, detail = error
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
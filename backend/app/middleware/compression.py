@@ -0,0 +1,86 @@
+from typing import Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.compression import StreamCompressor, negotiate_encoding
+from app.core.config import settings
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml", "image/svg+xml")
+# Streams must reach the client as each event is written, not when a buffer fills
+STREAMING_TYPES = ("text/event-stream",)
+
+class CompressionMiddleware:
+    """Negotiated gzip/brotli/zstd compression of responses above COMPRESSION_MIN_SIZE.
+
+    Bodies are buffered only until the threshold is reached, so streamed
+    responses are compressed incrementally. Responses that are already encoded,
+    partial (206), not a compressible type or a live event stream pass through.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.min_size = settings.COMPRESSION_MIN_SIZE
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.COMPRESSION_ENABLED or scope["method"] == "HEAD":
+            return await self.app(scope, receive, send)
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start: Optional[Message] = None
+        buffer = b""
+        compressor: Optional[StreamCompressor] = None
+        passthrough = False
+
+        async def compressing_send(message: Message) -> None:
+            nonlocal start, buffer, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                passthrough = (
+                    message["status"] in (204, 206, 304)
+                    or "content-encoding" in headers
+                    or "no-transform" in headers.get("cache-control", "")
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                    or content_type.startswith(STREAMING_TYPES)
+                )
+                if passthrough:
+                    await send(message)
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                return await send(message)
+
+            more_body = message.get("more_body", False)
+            if compressor is not None:
+                chunk = compressor.compress(message.get("body", b""))
+                if not more_body:
+                    chunk += compressor.finish()
+                if chunk or not more_body:
+                    await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+                return
+
+            buffer += message.get("body", b"")
+            if len(buffer) < self.min_size:
+                if more_body:
+                    return  # keep buffering until we know whether it is worth compressing
+                await send(start)
+                await send({"type": "http.response.body", "body": buffer})
+                return
+
+            headers = MutableHeaders(raw=start["headers"])
+            headers["Content-Encoding"] = encoding
+            headers.add_vary_header("Accept-Encoding")
+            compressor = StreamCompressor(encoding)
+            body = compressor.compress(buffer)
+            buffer = b""
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                body += compressor.finish()
+                headers["Content-Length"] = str(len(body))
+            await send(start)
+            await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        await self.app(scope, receive, compressing_send)
@@ -12,28 +12,28 @@ async def error_handler_middleware(request: Request, call_next):
         return await call_next(request)
     except BaseAPIException as exc:
         # Log custom exceptions
-        logger.error(f"API Error: {exc.detail}")
+        logger.error(f"API Error: {exc.detail}", extra={"method": request.method, "path": request.url.path})
         return JSONResponse(
             status_code=exc.status_code,
             content={"detail": exc.detail}
         )
     except ValidationError as exc:
         # Handle Pydantic validation errors
-        logger.error(f"Validation Error: {str(exc)}")
+        logger.error(f"Validation Error: {str(exc)}", extra={"method": request.method, "path": request.url.path})
         return JSONResponse(
             status_code=422,
             content={"detail": exc.errors()}
         )
     except SQLAlchemyError as exc:
         # Handle database errors
-        logger.error(f"Database Error: {str(exc)}")
+        logger.error(f"Database Error: {str(exc)}", extra={"method": request.method, "path": request.url.path})
         return JSONResponse(
             status_code=500,
             content={"detail": "Database operation failed"}
         )
     except Exception as exc:
         # Handle unexpected errors
-        logger.exception("Unexpected error occurred")
+        logger.exception("Unexpected error occurred", extra={"method": request.method, "path": request.url.path})
         return JSONResponse(
             status_code=500,
             content={"detail": "Internal server error"}
@@ -0,0 +1,305 @@
+import asyncio
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, delete, update, or_, and_
+from sqlalchemy.dialects.postgresql import insert
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.auth import decode_token, TokenType
+from app.core.config import settings
+from app.db.notify import notification_listener, notify
+from app.db.session import get_db_context
+from app.models.idempotency import IdempotencyKey, IdempotencyStatus
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = b"idempotency-key"
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+MAX_KEY_LENGTH = 255
+# Headers recomputed by the server or unsafe to replay to another client
+NON_REPLAYABLE_HEADERS = {"content-length", "set-cookie", "date", "server"}
+
+def scoped_key_hash(caller: str, raw_key: bytes) -> str:
+    """Stored form of an Idempotency-Key: scoped to the caller, so keys from different users never collide"""
+    return hashlib.sha256(f"{caller}:".encode() + raw_key).hexdigest()
+
+class IdempotencyMiddleware:
+    """Replay the stored response for a repeated Idempotency-Key.
+
+    The first request with a key claims a row in idempotency_keys and runs the
+    handler; its response is stored until IDEMPOTENCY_TTL_HOURS. Duplicates
+    arriving while it runs wait for it to finish (woken via NOTIFY), and later
+    duplicates get the stored response without the handler running again.
+    While the handler runs its claim is renewed, so a slow request is not
+    taken for abandoned after IDEMPOTENCY_LOCK_TIMEOUT. Responses larger than
+    IDEMPOTENCY_MAX_BODY_BYTES are recorded by status only: duplicates get
+    the status with an empty body rather than running the handler again.
+    Keys are scoped to the caller, and reusing a key for a different request
+    is rejected. 5xx responses and exceptions release the key so the client
+    can retry. POST bodies under IDEMPOTENCY_EXEMPT_PATHS are streamed rather
+    than buffered, so those handlers look the key up themselves.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._waiters: Dict[str, asyncio.Event] = {}
+        self._subscribed = False
+        self.exempt_prefixes = tuple(settings.IDEMPOTENCY_EXEMPT_PATHS)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in MUTATING_METHODS:
+            return await self.app(scope, receive, send)
+        if scope["method"] == "POST" and scope["path"].startswith(self.exempt_prefixes):
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope["headers"])
+        raw_key = headers.get(IDEMPOTENCY_HEADER)
+        if raw_key is None:
+            return await self.app(scope, receive, send)
+        if not raw_key or len(raw_key) > MAX_KEY_LENGTH:
+            return await self._send_error(send, status.HTTP_400_BAD_REQUEST, "Invalid Idempotency-Key header")
+
+        body, receive = await self._buffer_body(receive)
+        key_hash = scoped_key_hash(self._caller(headers), raw_key)
+        fingerprint = hashlib.sha256(
+            b"\n".join([scope["method"].encode(), scope["path"].encode(), scope.get("query_string", b""), body])
+        ).hexdigest()
+
+        await self._ensure_subscribed()
+        try:
+            record = await self._acquire(key_hash, fingerprint)
+        except HTTPException as exc:
+            return await self._send_error(send, exc.status_code, exc.detail, exc.headers)
+
+        if record is not None:
+            return await self._replay(send, record)
+        await self._run_and_store(scope, receive, send, key_hash)
+
+    def _caller(self, headers: Dict[bytes, bytes]) -> str:
+        """Token subject of the caller, so keys from different users never collide"""
+        token = None
+        auth_header = headers.get(b"authorization", b"").decode("latin-1")
+        if auth_header.startswith("Bearer "):
+            token = auth_header.split(" ", 1)[1]
+        else:
+            for cookie in headers.get(b"cookie", b"").decode("latin-1").split(";"):
+                name, _, value = cookie.strip().partition("=")
+                if name == "access_token":
+                    token = value
+        if not token:
+            return "anonymous"
+        try:
+            return decode_token(token, TokenType.ACCESS).get("sub", "anonymous")
+        except HTTPException:
+            return "anonymous"
+
+    async def _buffer_body(self, receive: Receive) -> Tuple[bytes, Receive]:
+        """Read the whole request body and return a receive that replays it"""
+        chunks: List[bytes] = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                break
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        body = b"".join(chunks)
+        replayed = False
+
+        async def replay_receive() -> Message:
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        return body, replay_receive
+
+    async def _acquire(self, key_hash: str, fingerprint: str) -> Optional[IdempotencyKey]:
+        """Claim the key (returns None) or wait for and return a completed record"""
+        deadline = asyncio.get_running_loop().time() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+        while True:
+            event = self._waiters.setdefault(key_hash, asyncio.Event())
+            event.clear()
+            now = datetime.utcnow()
+            async with get_db_context() as db:
+                # New, expired and abandoned keys are (re)claimed atomically
+                stmt = insert(IdempotencyKey).values(
+                    key_hash=key_hash,
+                    request_fingerprint=fingerprint,
+                    status=IdempotencyStatus.IN_PROGRESS,
+                    locked_until=now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT),
+                    created_at=now,
+                    expires_at=now + timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS),
+                )
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[IdempotencyKey.key_hash],
+                    set_={
+                        "request_fingerprint": stmt.excluded.request_fingerprint,
+                        "status": stmt.excluded.status,
+                        "locked_until": stmt.excluded.locked_until,
+                        "response_status": None,
+                        "response_headers": None,
+                        "response_body": None,
+                        "created_at": stmt.excluded.created_at,
+                        "expires_at": stmt.excluded.expires_at,
+                    },
+                    where=or_(
+                        IdempotencyKey.expires_at < now,
+                        and_(
+                            IdempotencyKey.status == IdempotencyStatus.IN_PROGRESS,
+                            IdempotencyKey.locked_until < now,
+                        ),
+                    ),
+                ).returning(IdempotencyKey.key_hash)
+                claimed = (await db.execute(stmt)).scalar_one_or_none()
+                if claimed:
+                    self._waiters.pop(key_hash, None)
+                    return None
+
+                record = (await db.execute(
+                    select(IdempotencyKey).where(IdempotencyKey.key_hash == key_hash)
+                )).scalar_one_or_none()
+
+            if record is not None:
+                if record.request_fingerprint != fingerprint:
+                    raise HTTPException(
+                        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                        detail="Idempotency-Key was already used for a different request"
+                    )
+                if record.status == IdempotencyStatus.COMPLETED:
+                    self._waiters.pop(key_hash, None)
+                    return record
+
+            # In flight elsewhere (or just released): wait for its NOTIFY, re-checking periodically
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                self._waiters.pop(key_hash, None)
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A request with this Idempotency-Key is still in progress",
+                    headers={"Retry-After": "1"}
+                )
+            try:
+                await asyncio.wait_for(event.wait(), timeout=min(remaining, 1.0))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run_and_store(self, scope: Scope, receive: Receive, send: Send, key_hash: str) -> None:
+        response_status = 500
+        response_headers: List[List[str]] = []
+        body_chunks: List[bytes] = []
+        body_size = 0
+
+        async def capture_send(message: Message) -> None:
+            nonlocal response_status, body_size
+            if message["type"] == "http.response.start":
+                response_status = message["status"]
+                response_headers.extend(
+                    [name.decode("latin-1"), value.decode("latin-1")]
+                    for name, value in message.get("headers", [])
+                    if name.decode("latin-1").lower() not in NON_REPLAYABLE_HEADERS
+                )
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                body_size += len(chunk)
+                if body_size <= settings.IDEMPOTENCY_MAX_BODY_BYTES:
+                    body_chunks.append(chunk)
+            await send(message)
+
+        heartbeat = asyncio.create_task(self._heartbeat(key_hash))
+        try:
+            try:
+                await self.app(scope, receive, capture_send)
+            finally:
+                heartbeat.cancel()
+        except BaseException:
+            await self._release(key_hash)
+            raise
+
+        if response_status >= 500:
+            await self._release(key_hash)
+            return
+        # Too large to keep: remember that it ran (a None body), not what it returned
+        response_body = b"".join(body_chunks) if body_size <= settings.IDEMPOTENCY_MAX_BODY_BYTES else None
+
+        async with get_db_context() as db:
+            await db.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.key_hash == key_hash)
+                .values(
+                    status=IdempotencyStatus.COMPLETED,
+                    locked_until=None,
+                    response_status=response_status,
+                    response_headers=response_headers,
+                    response_body=response_body,
+                )
+            )
+            await notify(db, settings.IDEMPOTENCY_NOTIFY_CHANNEL, key_hash)
+
+    async def _heartbeat(self, key_hash: str) -> None:
+        """Keep extending the claim while the handler runs"""
+        interval = settings.IDEMPOTENCY_LOCK_TIMEOUT / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with get_db_context() as db:
+                    await db.execute(
+                        update(IdempotencyKey)
+                        .where(
+                            IdempotencyKey.key_hash == key_hash,
+                            IdempotencyKey.status == IdempotencyStatus.IN_PROGRESS,
+                        )
+                        .values(
+                            locked_until=datetime.utcnow() + timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT)
+                        )
+                    )
+            except Exception as e:
+                logger.error(f"Failed to renew idempotency key: {str(e)}")
+
+    async def _release(self, key_hash: str) -> None:
+        """Forget an unfinished key so the client's retry runs the handler again"""
+        try:
+            async with get_db_context() as db:
+                await db.execute(delete(IdempotencyKey).where(IdempotencyKey.key_hash == key_hash))
+                await notify(db, settings.IDEMPOTENCY_NOTIFY_CHANNEL, key_hash)
+        except Exception as e:
+            logger.error(f"Failed to release idempotency key: {str(e)}")
+
+    async def _replay(self, send: Send, record: IdempotencyKey) -> None:
+        body = record.response_body
+        omitted = {"content-type", "content-encoding"} if body is None else set()
+        headers = [
+            (name.encode("latin-1"), value.encode("latin-1"))
+            for name, value in record.response_headers or []
+            if name.lower() not in omitted
+        ]
+        headers.append((b"content-length", str(len(body or b"")).encode()))
+        headers.append((b"idempotent-replayed", b"true"))
+        if body is None:
+            # The original response was too large to store
+            headers.append((b"idempotent-body-omitted", b"true"))
+        await send({"type": "http.response.start", "status": record.response_status, "headers": headers})
+        await send({"type": "http.response.body", "body": body or b""})
+
+    async def _send_error(self, send: Send, status_code: int, detail: str, extra_headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps({"detail": detail}).encode()
+        headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        headers.extend((name.lower().encode(), value.encode()) for name, value in (extra_headers or {}).items())
+        await send({"type": "http.response.start", "status": status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _ensure_subscribed(self) -> None:
+        if not self._subscribed:
+            self._subscribed = True
+            await notification_listener.subscribe(settings.IDEMPOTENCY_NOTIFY_CHANNEL, self._on_notify)
+
+    def _on_notify(self, channel: str, key_hash: str) -> None:
+        event = self._waiters.get(key_hash)
+        if event is not None:
+            event.set()
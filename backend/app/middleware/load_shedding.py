@@ -0,0 +1,62 @@
+import json
+import time
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.limiter import route_limiters
+
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+class AdmissionControlMiddleware:
+    """Admit requests through the adaptive limiter of their route class.
+
+    Requests over the limit wait at most ADMISSION_MAX_WAIT_MS and are then shed
+    with 503 and Retry-After. Long-lived streams are exempt since they would
+    hold a slot for their whole lifetime.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.auth_prefix = f"{settings.API_V1_STR}/auth/"
+        self.exempt_prefixes = tuple(settings.ADMISSION_EXEMPT_PATHS)
+
+    def route_class(self, method: str, path: str) -> str:
+        if path.startswith(self.auth_prefix):
+            return "auth"
+        return "read" if method in READ_METHODS else "write"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (scope["type"] != "http" or not settings.ADMISSION_CONTROL_ENABLED
+                or scope["path"].startswith(self.exempt_prefixes)):
+            return await self.app(scope, receive, send)
+
+        limiter = route_limiters[self.route_class(scope["method"], scope["path"])]
+        if not await limiter.acquire(settings.ADMISSION_MAX_WAIT_MS / 1000):
+            return await self._reject(send, limiter.retry_after())
+
+        response_status = 500
+
+        async def capture_send(message: Message) -> None:
+            nonlocal response_status
+            if message["type"] == "http.response.start":
+                response_status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, capture_send)
+        finally:
+            limiter.release(time.perf_counter() - started, ok=response_status < 500)
+
+    async def _reject(self, send: Send, retry_after: int) -> None:
+        body = json.dumps({"detail": "Server is overloaded, please retry later"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,141 @@
+import asyncio
+import json
+import logging
+import random
+import re
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs
+
+from fastapi import HTTPException
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.auth import decode_token, TokenType
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    from pyinstrument import Profiler
+except ImportError:  # optional dependency
+    Profiler = None
+
+PROFILE_HEADER = b"x-profile-token"
+PROFILE_QUERY_PARAM = "__profile"
+PROFILE_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+class ProfileStore:
+    """Keeps the last PROFILES_KEEP profiles as HTML reports plus JSON metadata"""
+
+    def __init__(self, directory: str, keep: int):
+        self.directory = Path(directory)
+        self.keep = keep
+
+    def save(self, html: str, metadata: Dict[str, Any]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / f"{metadata['id']}.html").write_text(html)
+        (self.directory / f"{metadata['id']}.json").write_text(json.dumps(metadata))
+        for stale in self._metadata_files()[self.keep:]:
+            stale.with_suffix(".html").unlink(missing_ok=True)
+            stale.unlink(missing_ok=True)
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [json.loads(path.read_text()) for path in self._metadata_files()]
+
+    def html_path(self, profile_id: str) -> Optional[Path]:
+        if not PROFILE_ID_PATTERN.match(profile_id):
+            return None
+        path = self.directory / f"{profile_id}.html"
+        return path if path.exists() else None
+
+    def _metadata_files(self) -> List[Path]:
+        """Newest first"""
+        if not self.directory.exists():
+            return []
+        return sorted(self.directory.glob("*.json"), key=lambda path: path.stat().st_mtime, reverse=True)
+
+profile_store = ProfileStore(settings.PROFILES_DIR, settings.PROFILES_KEEP)
+
+class ProfilingMiddleware:
+    """Profile single requests with a statistical (sampling) profiler.
+
+    A request is profiled when it carries a valid profile token (issued to admins
+    by POST /v1/admin/profiles/token) in the X-Profile-Token header or the
+    `__profile` query parameter, or when it falls in PROFILING_SAMPLE_RATE.
+    Everything else goes straight through after a header scan.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.enabled = settings.PROFILING_ENABLED and Profiler is not None
+        # pyinstrument supports one active profiler per thread (i.e. per event loop)
+        self._busy = False
+        if settings.PROFILING_ENABLED and Profiler is None:
+            logger.warning("pyinstrument is not installed; request profiling is disabled")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not self.enabled or scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        trigger = self._trigger(scope)
+        if trigger is None or self._busy:
+            return await self.app(scope, receive, send)
+
+        response_status = 500
+
+        async def capture_send(message: Message) -> None:
+            nonlocal response_status
+            if message["type"] == "http.response.start":
+                response_status = message["status"]
+            await send(message)
+
+        # async_mode follows this request's task only, not concurrent requests
+        profiler = Profiler(interval=settings.PROFILING_INTERVAL, async_mode="enabled")
+        started = time.perf_counter()
+        self._busy = True
+        profiler.start()
+        try:
+            await self.app(scope, receive, capture_send)
+        finally:
+            profiler.stop()
+            self._busy = False
+            duration_ms = (time.perf_counter() - started) * 1000
+            metadata = {
+                "id": uuid.uuid4().hex,
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": response_status,
+                "duration_ms": round(duration_ms, 2),
+                "trigger": trigger,
+                "created_at": datetime.utcnow().isoformat(),
+            }
+            try:
+                html = profiler.output_html()
+                await asyncio.to_thread(profile_store.save, html, metadata)
+            except Exception as e:
+                logger.error(f"Failed to store profile: {str(e)}")
+
+    def _trigger(self, scope: Scope) -> Optional[str]:
+        """'token:<admin id>' / 'sampled' if this request should be profiled, else None"""
+        token = None
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                token = value.decode("latin-1")
+                break
+        if token is None and PROFILE_QUERY_PARAM.encode() in scope.get("query_string", b""):
+            values = parse_qs(scope["query_string"].decode("latin-1")).get(PROFILE_QUERY_PARAM)
+            token = values[0] if values else None
+
+        if token is not None:
+            try:
+                payload = decode_token(token, TokenType.PROFILE)
+                return f"token:{payload.get('sub')}"
+            except HTTPException:
+                logger.warning(f"Ignoring invalid profile token on {scope['path']}")
+
+        if settings.PROFILING_SAMPLE_RATE and random.random() < settings.PROFILING_SAMPLE_RATE:
+            return "sampled"
+        return None
@@ -0,0 +1,41 @@
+import re
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.ids import uuid7
+from app.core.logs import use_request_id
+
+REQUEST_ID_HEADER = b"x-request-id"
+# Ids from the proxy are trusted only if they are short and plain
+VALID_REQUEST_ID = re.compile(rb"^[A-Za-z0-9._:-]{1,128}$")
+
+class RequestIdMiddleware:
+    """Correlate log records of a request.
+
+    Uses the X-Request-ID set by the proxy, or generates one, tags every log
+    record written while handling the request with it and echoes it back.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request_id = None
+        for key, value in scope["headers"]:
+            if key == REQUEST_ID_HEADER:
+                if VALID_REQUEST_ID.match(value):
+                    request_id = value.decode("ascii")
+                break
+        if request_id is None:
+            request_id = str(uuid7())
+        header = (REQUEST_ID_HEADER, request_id.encode("ascii"))
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), header]
+            await send(message)
+
+        with use_request_id(request_id):
+            await self.app(scope, receive, send_with_id)
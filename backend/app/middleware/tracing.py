@@ -0,0 +1,60 @@
+import re
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.tracing import start_span, start_trace, use_span
+
+# W3C trace context: version-traceid-parentid-flags
+TRACEPARENT_PATTERN = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+class TracingMiddleware:
+    """Open the root span of a request (outermost middleware).
+
+    An incoming `traceparent` header continues the caller's trace and sampling
+    decision (unless TRACING_ENABLED is off); otherwise the trace is sampled at
+    TRACING_SAMPLE_RATE. Sampled responses carry the trace id in X-Trace-Id.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        trace_id = parent_id = sampled = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                match = TRACEPARENT_PATTERN.match(value.decode("latin-1"))
+                if match:
+                    trace_id, parent_id, flags = match.groups()
+                    sampled = bool(int(flags, 16) & 1)
+                break
+
+        root = start_trace(
+            f"{scope['method']} {scope['path']}", trace_id, parent_id, sampled,
+            **{"http.method": scope["method"], "http.target": scope["path"]}
+        )
+        if root is None:
+            return await self.app(scope, receive, send)
+
+        async def traced_send(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                root.set_attribute("http.status_code", message["status"])
+                message["headers"] = list(message.get("headers", [])) + [(b"x-trace-id", root.trace_id.encode())]
+            await send(message)
+
+        with use_span(root):
+            await self.app(scope, receive, traced_send)
+
+class SpanMiddleware:
+    """Wrap the next middleware layer in a span, attributing its time separately"""
+
+    def __init__(self, app: ASGIApp, name: str):
+        self.app = app
+        self.name = name
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        with start_span(self.name):
+            await self.app(scope, receive, send)
@@ -0,0 +1,49 @@
+# app/models/attachment.py
+
+from datetime import datetime
+from sqlalchemy import Column, ForeignKey, BigInteger, DateTime, String, Index, text
+from sqlalchemy.dialects.postgresql import UUID
+from app.db.base import Base
+from app.core.config import settings
+from app.core.ids import uuid7
+
+class AttachmentBlob(Base):
+    """File contents, stored once per distinct SHA-256 (see app.v1.api.attachment.storage)"""
+    __tablename__ = "attachment_blobs"
+    __table_args__ = (
+        Index("ix_attachment_blobs_linked_at", "linked_at"),
+        {"schema": settings.DB_SCHEMA},
+    )
+
+    sha256 = Column(String(64), primary_key=True)  # hex digest, also the file name
+    size = Column(BigInteger, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    # Last upload of this content: unreferenced blobs are only purged well after it
+    linked_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+class Attachment(Base):
+    """A file attached to an order, or to one of its reports"""
+    __tablename__ = "attachments"
+    __table_args__ = (
+        Index("ix_attachments_order_id", "order_id"),
+        Index("ix_attachments_report_id", "report_id"),
+        Index("ix_attachments_blob_sha256", "blob_sha256"),
+        Index(
+            "ux_attachments_idempotency_key", "idempotency_key",
+            unique=True, postgresql_where=text("idempotency_key IS NOT NULL"),
+        ),
+        {"schema": settings.DB_SCHEMA},
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    order_id = Column(UUID(as_uuid=True), ForeignKey(f"{settings.DB_SCHEMA}.orders.id"), nullable=False)
+    report_id = Column(
+        UUID(as_uuid=True), ForeignKey(f"{settings.DB_SCHEMA}.test_reports.id", ondelete="CASCADE"), nullable=True
+    )
+    blob_sha256 = Column(String(64), ForeignKey(f"{settings.DB_SCHEMA}.attachment_blobs.sha256"), nullable=False)
+    filename = Column(String(255), nullable=False)
+    media_type = Column(String(100), nullable=False)
+    uploaded_by = Column(UUID(as_uuid=True), ForeignKey(f"{settings.DB_SCHEMA}.users.id"), nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    # Caller-scoped Idempotency-Key of the upload (see scoped_key_hash), so a retried upload finds it
+    idempotency_key = Column(String(64), nullable=True)
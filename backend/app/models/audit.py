@@ -0,0 +1,33 @@
+# app/models/audit.py
+
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime, Index
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from app.db.base import Base
+from app.core.config import settings
+from app.core.ids import uuid7
+import enum
+
+class AuditAction(str, enum.Enum):
+    READ = "READ"
+    CREATE = "CREATE"
+    UPDATE = "UPDATE"
+    DELETE = "DELETE"
+
+class AuditEvent(Base):
+    """Append-only audit trail, written in batches by app.core.audit"""
+    __tablename__ = "audit_events"
+    __table_args__ = (
+        Index("ix_audit_events_entity", "entity_type", "entity_id", "occurred_at"),
+        Index("ix_audit_events_actor", "actor_id", "occurred_at"),
+        {"schema": settings.DB_SCHEMA},
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    occurred_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    actor_id = Column(UUID(as_uuid=True), nullable=True)  # no FK: events outlive deleted users
+    # Plain text rather than a PG enum so batches can be COPYed in binary format
+    action = Column(String(20), nullable=False)
+    entity_type = Column(String(50), nullable=False)
+    entity_id = Column(String(100), nullable=True)
+    details = Column(JSONB, nullable=True)
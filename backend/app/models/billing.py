@@ -1,12 +1,12 @@
 # app/models/billing.py
 
-import uuid
 from datetime import datetime
-from sqlalchemy import Column, ForeignKey, DateTime, Enum, Numeric
+from sqlalchemy import Column, ForeignKey, DateTime, Enum, Numeric, String, Integer, BigInteger, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 from app.core.config import settings
+from app.core.ids import uuid7
 import enum
 
 class PaymentStatus(str, enum.Enum):
@@ -27,12 +27,13 @@ class Billing(Base):
     __tablename__ = "billings"
     __table_args__ = {"schema": settings.DB_SCHEMA}
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     order_id = Column(UUID(as_uuid=True), ForeignKey(f"{settings.DB_SCHEMA}.orders.id"), nullable=False)
 
     total_amount = Column(Numeric(10, 2), nullable=False)
     discount_amount = Column(Numeric(10, 2), default=0)
     net_amount = Column(Numeric(10, 2), nullable=False)
+    # Legacy: paid/due/status are derived from the payments ledger, not updated in place
     paid_amount = Column(Numeric(10, 2), default=0)
     due_amount = Column(Numeric(10, 2), default=0)
     discount_by = Column(Enum(DiscountBy), nullable=True)
@@ -43,3 +44,45 @@ class Billing(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
     order = relationship("Order", back_populates="billing")
+
+
+class Payment(Base):
+    """Append-only payments ledger: one row per payment (negative amount for a refund)"""
+    __tablename__ = "payments"
+    __table_args__ = (
+        # Balance reads: the not yet rolled-up tail of one billing, index-only
+        Index("ix_payments_billing_tail", "billing_id", "created_txid", postgresql_include=["amount"]),
+        # Cash closing: one range scan over a day, index-only
+        Index("ix_payments_received_at", "received_at", postgresql_include=["amount", "method"]),
+        Index("ix_payments_created_txid", "created_txid"),
+        {"schema": settings.DB_SCHEMA},
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    billing_id = Column(UUID(as_uuid=True), ForeignKey(f"{settings.DB_SCHEMA}.billings.id"), nullable=False)
+    amount = Column(Numeric(10, 2), nullable=False)
+    method = Column(Enum(PaymentMethod), nullable=False)
+    counter = Column(String(50), nullable=True)
+    received_by = Column(UUID(as_uuid=True), ForeignKey(f"{settings.DB_SCHEMA}.users.id"), nullable=True)
+    received_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    # Inserting transaction; the rollup only folds in rows of transactions that have finished
+    created_txid = Column(BigInteger, nullable=False, server_default=text("txid_current()"))
+
+class BillingBalance(Base):
+    """Running paid total per billing, maintained by the rollup_billing_balances job"""
+    __tablename__ = "billing_balances"
+    __table_args__ = {"schema": settings.DB_SCHEMA}
+
+    billing_id = Column(UUID(as_uuid=True), ForeignKey(f"{settings.DB_SCHEMA}.billings.id"), primary_key=True)
+    paid_total = Column(Numeric(12, 2), nullable=False, default=0)
+    payment_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+class PaymentRollupState(Base):
+    """Single row: payments with created_txid below this are included in billing_balances"""
+    __tablename__ = "payment_rollup_state"
+    __table_args__ = {"schema": settings.DB_SCHEMA}
+
+    id = Column(Integer, primary_key=True, default=1)
+    rolled_up_txid = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -1,14 +1,18 @@
-import uuid
-from sqlalchemy import Column, String
+from sqlalchemy import Column, String, Index
 from sqlalchemy.dialects.postgresql import UUID
 from app.core.config import settings
+from app.core.ids import uuid7
+from app.models.sync import SyncTracked
 from app.db.base import Base
 
-class Consultant(Base):
+class Consultant(SyncTracked, Base):
     __tablename__ = "consultants"
-    __table_args__ = {"schema": settings.DB_SCHEMA}
+    __table_args__ = (
+        Index("ix_consultants_sync", "change_txid", "change_seq"),
+        {"schema": settings.DB_SCHEMA},
+    )
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7, index=True)
     name = Column(String, nullable=False)
     specialization = Column(String, nullable=False)
     contact_number = Column(String, nullable=False)
@@ -0,0 +1,29 @@
+# app/models/idempotency.py
+
+from datetime import datetime
+from sqlalchemy import Column, String, Integer, DateTime, Enum, LargeBinary
+from sqlalchemy.dialects.postgresql import JSONB
+from app.db.base import Base
+from app.core.config import settings
+import enum
+
+class IdempotencyStatus(str, enum.Enum):
+    IN_PROGRESS = "IN_PROGRESS"
+    COMPLETED = "COMPLETED"
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = {"schema": settings.DB_SCHEMA}
+
+    # sha256 of the caller identity and the client-supplied Idempotency-Key
+    key_hash = Column(String(64), primary_key=True)
+    request_fingerprint = Column(String(64), nullable=False)
+    status = Column(Enum(IdempotencyStatus), nullable=False, default=IdempotencyStatus.IN_PROGRESS)
+    locked_until = Column(DateTime, nullable=True)  # in-flight owner is presumed dead after this
+
+    response_status = Column(Integer, nullable=True)
+    response_headers = Column(JSONB, nullable=True)
+    response_body = Column(LargeBinary, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
@@ -0,0 +1,41 @@
+# app/models/job.py
+
+from datetime import datetime
+from sqlalchemy import Column, String, Integer, DateTime, Enum, Text, Index
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from app.db.base import Base
+from app.core.config import settings
+from app.core.ids import uuid7
+import enum
+
+class JobStatus(str, enum.Enum):
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
+class Job(Base):
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Claim path: eligible jobs of one queue ordered by priority, then due time
+        Index("ix_jobs_claim", "queue", "status", "priority", "run_at"),
+        {"schema": settings.DB_SCHEMA},
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    queue = Column(String(50), nullable=False, default="default")
+    task = Column(String(100), nullable=False)
+    payload = Column(JSONB, nullable=False, default=dict)
+    priority = Column(Integer, nullable=False, default=0)  # higher runs first
+    status = Column(Enum(JobStatus), nullable=False, default=JobStatus.PENDING)
+
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=settings.JOB_MAX_ATTEMPTS)
+    run_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_until = Column(DateTime, nullable=True)  # visibility timeout of the current claim
+    locked_by = Column(String(100), nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    completed_at = Column(DateTime, nullable=True)
@@ -1,12 +1,13 @@
 # app/models/order.py
 
-import uuid
 from datetime import datetime
-from sqlalchemy import Column, ForeignKey, DateTime, Enum, Numeric
+from sqlalchemy import Column, ForeignKey, Date, DateTime, Enum, Index, Integer, Numeric, String
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 from app.core.config import settings
+from app.core.ids import uuid7
+from app.models.sync import SyncTracked
 import enum
 
 class OrderStatus(str, enum.Enum):
@@ -16,15 +17,25 @@ class OrderStatus(str, enum.Enum):
 
 class TestStatus(str, enum.Enum):
     PENDING = "PENDING"
+    SAMPLE_COLLECTED = "SAMPLE_COLLECTED"
     COMPLETED = "COMPLETED"
 
+# Allowed source states for each target state of an OrderTest
+TEST_STATUS_TRANSITIONS = {
+    TestStatus.SAMPLE_COLLECTED: {TestStatus.PENDING},
+    TestStatus.COMPLETED: {TestStatus.PENDING, TestStatus.SAMPLE_COLLECTED},
+}
 
-class Order(Base):
+
+class Order(SyncTracked, Base):
     __tablename__ = "orders"
-    __table_args__ = {"schema": settings.DB_SCHEMA}
+    __table_args__ = (
+        Index("ix_orders_sync", "change_txid", "change_seq"),
+        {"schema": settings.DB_SCHEMA},
+    )
 
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7, index=True)
     patient_id = Column(UUID(as_uuid=True), ForeignKey(f"{settings.DB_SCHEMA}.patients.id"), nullable=False)
     consultant_id = Column(UUID(as_uuid=True), ForeignKey(f"{settings.DB_SCHEMA}.consultants.id"), nullable=True)
     ordered_at = Column(DateTime, default=datetime.now)
@@ -36,16 +47,29 @@ class Order(Base):
     billing = relationship("Billing", uselist=False, back_populates="order")
 
 
-class OrderTest(Base):
+class OrderTest(SyncTracked, Base):
     __tablename__ = "order_tests"
-    __table_args__ = {"schema": settings.DB_SCHEMA}
+    __table_args__ = (
+        Index("ix_order_tests_accession_number", "accession_number", unique=True),
+        Index("ix_order_tests_sync", "change_txid", "change_seq"),
+        {"schema": settings.DB_SCHEMA},
+    )
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     order_id = Column(UUID(as_uuid=True), ForeignKey(f"{settings.DB_SCHEMA}.orders.id"), nullable=False)
     test_id = Column(UUID(as_uuid=True), ForeignKey(f"{settings.DB_SCHEMA}.lab_tests.id"), nullable=False)
     status = Column(Enum(TestStatus), default=TestStatus.PENDING)
     sample_collected_at = Column(DateTime, nullable=True)
+    accession_number = Column(String(20), nullable=True)  # tube label, assigned at sample collection
 
     order = relationship("Order", back_populates="order_tests")
     test = relationship("LabTest")
     report = relationship("TestReport", uselist=False, back_populates="order_test")
+
+class AccessionCounter(Base):
+    """High-water mark of accession numbers reserved per day; workers take blocks from it"""
+    __tablename__ = "accession_counters"
+    __table_args__ = {"schema": settings.DB_SCHEMA}
+
+    day = Column(Date, primary_key=True)
+    next_value = Column(Integer, nullable=False)  # first number not yet reserved
@@ -1,15 +1,19 @@
-import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Integer, DateTime
+from sqlalchemy import Column, String, Integer, DateTime, Index
 from sqlalchemy.dialects.postgresql import UUID
 from app.core.config import settings
+from app.core.ids import uuid7
+from app.models.sync import SyncTracked
 from app.db.base import Base
 
-class Patient(Base):
+class Patient(SyncTracked, Base):
     __tablename__ = "patients"
-    __table_args__ = {"schema": settings.DB_SCHEMA}
+    __table_args__ = (
+        Index("ix_patients_sync", "change_txid", "change_seq"),
+        {"schema": settings.DB_SCHEMA},
+    )
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7, index=True)
     first_name = Column(String, nullable=False)
     last_name = Column(String, nullable=False)
     age = Column(String, nullable=False)
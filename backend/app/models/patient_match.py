@@ -0,0 +1,27 @@
+# app/models/patient_match.py
+
+from datetime import datetime
+from sqlalchemy import Column, ForeignKey, String, Integer, DateTime, Index
+from sqlalchemy.dialects.postgresql import UUID
+from app.db.base import Base
+from app.core.config import settings
+from app.core.ids import uuid7
+
+class PatientMatchKey(Base):
+    """Blocking keys of a patient for duplicate detection (see patient/matching.py)"""
+    __tablename__ = "patient_match_keys"
+    __table_args__ = (
+        # Candidate lookup: exact match on (type, value)
+        Index("ix_patient_match_keys_lookup", "key_type", "key_value"),
+        {"schema": settings.DB_SCHEMA},
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    patient_id = Column(
+        UUID(as_uuid=True), ForeignKey(f"{settings.DB_SCHEMA}.patients.id", ondelete="CASCADE"),
+        nullable=False, index=True
+    )
+    key_type = Column(String(20), nullable=False)
+    key_value = Column(String(100), nullable=False)
+    key_version = Column(Integer, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
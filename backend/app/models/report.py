@@ -1,23 +1,53 @@
 # app/models/test_report.py
 
-import uuid
 from datetime import datetime
-from sqlalchemy import Column, ForeignKey, DateTime, Text
+from sqlalchemy import Column, ForeignKey, DateTime, Text, String, Float, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 from app.core.config import settings
+from app.core.ids import uuid7
 
 class TestReport(Base):
     __tablename__ = "test_reports"
-    __table_args__ = {"schema": settings.DB_SCHEMA}
+    __table_args__ = (
+        # One report per order test: a re-sent result must not become a second report
+        Index("ux_test_reports_order_test_id", "order_test_id", unique=True),
+        {"schema": settings.DB_SCHEMA},
+    )
 
-
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     order_test_id = Column(UUID(as_uuid=True), ForeignKey(f"{settings.DB_SCHEMA}.order_tests.id"), nullable=False)
     result = Column(JSONB, nullable=False)
     comments = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.now)
+    flagged_at = Column(DateTime, nullable=True)  # last reference-range evaluation of `result`
 
     order_test = relationship("OrderTest", back_populates="report")
 
+
+class AnalyteObservation(Base):
+    """One numeric analyte value of a report, keyed for per-patient trend queries.
+
+    Derived from `TestReport.result` when reports are written (and by the
+    backfill_analyte_observations job), so trends never touch the JSONB blobs.
+    """
+    __tablename__ = "analyte_observations"
+    __table_args__ = (
+        # Trend query: range scan on (patient, analyte, time), answered from the index alone
+        Index(
+            "ix_analyte_observations_trend", "patient_id", "analyte", "observed_at",
+            postgresql_include=["value", "unit"],
+        ),
+        {"schema": settings.DB_SCHEMA},
+    )
+
+    report_id = Column(
+        UUID(as_uuid=True), ForeignKey(f"{settings.DB_SCHEMA}.test_reports.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    analyte = Column(String(50), primary_key=True)
+    patient_id = Column(UUID(as_uuid=True), ForeignKey(f"{settings.DB_SCHEMA}.patients.id"), nullable=False)
+    observed_at = Column(DateTime, nullable=False)  # sample collection time, else report time
+    value = Column(Float, nullable=False)
+    unit = Column(String(20), nullable=True)
@@ -0,0 +1,36 @@
+# app/models/sync.py
+
+from datetime import datetime
+from sqlalchemy import Column, String, BigInteger, DateTime, Index
+from sqlalchemy.dialects.postgresql import UUID
+from app.db.base import Base
+from app.core.config import settings
+
+# Tables offline collection centers mirror through /v1/sync
+SYNC_TABLES = ("patients", "consultants", "lab_tests", "orders", "order_tests")
+
+class SyncTracked:
+    """Position of a row's latest change in the sync change stream.
+
+    Both columns are set by the sync_track trigger on every insert and update
+    (see app.db.triggers), never by the application: the writing transaction's
+    id and a branch-wide change sequence value. Rows are ordered by
+    (change_txid, change_seq); see app.v1.api.sync.cursor.
+    """
+    change_txid = Column(BigInteger, nullable=True)
+    change_seq = Column(BigInteger, nullable=True)
+
+class SyncTombstone(Base):
+    """A deleted row of a SYNC_TABLES table, kept for SYNC_TOMBSTONE_RETENTION_DAYS"""
+    __tablename__ = "sync_tombstones"
+    __table_args__ = (
+        Index("ix_sync_tombstones_change", "change_txid", "change_seq"),
+        Index("ix_sync_tombstones_deleted_at", "deleted_at"),
+        {"schema": settings.DB_SCHEMA},
+    )
+
+    entity = Column(String(30), primary_key=True)  # table name
+    entity_id = Column(UUID(as_uuid=True), primary_key=True)
+    change_txid = Column(BigInteger, nullable=False)
+    change_seq = Column(BigInteger, nullable=False)
+    deleted_at = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -1,17 +1,52 @@
-import uuid
-from sqlalchemy import Column, String, Numeric
-from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+from sqlalchemy import Column, String, Numeric, Integer, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 from app.db.base import Base
 from app.core.config import settings
+from app.core.ids import uuid7
+from app.models.sync import SyncTracked
 
 
-class LabTest(Base):
+class LabTest(SyncTracked, Base):
     __tablename__ = "lab_tests"
-    __table_args__ = {"schema": settings.DB_SCHEMA}
+    __table_args__ = (
+        Index("ix_lab_tests_sync", "change_txid", "change_seq"),
+        {"schema": settings.DB_SCHEMA},
+    )
 
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7, index=True)
     name = Column(String, nullable=False)
     description = Column(String, nullable=True)
     cost = Column(Numeric(10, 2), nullable=False)
     sample_required = Column(String, nullable=True)
+    # Analytes, units, types and allowed values of a report (see report/validation.py)
+    result_schema = Column(JSONB, nullable=True)
+    # Bumped on every schema change; compiled validators are cached per version
+    result_schema_version = Column(Integer, nullable=False, default=0, server_default="0")
+
+
+class ReferenceRange(Base):
+    """Reference interval of one analyte of a lab test, optionally per gender and age band.
+
+    The most specific matching row wins (gender and age bounds beat open ones);
+    bounds left NULL are not checked.
+    """
+    __tablename__ = "reference_ranges"
+    __table_args__ = (
+        Index("ix_reference_ranges_test_analyte", "test_id", "analyte"),
+        {"schema": settings.DB_SCHEMA},
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    test_id = Column(UUID(as_uuid=True), ForeignKey(f"{settings.DB_SCHEMA}.lab_tests.id", ondelete="CASCADE"), nullable=False)
+    analyte = Column(String(20), nullable=False)  # key in TestReport.result, e.g. "HGB"
+    gender = Column(String(1), nullable=True)  # "M" / "F", NULL for any
+    age_min = Column(Integer, nullable=True)  # years, inclusive
+    age_max = Column(Integer, nullable=True)  # years, exclusive
+    low = Column(Numeric(12, 4), nullable=True)
+    high = Column(Numeric(12, 4), nullable=True)
+    critical_low = Column(Numeric(12, 4), nullable=True)
+    critical_high = Column(Numeric(12, 4), nullable=True)
+    unit = Column(String(20), nullable=True)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
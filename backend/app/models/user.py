@@ -1,11 +1,11 @@
 # app/models/user.py
 
-import uuid
 from datetime import datetime
 from sqlalchemy import Column, String, Enum, DateTime, Text, Boolean
 from sqlalchemy.dialects.postgresql import UUID
 from app.db.base import Base
 from app.core.config import settings
+from app.core.ids import uuid7
 from enum import Enum as enum
 
 class UserRole(str, enum):
@@ -16,7 +16,7 @@ class User(Base):
     __tablename__ = "users"
     __table_args__ = {"schema": settings.DB_SCHEMA}
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     username = Column(String(50), unique=True, nullable=False, index=True)
     password_hash = Column(String(255), nullable=False)
     full_name = Column(String(100), nullable=False)
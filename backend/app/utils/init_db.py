@@ -2,6 +2,7 @@
 
 import asyncio
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.branches import branches, use_branch
 from app.db.session import get_db_context
 from app.models.user import User, UserRole
 from app.core.security import hash_password
@@ -43,7 +44,10 @@ async def init_database():
     logger.info("Initializing database...")
     
     try:
-        await create_default_admin()
+        # Every branch has its own users table
+        for branch in branches.values():
+            with use_branch(branch):
+                await create_default_admin()
         logger.info("Database initialization completed successfully")
     except Exception as e:
         logger.error(f"Database initialization failed: {str(e)}")
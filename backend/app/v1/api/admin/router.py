@@ -0,0 +1,74 @@
+# app/v1/api/admin/router.py
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+from typing import Any, Dict, List
+
+from app.core.auth import require_admin, create_profile_token
+from app.core.cache import invalidation_bus
+from app.core.config import settings
+from app.core.limiter import route_limiters
+from app.core.audit import audit_log
+from app.core.logs import log_metrics
+from app.middleware.profiling import profile_store
+from app.v1.api.order.accession import accession_allocator
+from app.v1.api.report.crud import validator_cache
+from app.models.user import User
+
+router = APIRouter(
+    prefix=f"{settings.API_V1_STR}/admin",
+    tags=["Admin"],
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {"description": "Unauthorized"},
+        status.HTTP_403_FORBIDDEN: {"description": "Forbidden"},
+    },
+)
+
+@router.get("/metrics/cache")
+async def get_cache_metrics(_: User = Depends(require_admin)) -> Dict[str, Any]:
+    """Invalidation bus counters, invalidation lag and per-cache hit rates for this worker"""
+    return {**invalidation_bus.metrics(), "result_validators": validator_cache.stats()}
+
+@router.get("/metrics/limiter")
+async def get_limiter_metrics(_: User = Depends(require_admin)) -> Dict[str, Any]:
+    """Adaptive concurrency limit, in-flight, queued and shed requests per route class for this worker"""
+    return {name: limiter.metrics() for name, limiter in route_limiters.items()}
+
+@router.get("/metrics/audit")
+async def get_audit_metrics(_: User = Depends(require_admin)) -> Dict[str, Any]:
+    """Write-behind audit log queue depth, flushed/spooled counts for this worker"""
+    return audit_log.metrics()
+
+@router.get("/metrics/logging")
+async def get_logging_metrics(_: User = Depends(require_admin)) -> Dict[str, Any]:
+    """Log records waiting for the writer, dropped on a full queue and suppressed as repeats, for this worker"""
+    return log_metrics()
+
+@router.get("/metrics/accession")
+async def get_accession_metrics(_: User = Depends(require_admin)) -> Dict[str, Any]:
+    """Accession number blocks reserved and numbers still held in memory by this worker"""
+    return accession_allocator.stats()
+
+@router.post("/profiles/token")
+async def create_profiling_token(admin: User = Depends(require_admin)) -> Dict[str, Any]:
+    """Issue a short-lived token; send it as X-Profile-Token (or ?__profile=) to profile a request"""
+    return {
+        "profile_token": create_profile_token({"sub": str(admin.id)}),
+        "header": "X-Profile-Token",
+        "expires_in": settings.PROFILING_TOKEN_EXPIRE_MINUTES * 60,
+    }
+
+@router.get("/profiles")
+async def list_profiles(_: User = Depends(require_admin)) -> List[Dict[str, Any]]:
+    """Stored request profiles of this worker, newest first"""
+    return profile_store.list()
+
+@router.get("/profiles/{profile_id}")
+async def download_profile(profile_id: str, _: User = Depends(require_admin)):
+    """Download a stored profile as an HTML report"""
+    path = profile_store.html_path(profile_id)
+    if not path:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    return FileResponse(path, media_type="text/html", filename=f"profile-{profile_id}.html")
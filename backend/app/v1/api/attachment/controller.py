@@ -0,0 +1,159 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, List, Mapping, Optional, Tuple
+from uuid import UUID
+from fastapi import HTTPException, Response, status
+import logging
+import re
+
+from app.core.audit import audit_log
+from app.core.config import settings
+from app.middleware.idempotency import MAX_KEY_LENGTH, scoped_key_hash
+from app.models.audit import AuditAction
+from .crud import AttachmentCRUD
+from .schema import AttachmentOut
+from .storage import AttachmentTooLarge, attachment_store, file_response
+
+logger = logging.getLogger(__name__)
+
+MEDIA_TYPE_PATTERN = re.compile(r"^[a-z0-9][a-z0-9!#$&^_.+-]{0,62}/[a-z0-9][a-z0-9!#$&^_.+-]{0,62}$")
+
+def _clean_filename(filename: str) -> str:
+    """The last path component, without control characters"""
+    name = filename.replace("\\", "/").rsplit("/", 1)[-1]
+    name = "".join(char for char in name if char.isprintable()).strip()
+    return name[:255] or "attachment"
+
+def _clean_media_type(content_type: Optional[str]) -> str:
+    media_type = (content_type or "").split(";", 1)[0].strip().lower()
+    return media_type if MEDIA_TYPE_PATTERN.match(media_type) else "application/octet-stream"
+
+class AttachmentController:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.crud = AttachmentCRUD(db)
+
+    async def upload(self, body: AsyncIterator[bytes], content_length: Optional[int], filename: str,
+                     content_type: Optional[str], order_id: Optional[UUID], report_id: Optional[UUID],
+                     actor_id: UUID, idempotency_key: Optional[str] = None) -> Tuple[AttachmentOut, bool]:
+        """Store an uploaded file and attach it to an order, or to a report (and its order).
+
+        Returns the attachment and whether it is an earlier upload with the
+        same Idempotency-Key, returned again instead of stored twice.
+        """
+        # Everything that can be refused is checked before a byte of the body is read
+        key_hash = None
+        if idempotency_key is not None:
+            if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid Idempotency-Key header")
+            key_hash = scoped_key_hash(str(actor_id), idempotency_key.encode("latin-1"))
+        filename = _clean_filename(filename)
+        if report_id is not None:
+            report_order_id = await self.crud.get_report_order_id(report_id)
+            if report_order_id is None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report not found")
+            if order_id is not None and order_id != report_order_id:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Report does not belong to this order"
+                )
+            order_id = report_order_id
+        elif order_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Give an order_id or a report_id"
+            )
+        elif not await self.crud.order_exists(order_id):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+        if content_length is not None and content_length > settings.ATTACHMENT_MAX_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Attachments are limited to {settings.ATTACHMENT_MAX_BYTES} bytes"
+            )
+        # Hand the connection back to the pool while the body streams in
+        await self.db.commit()
+
+        try:
+            sha256, size, temp = await attachment_store.receive(body, settings.ATTACHMENT_MAX_BYTES)
+        except AttachmentTooLarge as e:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+        try:
+            if size == 0:
+                raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="The upload is empty")
+            if key_hash is not None:
+                earlier = await self._earlier_upload(key_hash, sha256, order_id, report_id, filename)
+                if earlier is not None:
+                    return earlier, True
+            # Link first: from then on a concurrent purge cannot remove this content
+            await self.crud.link_blob(sha256, size)
+            stored = await attachment_store.commit(temp, sha256)
+        finally:
+            await attachment_store.discard(temp)
+
+        attachment = await self.crud.create_attachment(
+            order_id, report_id, sha256, filename, _clean_media_type(content_type), actor_id, key_hash
+        )
+        if attachment is None:
+            # A concurrent upload with the same key was stored first
+            return await self._earlier_upload(key_hash, sha256, order_id, report_id, filename), True
+        audit_log.record(
+            AuditAction.CREATE, "attachment", attachment.id, actor_id,
+            {"order_id": order_id, "report_id": report_id, "sha256": sha256, "size": size}, session=self.db
+        )
+        return AttachmentOut(
+            id=attachment.id, order_id=attachment.order_id, report_id=attachment.report_id,
+            filename=attachment.filename, media_type=attachment.media_type, sha256=sha256, size=size,
+            uploaded_by=attachment.uploaded_by, created_at=attachment.created_at, deduplicated=not stored
+        ), False
+
+    async def _earlier_upload(self, key_hash: str, sha256: str, order_id: UUID, report_id: Optional[UUID],
+                              filename: str) -> Optional[AttachmentOut]:
+        """The attachment stored under this key, provided it is the same upload"""
+        row = await self.crud.get_attachment_by_key(key_hash)
+        if row is None:
+            return None
+        if (row.sha256, row.order_id, row.report_id, row.filename) != (sha256, order_id, report_id, filename):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used for a different request"
+            )
+        return AttachmentOut.model_validate(row)
+
+    async def get_attachments(self, order_id: Optional[UUID], report_id: Optional[UUID],
+                              actor_id: UUID) -> List[AttachmentOut]:
+        if order_id is None and report_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Give an order_id or a report_id"
+            )
+        rows = await self.crud.get_attachments(order_id, report_id)
+        audit_log.record(
+            AuditAction.READ, "attachment", actor_id=actor_id, details={"order_id": order_id, "report_id": report_id},
+            session=self.db,
+        )
+        return [AttachmentOut.model_validate(row) for row in rows]
+
+    async def download(self, attachment_id: UUID, request_headers: Mapping[str, str], inline: bool,
+                       actor_id: UUID) -> Response:
+        row = await self.crud.get_attachment(attachment_id)
+        if row is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Attachment not found")
+        if not settings.ATTACHMENT_ACCEL_REDIRECT_PREFIX and not attachment_store.path(row.sha256).is_file():
+            logger.error(f"Content {row.sha256} of attachment {attachment_id} is missing from the store")
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Attachment content is missing")
+        # Patient documents: every read is audited, ranges of one download included
+        audit_log.record(
+            AuditAction.READ, "attachment", attachment_id, actor_id, {"range": request_headers.get("range")},
+            session=self.db,
+        )
+        # The file is sent after this returns; do not hold a connection meanwhile
+        await self.db.commit()
+        return file_response(
+            attachment_store, row.sha256, row.size, row.media_type, row.filename, request_headers, inline
+        )
+
+    async def delete_attachment(self, attachment_id: UUID, actor_id: UUID) -> None:
+        """Unlink the attachment; its content is purged later if nothing else uses it"""
+        if not await self.crud.delete_attachment(attachment_id):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Attachment not found")
+        audit_log.record(AuditAction.DELETE, "attachment", attachment_id, actor_id, session=self.db)
+
+def get_attachment_controller(db: AsyncSession) -> AttachmentController:
+    """Get AttachmentController instance"""
+    return AttachmentController(db)
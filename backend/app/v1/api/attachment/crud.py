@@ -0,0 +1,115 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, exists, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Row
+from datetime import datetime
+from typing import List, Optional
+from uuid import UUID
+
+from app.models.attachment import Attachment, AttachmentBlob
+from app.models.order import Order, OrderTest
+from app.models.report import TestReport
+
+ATTACHMENT_COLUMNS = (
+    Attachment.id, Attachment.order_id, Attachment.report_id, Attachment.filename, Attachment.media_type,
+    Attachment.blob_sha256.label("sha256"), AttachmentBlob.size, Attachment.uploaded_by, Attachment.created_at,
+)
+
+class AttachmentCRUD:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def order_exists(self, order_id: UUID) -> bool:
+        result = await self.db.execute(select(exists().where(Order.id == order_id)))
+        return result.scalar_one()
+
+    async def get_report_order_id(self, report_id: UUID) -> Optional[UUID]:
+        result = await self.db.execute(
+            select(OrderTest.order_id)
+            .join(TestReport, TestReport.order_test_id == OrderTest.id)
+            .where(TestReport.id == report_id)
+        )
+        return result.scalar_one_or_none()
+
+    async def link_blob(self, sha256: str, size: int) -> None:
+        """Record (or re-date) stored content before its file is moved into place.
+
+        The upsert waits for a purge that has the row locked, and re-dating
+        it keeps a later purge away, so content is never purged while an
+        upload is linking it.
+        """
+        now = datetime.utcnow()
+        await self.db.execute(
+            insert(AttachmentBlob)
+            .values(sha256=sha256, size=size, created_at=now, linked_at=now)
+            .on_conflict_do_update(index_elements=[AttachmentBlob.sha256], set_={"linked_at": now})
+        )
+
+    async def create_attachment(self, order_id: UUID, report_id: Optional[UUID], sha256: str, filename: str,
+                                media_type: str, uploaded_by: UUID,
+                                idempotency_key: Optional[str] = None) -> Optional[Attachment]:
+        """Insert an attachment; None if another upload already holds `idempotency_key`"""
+        result = await self.db.scalars(
+            insert(Attachment)
+            .values(
+                order_id=order_id, report_id=report_id, blob_sha256=sha256, filename=filename,
+                media_type=media_type, uploaded_by=uploaded_by, idempotency_key=idempotency_key,
+            )
+            .on_conflict_do_nothing(
+                index_elements=[Attachment.idempotency_key], index_where=Attachment.idempotency_key.isnot(None)
+            )
+            .returning(Attachment)
+        )
+        return result.one_or_none()
+
+    async def get_attachment_by_key(self, idempotency_key: str) -> Optional[Row]:
+        result = await self.db.execute(
+            select(*ATTACHMENT_COLUMNS)
+            .join(AttachmentBlob, AttachmentBlob.sha256 == Attachment.blob_sha256)
+            .where(Attachment.idempotency_key == idempotency_key)
+        )
+        return result.one_or_none()
+
+    async def get_attachment(self, attachment_id: UUID) -> Optional[Row]:
+        result = await self.db.execute(
+            select(*ATTACHMENT_COLUMNS)
+            .join(AttachmentBlob, AttachmentBlob.sha256 == Attachment.blob_sha256)
+            .where(Attachment.id == attachment_id)
+        )
+        return result.one_or_none()
+
+    async def get_attachments(self, order_id: Optional[UUID], report_id: Optional[UUID]) -> List[Row]:
+        query = select(*ATTACHMENT_COLUMNS).join(AttachmentBlob, AttachmentBlob.sha256 == Attachment.blob_sha256)
+        if order_id is not None:
+            query = query.where(Attachment.order_id == order_id)
+        if report_id is not None:
+            query = query.where(Attachment.report_id == report_id)
+        result = await self.db.execute(query.order_by(Attachment.id))
+        return list(result.all())
+
+    async def delete_attachment(self, attachment_id: UUID) -> bool:
+        result = await self.db.execute(delete(Attachment).where(Attachment.id == attachment_id))
+        return result.rowcount > 0
+
+    async def delete_unreferenced_blobs(self, linked_before: datetime, limit: int) -> List[str]:
+        """Delete up to `limit` blobs no attachment uses any more; returns their hashes.
+
+        The rows stay locked until commit, so delete their files first.
+        """
+        candidates = (
+            select(AttachmentBlob.sha256)
+            .where(
+                AttachmentBlob.linked_at < linked_before,
+                ~exists().where(Attachment.blob_sha256 == AttachmentBlob.sha256),
+            )
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await self.db.execute(
+            delete(AttachmentBlob).where(AttachmentBlob.sha256.in_(candidates)).returning(AttachmentBlob.sha256)
+        )
+        return list(result.scalars().all())
+
+def get_attachment_crud(db: AsyncSession) -> AttachmentCRUD:
+    """Get AttachmentCRUD instance"""
+    return AttachmentCRUD(db)
@@ -0,0 +1,87 @@
+# app/v1/api/attachment/router.py
+from fastapi import APIRouter, Depends, Header, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from uuid import UUID
+
+from .schema import AttachmentOut
+from .controller import get_attachment_controller
+from app.core.auth import require_admin, require_any_role
+from app.db.session import get_db
+from app.core.config import settings
+from app.models.user import User
+
+router = APIRouter(prefix=f"{settings.API_V1_STR}/attachments", tags=["Attachments"])
+
+@router.post(
+    "",
+    response_model=AttachmentOut,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra={"requestBody": {
+        "required": True,
+        "content": {"application/octet-stream": {"schema": {"type": "string", "format": "binary"}}},
+    }},
+)
+async def upload_attachment(
+    request: Request,
+    response: Response,
+    filename: str = Query(..., min_length=1, max_length=255),
+    order_id: Optional[UUID] = Query(None),
+    report_id: Optional[UUID] = Query(None),
+    content_length: Optional[int] = Header(None),
+    idempotency_key: Optional[str] = Header(None),
+    current_user: User = Depends(require_any_role),
+    db: AsyncSession = Depends(get_db)
+):
+    """Attach a file to an order, or to a report.
+
+    Send the file itself as the request body (not multipart form data), with
+    its media type as Content-Type. It is streamed to disk while being hashed;
+    content already stored is kept once. A retry with the same Idempotency-Key
+    returns the attachment stored the first time.
+    """
+    controller = get_attachment_controller(db)
+    attachment, replayed = await controller.upload(
+        request.stream(), content_length, filename, request.headers.get("content-type"),
+        order_id, report_id, current_user.id, idempotency_key
+    )
+    if replayed:
+        response.headers["idempotent-replayed"] = "true"
+    return attachment
+
+@router.get("", response_model=List[AttachmentOut])
+async def get_attachments(
+    order_id: Optional[UUID] = Query(None),
+    report_id: Optional[UUID] = Query(None),
+    current_user: User = Depends(require_any_role),
+    db: AsyncSession = Depends(get_db)
+):
+    """Attachments of an order (its reports' included) or of a report"""
+    controller = get_attachment_controller(db)
+    return await controller.get_attachments(order_id, report_id, current_user.id)
+
+@router.get("/{attachment_id}")
+async def download_attachment(
+    attachment_id: UUID,
+    request: Request,
+    inline: bool = Query(False),
+    current_user: User = Depends(require_any_role),
+    db: AsyncSession = Depends(get_db)
+):
+    """The file, or the single byte range asked for with Range (206).
+
+    ETag is the content's SHA-256, so If-None-Match and If-Range work across
+    attachments of the same file. With inline=true, images, PDFs and plain
+    text are shown in the browser instead of downloaded.
+    """
+    controller = get_attachment_controller(db)
+    return await controller.download(attachment_id, request.headers, inline, current_user.id)
+
+@router.delete("/{attachment_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_attachment(
+    attachment_id: UUID,
+    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    controller = get_attachment_controller(db)
+    await controller.delete_attachment(attachment_id, current_user.id)
@@ -0,0 +1,20 @@
+from pydantic import BaseModel, ConfigDict
+from uuid import UUID
+from datetime import datetime
+from typing import Optional
+
+# ----- Output Schemas -----
+
+class AttachmentOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    order_id: UUID
+    report_id: Optional[UUID] = None
+    filename: str
+    media_type: str
+    sha256: str
+    size: int
+    uploaded_by: Optional[UUID] = None
+    created_at: datetime
+    deduplicated: bool = False  # the same content was already stored; no new file was written
@@ -0,0 +1,222 @@
+"""Content-addressed attachment files on local disk.
+
+A file is stored once per distinct content, at
+ATTACHMENTS_DIR/<branch>/<sha[0:2]>/<sha[2:4]>/<sha>, so no directory grows
+past a few hundred entries and an analyzer printout uploaded for every order
+of a batch takes its space once. Uploads are streamed: each chunk is hashed
+and appended to a temporary file next to the store, then the file is renamed
+into place (or dropped when that content is already stored). Downloads are
+read back in ATTACHMENT_CHUNK_SIZE pieces, handed to the server in one
+zero-copy send where it supports the ASGI zerocopysend extension, or left to
+nginx entirely with ATTACHMENT_ACCEL_REDIRECT_PREFIX. Memory use per transfer
+is bounded by the chunk size whatever the file size.
+
+Disk I/O and hashing run in worker threads (hashlib releases the GIL on
+large buffers), never on the event loop.
+"""
+
+import hashlib
+import os
+import re
+import uuid
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Mapping, Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from fastapi import Response
+from starlette.types import Receive, Scope, Send
+
+from app.core.config import settings
+from app.db.branches import current_branch
+
+# Single byte range: "bytes=first-last", "bytes=first-" or "bytes=-suffix_length"
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+# Shown in the browser rather than downloaded when asked for; anything else could run script in our origin
+INLINE_MEDIA_TYPES = ("image/png", "image/jpeg", "image/gif", "image/tiff", "application/pdf", "text/plain")
+
+class AttachmentTooLarge(Exception):
+    pass
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+class AttachmentStore:
+    def __init__(self, root: str, chunk_size: int):
+        self.root = Path(root)
+        self.chunk_size = chunk_size
+
+    def relative_path(self, sha256: str) -> str:
+        return f"{current_branch().name}/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+    def path(self, sha256: str) -> Path:
+        return self.root / self.relative_path(sha256)
+
+    async def receive(self, chunks: AsyncIterator[bytes], max_bytes: int) -> Tuple[str, int, Path]:
+        """Stream an upload to a temporary file; returns (sha256, size, temporary path).
+
+        Chunks are gathered up to the chunk size, so each thread hop hashes
+        and writes a sizeable buffer. The temporary file is removed if the
+        upload fails or exceeds `max_bytes`.
+        """
+        temp_dir = self.root / "tmp"
+        await anyio.to_thread.run_sync(lambda: temp_dir.mkdir(parents=True, exist_ok=True))
+        temp = temp_dir / uuid.uuid4().hex
+        digest = hashlib.sha256()
+        size = 0
+        buffer = bytearray()
+
+        def write(file: BinaryIO, data: bytes) -> None:
+            digest.update(data)
+            file.write(data)
+
+        file = await anyio.to_thread.run_sync(open, temp, "xb")
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise AttachmentTooLarge(f"Attachments are limited to {max_bytes} bytes")
+                buffer += chunk
+                if len(buffer) >= self.chunk_size:
+                    await anyio.to_thread.run_sync(write, file, bytes(buffer))
+                    buffer.clear()
+            if buffer:
+                await anyio.to_thread.run_sync(write, file, bytes(buffer))
+            # Durable before the rename makes it visible under its hash
+            await anyio.to_thread.run_sync(lambda: (file.flush(), os.fsync(file.fileno())))
+        except BaseException:
+            await anyio.to_thread.run_sync(file.close)
+            await self.discard(temp)
+            raise
+        await anyio.to_thread.run_sync(file.close)
+        return digest.hexdigest(), size, temp
+
+    async def commit(self, temp: Path, sha256: str) -> bool:
+        """Move an upload into place; False if the content was already stored (the upload is dropped)"""
+        def move() -> bool:
+            target = self.path(sha256)
+            if target.exists():
+                temp.unlink(missing_ok=True)
+                return False
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(temp, target)
+            return True
+        return await anyio.to_thread.run_sync(move)
+
+    async def discard(self, temp: Path) -> None:
+        await anyio.to_thread.run_sync(lambda: temp.unlink(missing_ok=True))
+
+    async def remove(self, sha256: str) -> None:
+        await anyio.to_thread.run_sync(lambda: self.path(sha256).unlink(missing_ok=True))
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """(first, last) byte of a single-range request; None to send the whole file.
+
+    Multiple and malformed ranges are ignored, which RFC 9110 allows.
+    """
+    if not header:
+        return None
+    match = RANGE_PATTERN.match(header.strip())
+    if match is None or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.group(1), match.group(2)
+    if first == "":
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise RangeNotSatisfiable()
+    return start, end
+
+def content_disposition(filename: str, inline: bool) -> str:
+    fallback = filename.encode("ascii", "replace").decode("ascii").replace('"', "'")
+    return f"{'inline' if inline else 'attachment'}; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename)}"
+
+class FileRangeResponse(Response):
+    """`length` bytes of a file from `offset`, sent without loading the file into memory"""
+
+    def __init__(self, path: Path, offset: int, length: int, chunk_size: int, status_code: int,
+                 headers: Mapping[str, str], media_type: str):
+        super().__init__(status_code=status_code, headers=headers, media_type=media_type)
+        self.path = path
+        self.offset = offset
+        self.length = length
+        self.chunk_size = chunk_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"] == "HEAD" or self.length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        if "http.response.zerocopysend" in scope.get("extensions", {}):
+            # The server sends straight from the page cache (sendfile)
+            file = await anyio.to_thread.run_sync(open, self.path, "rb")
+            try:
+                await send({
+                    "type": "http.response.zerocopysend", "file": file,
+                    "offset": self.offset, "count": self.length, "more_body": False,
+                })
+            finally:
+                await anyio.to_thread.run_sync(file.close)
+            return
+
+        async with await anyio.open_file(self.path, "rb") as file:
+            await file.seek(self.offset)
+            remaining = self.length
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break  # truncated on disk; the client sees a short body
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+def file_response(store: AttachmentStore, sha256: str, size: int, media_type: str, filename: str,
+                  request_headers: Mapping[str, str], inline: bool = False) -> Response:
+    """Full, partial (Range) or not-modified response for a stored file"""
+    etag = f'"{sha256}"'  # content-addressed: a strong validator for free
+    inline = inline and media_type in INLINE_MEDIA_TYPES
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        # Patient data: browsers may keep it, shared caches may not; no-transform keeps compression off ranges
+        "Cache-Control": "private, max-age=86400, no-transform",
+        "Content-Disposition": content_disposition(filename, inline),
+        "X-Content-Type-Options": "nosniff",
+    }
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]):
+        return Response(status_code=304, headers=headers)
+
+    if settings.ATTACHMENT_ACCEL_REDIRECT_PREFIX:
+        # nginx answers ranges and conditionals itself and sends the file with sendfile
+        headers["X-Accel-Redirect"] = settings.ATTACHMENT_ACCEL_REDIRECT_PREFIX + store.relative_path(sha256)
+        return Response(headers=headers, media_type=media_type)
+
+    byte_range = None
+    if_range = request_headers.get("if-range")
+    if if_range is None or if_range.strip() == etag:
+        try:
+            byte_range = parse_range(request_headers.get("range"), size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    if byte_range is None:
+        return FileRangeResponse(
+            store.path(sha256), 0, size, store.chunk_size, 200,
+            {**headers, "Content-Length": str(size)}, media_type
+        )
+    first, last = byte_range
+    return FileRangeResponse(
+        store.path(sha256), first, last - first + 1, store.chunk_size, 206,
+        {**headers, "Content-Length": str(last - first + 1), "Content-Range": f"bytes {first}-{last}/{size}"},
+        media_type
+    )
+
+attachment_store = AttachmentStore(settings.ATTACHMENTS_DIR, settings.ATTACHMENT_CHUNK_SIZE)
@@ -0,0 +1,112 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from uuid import UUID
+from decimal import Decimal
+from datetime import datetime
+from fastapi import HTTPException, Response, status
+
+from app.models.billing import PaymentStatus
+from app.models.audit import AuditAction
+from app.core.audit import audit_log
+from .crud import BillingCRUD, PAYMENT_ROWS
+from .schema import (
+    PaymentCreate, PaymentOut, PaymentReceipt, BillingBalanceOut,
+    CashClosingLine, CashClosingReport
+)
+
+def derive_status(net_amount: Decimal, paid_amount: Decimal) -> PaymentStatus:
+    if paid_amount >= net_amount:
+        return PaymentStatus.PAID
+    if paid_amount > 0:
+        return PaymentStatus.PARTIAL
+    return PaymentStatus.UNPAID
+
+class BillingController:
+    """Business logic layer for billing operations"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.crud = BillingCRUD(db)
+
+    async def get_balance(self, billing_id: UUID) -> BillingBalanceOut:
+        balances = await self.crud.get_balances([billing_id])
+        if billing_id not in balances:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Billing not found")
+        net_amount, paid_amount = balances[billing_id]
+        return BillingBalanceOut(
+            billing_id=billing_id,
+            net_amount=net_amount,
+            paid_amount=paid_amount,
+            due_amount=max(net_amount - paid_amount, Decimal("0")),
+            payment_status=derive_status(net_amount, paid_amount),
+        )
+
+    async def record_payment(self, billing_id: UUID, payment_in: PaymentCreate, received_by: UUID) -> PaymentReceipt:
+        """Append a payment after checking it against the balance due.
+
+        Payments of the same billing are serialized (the billing row is locked
+        until commit); payments of different billings run concurrently.
+        """
+        if payment_in.amount == 0:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Payment amount must not be zero")
+
+        # Two counters settling the same bill at once would both pass a check made on a
+        # snapshot; with the billing locked, the second one sees the first one's payment
+        if not await self.crud.lock_billing(billing_id):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Billing not found")
+        balance = await self.get_balance(billing_id)
+        if payment_in.amount > balance.due_amount:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Payment exceeds the amount due ({balance.due_amount})"
+            )
+        if -payment_in.amount > balance.paid_amount:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Refund exceeds the amount paid ({balance.paid_amount})"
+            )
+
+        payment = await self.crud.add_payment(
+            billing_id, payment_in.amount, payment_in.method, payment_in.counter, received_by
+        )
+        audit_log.record(
+            AuditAction.CREATE, "payment", payment.id, received_by,
+            {"billing_id": billing_id, "amount": payment.amount, "method": payment.method.value}, session=self.db
+        )
+
+        paid_amount = balance.paid_amount + payment.amount
+        return PaymentReceipt(
+            payment=PaymentOut(
+                id=payment.id,
+                billing_id=billing_id,
+                amount=payment.amount,
+                method=payment.method,
+                counter=payment.counter,
+                received_by=payment.received_by,
+                received_at=payment.received_at,
+                running_total=paid_amount,
+            ),
+            balance=BillingBalanceOut(
+                billing_id=billing_id,
+                net_amount=balance.net_amount,
+                paid_amount=paid_amount,
+                due_amount=max(balance.net_amount - paid_amount, Decimal("0")),
+                payment_status=derive_status(balance.net_amount, paid_amount),
+            ),
+        )
+
+    async def get_payments(self, billing_id: UUID) -> Response:
+        """The ledger serialized straight from column rows, in PaymentOut's shape"""
+        return PAYMENT_ROWS.response(await self.crud.get_payments(billing_id))
+
+    async def get_cash_closing(self, start: datetime, end: datetime) -> CashClosingReport:
+        if end <= start:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="end must be after start")
+        lines = [
+            CashClosingLine(method=method, payments=count, total=total)
+            for method, count, total in await self.crud.get_cash_closing(start, end)
+        ]
+        return CashClosingReport(start=start, end=end, lines=lines, total=sum((line.total for line in lines), Decimal("0")))
+
+def get_billing_controller(db: AsyncSession) -> BillingController:
+    """Get BillingController instance"""
+    return BillingController(db)
@@ -0,0 +1,160 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, func, literal, DateTime
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Row
+from typing import Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+from decimal import Decimal
+from datetime import datetime
+
+from app.db.rows import RowMapper
+from app.models.billing import Billing, Payment, BillingBalance, PaymentRollupState, PaymentMethod
+
+ROLLUP_STATE_ID = 1
+
+LEDGER_ORDER = (Payment.received_at, Payment.created_txid, Payment.id)
+# Columns of PaymentOut, for the ledger listing without ORM hydration
+PAYMENT_ROWS = RowMapper(
+    Payment.id, Payment.billing_id, Payment.amount, Payment.method, Payment.counter, Payment.received_by,
+    Payment.received_at,
+    func.sum(Payment.amount).over(partition_by=Payment.billing_id, order_by=LEDGER_ORDER).label("running_total"),
+)
+
+class BillingCRUD:
+    """Billing reads and the payment ledger.
+
+    Payments are plain INSERTs, but those of the same billing are serialized
+    by lock_billing, so the balance each one is checked against is current.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def lock_billing(self, billing_id: UUID) -> bool:
+        """Lock the billing row until the transaction ends; False if there is no such billing.
+
+        Serializes payments of one billing, so each sees the previous one's
+        ledger row when it checks the balance. Other billings are not blocked.
+        FOR NO KEY UPDATE leaves the key-share lock that foreign-key inserts
+        (payments, billing_balances) take on the row uncontended.
+        """
+        result = await self.db.execute(
+            select(Billing.id).where(Billing.id == billing_id).with_for_update(key_share=True)
+        )
+        return result.scalar_one_or_none() is not None
+
+    async def add_payment(self, billing_id: UUID, amount: Decimal, method: PaymentMethod,
+                          counter: Optional[str], received_by: Optional[UUID]) -> Payment:
+        """Append a payment to the ledger (a plain INSERT)"""
+        payment = Payment(
+            billing_id=billing_id,
+            amount=amount,
+            method=method,
+            counter=counter,
+            received_by=received_by,
+            received_at=datetime.utcnow(),
+        )
+        self.db.add(payment)
+        await self.db.flush()
+        return payment
+
+    async def get_balances(self, billing_ids: Sequence[UUID]) -> Dict[UUID, Tuple[Decimal, Decimal]]:
+        """billing id -> (net amount, paid amount): rolled-up total plus the ledger tail"""
+        watermark = (
+            select(PaymentRollupState.rolled_up_txid)
+            .where(PaymentRollupState.id == ROLLUP_STATE_ID)
+            .scalar_subquery()
+        )
+        tail = (
+            select(Payment.billing_id, func.sum(Payment.amount).label("amount"))
+            .where(Payment.billing_id.in_(billing_ids), Payment.created_txid >= func.coalesce(watermark, 0))
+            .group_by(Payment.billing_id)
+            .subquery()
+        )
+        result = await self.db.execute(
+            select(
+                Billing.id,
+                Billing.net_amount,
+                func.coalesce(BillingBalance.paid_total, 0) + func.coalesce(tail.c.amount, 0),
+            )
+            .outerjoin(BillingBalance, BillingBalance.billing_id == Billing.id)
+            .outerjoin(tail, tail.c.billing_id == Billing.id)
+            .where(Billing.id.in_(billing_ids))
+        )
+        return {billing_id: (net, paid) for billing_id, net, paid in result.all()}
+
+    async def get_payments(self, billing_id: UUID) -> List[Row]:
+        """Ledger of one billing in order as PAYMENT_ROWS rows, with the running total after each payment"""
+        result = await self.db.execute(
+            PAYMENT_ROWS.select()
+            .where(Payment.billing_id == billing_id)
+            .order_by(*LEDGER_ORDER)
+        )
+        return list(result.all())
+
+    async def get_cash_closing(self, start: datetime, end: datetime) -> List[Tuple[PaymentMethod, int, Decimal]]:
+        """Payment count and total per method received in [start, end)"""
+        result = await self.db.execute(
+            select(Payment.method, func.count(), func.sum(Payment.amount))
+            .where(Payment.received_at >= start, Payment.received_at < end)
+            .group_by(Payment.method)
+            .order_by(Payment.method)
+        )
+        return [(method, count, total) for method, count, total in result.all()]
+
+    async def rollup_balances(self) -> int:
+        """Fold finished ledger rows into billing_balances; returns the number of billings touched.
+
+        Only payments of transactions older than the oldest one still running
+        are folded in, so a payment committing late can never fall behind the
+        watermark and be skipped.
+        """
+        await self.db.execute(
+            insert(PaymentRollupState)
+            .values(id=ROLLUP_STATE_ID, rolled_up_txid=0)
+            .on_conflict_do_nothing(index_elements=[PaymentRollupState.id])
+        )
+        previous = (await self.db.execute(
+            select(PaymentRollupState.rolled_up_txid)
+            .where(PaymentRollupState.id == ROLLUP_STATE_ID)
+            .with_for_update()
+        )).scalar_one()
+        horizon = (await self.db.execute(
+            select(func.txid_snapshot_xmin(func.txid_current_snapshot()))
+        )).scalar_one()
+        if horizon <= previous:
+            return 0
+
+        now = datetime.utcnow()
+        tail = (
+            select(
+                Payment.billing_id,
+                func.sum(Payment.amount),
+                func.count(),
+                literal(now, DateTime),
+            )
+            .where(Payment.created_txid >= previous, Payment.created_txid < horizon)
+            .group_by(Payment.billing_id)
+        )
+        statement = insert(BillingBalance).from_select(
+            ["billing_id", "paid_total", "payment_count", "updated_at"], tail
+        )
+        result = await self.db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[BillingBalance.billing_id],
+                set_={
+                    "paid_total": BillingBalance.paid_total + statement.excluded.paid_total,
+                    "payment_count": BillingBalance.payment_count + statement.excluded.payment_count,
+                    "updated_at": statement.excluded.updated_at,
+                },
+            )
+        )
+        await self.db.execute(
+            update(PaymentRollupState)
+            .where(PaymentRollupState.id == ROLLUP_STATE_ID)
+            .values(rolled_up_txid=horizon, updated_at=now)
+        )
+        return result.rowcount
+
+def get_billing_crud(db: AsyncSession) -> BillingCRUD:
+    return BillingCRUD(db)
@@ -0,0 +1,57 @@
+# app/v1/api/billing/router.py
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+from uuid import UUID
+from datetime import datetime
+
+from .schema import PaymentCreate, PaymentOut, PaymentReceipt, BillingBalanceOut, CashClosingReport
+from .controller import get_billing_controller
+from app.core.auth import require_any_role
+from app.db.session import get_db
+from app.core.config import settings
+from app.models.user import User
+
+router = APIRouter(prefix=f"{settings.API_V1_STR}/billings", tags=["Billing"])
+
+@router.get("/cash-closing", response_model=CashClosingReport)
+async def get_cash_closing(
+    start: datetime = Query(..., description="Inclusive, UTC"),
+    end: datetime = Query(..., description="Exclusive, UTC"),
+    _: User = Depends(require_any_role),
+    db: AsyncSession = Depends(get_db)
+):
+    """Payments received in a time range, totalled per payment method"""
+    controller = get_billing_controller(db)
+    return await controller.get_cash_closing(start, end)
+
+@router.get("/{billing_id}/balance", response_model=BillingBalanceOut)
+async def get_balance(
+    billing_id: UUID,
+    _: User = Depends(require_any_role),
+    db: AsyncSession = Depends(get_db)
+):
+    """Paid and due amounts of a billing, derived from the payments ledger"""
+    controller = get_billing_controller(db)
+    return await controller.get_balance(billing_id)
+
+@router.get("/{billing_id}/payments", response_model=List[PaymentOut])
+async def get_payments(
+    billing_id: UUID,
+    _: User = Depends(require_any_role),
+    db: AsyncSession = Depends(get_db)
+):
+    """Payments of a billing with the running total after each"""
+    controller = get_billing_controller(db)
+    return await controller.get_payments(billing_id)
+
+@router.post("/{billing_id}/payments", response_model=PaymentReceipt, status_code=status.HTTP_201_CREATED)
+async def record_payment(
+    billing_id: UUID,
+    payment_in: PaymentCreate,
+    current_user: User = Depends(require_any_role),
+    db: AsyncSession = Depends(get_db)
+):
+    """Append a payment (or a refund, with a negative amount) to the ledger"""
+    controller = get_billing_controller(db)
+    return await controller.record_payment(billing_id, payment_in, current_user.id)
@@ -0,0 +1,49 @@
+from pydantic import BaseModel, Field
+from uuid import UUID
+from decimal import Decimal
+from datetime import datetime
+from typing import List, Optional
+
+from app.models.billing import PaymentMethod, PaymentStatus
+
+# ----- Input Schemas -----
+
+class PaymentCreate(BaseModel):
+    # Negative amounts record a refund
+    amount: Decimal = Field(..., max_digits=10, decimal_places=2)
+    method: PaymentMethod
+    counter: Optional[str] = Field(None, max_length=50)
+
+# ----- Output Schemas -----
+
+class BillingBalanceOut(BaseModel):
+    billing_id: UUID
+    net_amount: Decimal
+    paid_amount: Decimal
+    due_amount: Decimal
+    payment_status: PaymentStatus
+
+class PaymentOut(BaseModel):
+    id: UUID
+    billing_id: UUID
+    amount: Decimal
+    method: PaymentMethod
+    counter: Optional[str] = None
+    received_by: Optional[UUID] = None
+    received_at: datetime
+    running_total: Optional[Decimal] = None
+
+class PaymentReceipt(BaseModel):
+    payment: PaymentOut
+    balance: BillingBalanceOut
+
+class CashClosingLine(BaseModel):
+    method: PaymentMethod
+    payments: int
+    total: Decimal
+
+class CashClosingReport(BaseModel):
+    start: datetime
+    end: datetime
+    lines: List[CashClosingLine]
+    total: Decimal
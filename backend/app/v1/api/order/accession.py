@@ -0,0 +1,88 @@
+"""Accession numbers: short per-day sample tube labels such as 240617-000123.
+
+Numbers are allocated HiLo style. Each worker process reserves a block of
+ACCESSION_BLOCK_SIZE numbers per day with one upsert on the day's
+accession_counters row, committed in its own short transaction so the row
+lock is never held by a request, and then hands numbers out from memory.
+Only one collection in every ACCESSION_BLOCK_SIZE touches the counter row.
+
+Numbers are unique per branch and increasing within a worker, but not
+gap-free and not in collection order across workers. A number is skipped when:
+
+  - the worker stops or the day ends before using up its block: at most
+    ACCESSION_BLOCK_SIZE - 1 numbers per worker per day;
+  - the transaction that took it rolls back.
+
+The sequence part is zero-padded to six digits and simply grows wider past
+999999 numbers in one day.
+"""
+
+import asyncio
+from datetime import date
+from typing import Dict, List, Tuple
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.branches import current_branch, current_schema
+from app.db.session import get_db_context
+
+def format_accession(day: date, number: int) -> str:
+    return f"{day:%y%m%d}-{number:06d}"
+
+class AccessionAllocator:
+    """In-memory blocks of accession numbers, keyed by (branch, day)"""
+
+    def __init__(self, block_size: int):
+        self.block_size = block_size
+        self._blocks: Dict[Tuple[str, date], List[int]] = {}  # -> [next, end)
+        self._lock = asyncio.Lock()
+        self.reservations = 0
+
+    async def _reserve(self, day: date, size: int) -> int:
+        """Reserve `size` numbers for `day` in the current branch; returns the end of the block"""
+        async with get_db_context() as db:
+            result = await db.execute(
+                text(f"""
+                    INSERT INTO "{current_schema()}".accession_counters AS counter (day, next_value)
+                    VALUES (:day, 1 + :size)
+                    ON CONFLICT (day) DO UPDATE SET next_value = counter.next_value + :size
+                    RETURNING next_value
+                """),
+                {"day": day, "size": size},
+            )
+            end = result.scalar_one()
+        self.reservations += 1
+        return end
+
+    async def allocate(self, day: date, count: int) -> List[str]:
+        """`count` accession numbers for samples collected on `day`"""
+        key = (current_branch().name, day)
+        numbers: List[int] = []
+        async with self._lock:
+            while len(numbers) < count:
+                block = self._blocks.get(key)
+                if block is None or block[0] >= block[1]:
+                    # A batch larger than a block reserves what it needs in one go
+                    size = max(self.block_size, count - len(numbers))
+                    end = await self._reserve(day, size)
+                    block = self._blocks[key] = [end - size, end]
+                take = min(block[1] - block[0], count - len(numbers))
+                numbers.extend(range(block[0], block[0] + take))
+                block[0] += take
+            # Blocks of earlier days will not be used again
+            for stale in [other for other in self._blocks if other[0] == key[0] and other[1] < day]:
+                del self._blocks[stale]
+        return [format_accession(day, number) for number in numbers]
+
+    def discard(self) -> None:
+        """Forget reserved blocks, after the counters were reset underneath them"""
+        self._blocks.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "reservations": self.reservations,
+            "numbers_in_memory": sum(end - start for start, end in self._blocks.values()),
+        }
+
+accession_allocator = AccessionAllocator(settings.ACCESSION_BLOCK_SIZE)
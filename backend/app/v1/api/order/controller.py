@@ -0,0 +1,139 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.engine import Row
+from datetime import date, datetime
+from fastapi import HTTPException, status
+from typing import Dict, List, Sequence
+from uuid import UUID
+
+from app.models.order import TestStatus, TEST_STATUS_TRANSITIONS
+from app.models.audit import AuditAction
+from app.core.audit import audit_log
+from .accession import accession_allocator
+from .crud import OrderCRUD
+from .schema import (
+    BulkTransitionRequest, BulkTransitionResponse,
+    OrderTestTransitionResult, OrderTestResponse, TransitionOutcome
+)
+
+class OrderController:
+    """Business logic layer for order operations"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.crud = OrderCRUD(db)
+
+    async def bulk_transition(self, request: BulkTransitionRequest, actor_id: UUID) -> BulkTransitionResponse:
+        allowed_from = TEST_STATUS_TRANSITIONS.get(request.target_status)
+        if not allowed_from:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Order tests cannot be moved to {request.target_status.value}"
+            )
+        for item in request.items:
+            if item.expected_status is not None and item.expected_status not in allowed_from:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail=f"Cannot move order test {item.order_test_id} from "
+                           f"{item.expected_status.value} to {request.target_status.value}"
+                )
+
+        # Tubes scanned by their label are resolved to order tests first
+        labels = sorted({item.accession_number for item in request.items if item.accession_number is not None})
+        ids_by_accession = await self.crud.get_ids_by_accession(labels) if labels else {}
+
+        # A tube scanned twice in one batch is applied once
+        now = datetime.now()
+        unique_items = {}
+        unknown_accessions: Dict[str, None] = {}
+        for item in request.items:
+            order_test_id = item.order_test_id or ids_by_accession.get(item.accession_number)
+            if order_test_id is None:
+                unknown_accessions[item.accession_number] = None
+                continue
+            unique_items.setdefault(order_test_id, (order_test_id, item.expected_status, item.collected_at or now))
+
+        updated = await self.crud.bulk_transition_order_tests(
+            request.target_status, allowed_from, list(unique_items.values())
+        ) if unique_items else []
+        accessions = {row.id: row.accession_number for row in updated}
+        if request.target_status == TestStatus.SAMPLE_COLLECTED:
+            accessions.update(await self._assign_accession_numbers([row for row in updated if row.accession_number is None]))
+        for row in updated:
+            audit_log.record(
+                AuditAction.UPDATE, "order_test", row.id, actor_id,
+                {"order_id": row.order_id, "status": request.target_status.value, "accession_number": accessions[row.id]},
+                session=self.db,
+            )
+
+        skipped_ids = [order_test_id for order_test_id in unique_items if order_test_id not in accessions]
+        current = await self.crud.get_order_test_states(skipped_ids) if skipped_ids else {}
+
+        completed_order_ids = []
+        if request.target_status == TestStatus.COMPLETED:
+            completed_order_ids = await self.crud.complete_finished_orders(
+                sorted({row.order_id for row in updated})
+            )
+
+        results = []
+        for order_test_id in unique_items:
+            if order_test_id in accessions:
+                results.append(OrderTestTransitionResult(
+                    order_test_id=order_test_id, accession_number=accessions[order_test_id],
+                    outcome=TransitionOutcome.UPDATED, current_status=request.target_status
+                ))
+            elif order_test_id not in current:
+                results.append(OrderTestTransitionResult(order_test_id=order_test_id, outcome=TransitionOutcome.NOT_FOUND))
+            else:
+                state = current[order_test_id]
+                outcome = TransitionOutcome.UNCHANGED if state.status == request.target_status else TransitionOutcome.CONFLICT
+                results.append(OrderTestTransitionResult(
+                    order_test_id=order_test_id, accession_number=state.accession_number,
+                    outcome=outcome, current_status=state.status
+                ))
+        results.extend(
+            OrderTestTransitionResult(accession_number=label, outcome=TransitionOutcome.NOT_FOUND)
+            for label in unknown_accessions
+        )
+
+        return BulkTransitionResponse(
+            results=results,
+            updated=len(updated),
+            completed_order_ids=completed_order_ids
+        )
+
+    async def _assign_accession_numbers(self, rows: Sequence[Row]) -> Dict[UUID, str]:
+        """Label newly collected samples with accession numbers of their collection day"""
+        by_day: Dict[date, List[UUID]] = {}
+        for row in rows:
+            by_day.setdefault(row.sample_collected_at.date(), []).append(row.id)
+        assigned: Dict[UUID, str] = {}
+        for day, order_test_ids in sorted(by_day.items()):
+            assigned.update(zip(order_test_ids, await accession_allocator.allocate(day, len(order_test_ids))))
+        if assigned:
+            await self.crud.assign_accession_numbers(list(assigned.items()))
+        return assigned
+
+    async def get_order_test_by_accession(self, accession_number: str, actor_id: UUID) -> OrderTestResponse:
+        order_test = await self.crud.get_order_test_by_accession(accession_number)
+        if order_test is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"No order test with accession number {accession_number}"
+            )
+        audit_log.record(
+            AuditAction.READ, "order_test", order_test.id, actor_id, {"accession_number": accession_number},
+            session=self.db,
+        )
+        return OrderTestResponse.model_validate(order_test)
+
+    async def get_order_detail(self, order_id: UUID, actor_id: UUID) -> bytes:
+        """The order view as ready-to-send JSON bytes"""
+        document = await self.crud.get_order_document(order_id)
+        if document is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+        audit_log.record(AuditAction.READ, "order", order_id, actor_id, session=self.db)
+        return document
+
+def get_order_controller(db: AsyncSession) -> OrderController:
+    """Get OrderController instance"""
+    return OrderController(db)
@@ -0,0 +1,188 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, text, update, values, column, cast, exists, and_, or_, String, DateTime
+from sqlalchemy.engine import Row
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+from uuid import UUID
+from datetime import datetime
+
+from app.models.order import Order, OrderTest, OrderStatus, TestStatus
+from app.db.branches import current_schema
+from app.v1.api.billing.crud import ROLLUP_STATE_ID
+
+class OrderCRUD:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def bulk_transition_order_tests(
+        self,
+        target_status: TestStatus,
+        allowed_from: Set[TestStatus],
+        items: Sequence[Tuple[UUID, Optional[TestStatus], datetime]],
+    ) -> List[Row]:
+        """Transition many order tests in one UPDATE ... FROM (VALUES ...) RETURNING.
+
+        Each item is (order_test_id, expected_status, collected_at); a row is only
+        updated while it is still in its expected status (or any allowed source
+        status if none was given). Returns id, order_id, sample_collected_at and
+        accession_number of updated rows.
+        """
+        columns = [column("id", PG_UUID(as_uuid=True)), column("expected", String)]
+        rows = [(item_id, expected.value if expected else None) for item_id, expected, _ in items]
+        set_values = {"status": target_status}
+
+        if target_status == TestStatus.SAMPLE_COLLECTED:
+            columns.append(column("collected_at", DateTime))
+            rows = [row + (collected_at,) for row, (_, _, collected_at) in zip(rows, items)]
+
+        batch = values(*columns, name="batch").data(rows)
+        if target_status == TestStatus.SAMPLE_COLLECTED:
+            set_values["sample_collected_at"] = batch.c.collected_at
+
+        result = await self.db.execute(
+            update(OrderTest)
+            .where(
+                OrderTest.id == batch.c.id,
+                OrderTest.status.in_(list(allowed_from)),
+                or_(batch.c.expected.is_(None), cast(OrderTest.status, String) == batch.c.expected),
+            )
+            .values(**set_values)
+            .returning(OrderTest.id, OrderTest.order_id, OrderTest.sample_collected_at, OrderTest.accession_number)
+            .execution_options(synchronize_session=False)
+        )
+        return list(result)
+
+    async def assign_accession_numbers(self, assignments: Sequence[Tuple[UUID, str]]) -> None:
+        """Label order tests that have no accession number yet, in one UPDATE ... FROM (VALUES ...)"""
+        batch = values(
+            column("id", PG_UUID(as_uuid=True)), column("accession_number", String), name="batch"
+        ).data(list(assignments))
+        await self.db.execute(
+            update(OrderTest)
+            .where(OrderTest.id == batch.c.id, OrderTest.accession_number.is_(None))
+            .values(accession_number=batch.c.accession_number)
+            .execution_options(synchronize_session=False)
+        )
+
+    async def get_order_test_states(self, order_test_ids: Sequence[UUID]) -> Dict[UUID, Row]:
+        """Current status and accession number by order test id"""
+        result = await self.db.execute(
+            select(OrderTest.id, OrderTest.status, OrderTest.accession_number).where(OrderTest.id.in_(order_test_ids))
+        )
+        return {row.id: row for row in result}
+
+    async def get_ids_by_accession(self, accession_numbers: Sequence[str]) -> Dict[str, UUID]:
+        result = await self.db.execute(
+            select(OrderTest.accession_number, OrderTest.id).where(OrderTest.accession_number.in_(accession_numbers))
+        )
+        return {row.accession_number: row.id for row in result}
+
+    async def get_order_test_by_accession(self, accession_number: str) -> Optional[OrderTest]:
+        """Single probe of the unique accession number index"""
+        result = await self.db.execute(select(OrderTest).where(OrderTest.accession_number == accession_number))
+        return result.scalar_one_or_none()
+
+    async def complete_finished_orders(self, order_ids: Sequence[UUID]) -> List[UUID]:
+        """Mark orders COMPLETED once none of their tests is outstanding"""
+        if not order_ids:
+            return []
+
+        # Lock the parents in a stable order first: a concurrent batch finishing the
+        # other tests of the same order then re-checks after we commit, instead of
+        # both transactions missing each other's updates.
+        await self.db.execute(
+            select(Order.id).where(Order.id.in_(order_ids)).order_by(Order.id).with_for_update()
+        )
+        outstanding = exists().where(
+            OrderTest.order_id == Order.id,
+            OrderTest.status != TestStatus.COMPLETED,
+        )
+        result = await self.db.execute(
+            update(Order)
+            .where(Order.id.in_(order_ids), Order.status == OrderStatus.PENDING, ~outstanding)
+            .values(status=OrderStatus.COMPLETED)
+            .returning(Order.id)
+            .execution_options(synchronize_session=False)
+        )
+        return list(result.scalars().all())
+
+    async def get_order_document(self, order_id: UUID) -> Optional[bytes]:
+        """The whole order view as UTF-8 JSON, built by Postgres in one statement.
+
+        Amounts are rendered as strings like the Pydantic-serialized endpoints
+        do, and the billing's paid amount is live (rolled-up total plus ledger
+        tail, as in BillingCRUD.get_balances).
+        """
+        schema = current_schema()
+        result = await self.db.execute(
+            text(f"""
+                SELECT convert_to(json_build_object(
+                    'id', o.id,
+                    'ordered_at', o.ordered_at,
+                    'status', o.status,
+                    'total_amount', o.total_amount::text,
+                    'patient', json_build_object(
+                        'id', p.id, 'first_name', p.first_name, 'last_name', p.last_name, 'age', p.age,
+                        'gender', p.gender, 'contact_number', p.contact_number, 'address', p.address
+                    ),
+                    'consultant', CASE WHEN c.id IS NOT NULL THEN json_build_object(
+                        'id', c.id, 'name', c.name, 'specialization', c.specialization,
+                        'contact_number', c.contact_number, 'hospital_affiliation', c.hospital_affiliation
+                    ) END,
+                    'tests', coalesce((
+                        SELECT json_agg(json_build_object(
+                            'id', ot.id,
+                            'status', ot.status,
+                            'sample_collected_at', ot.sample_collected_at,
+                            'accession_number', ot.accession_number,
+                            'test', json_build_object(
+                                'id', t.id, 'name', t.name, 'sample_required', t.sample_required, 'cost', t.cost::text
+                            ),
+                            'report', CASE WHEN r.id IS NOT NULL THEN json_build_object(
+                                'id', r.id, 'result', r.result, 'comments', r.comments, 'created_at', r.created_at
+                            ) END
+                        ) ORDER BY t.name, ot.id)
+                        FROM "{schema}".order_tests ot
+                        JOIN "{schema}".lab_tests t ON t.id = ot.test_id
+                        LEFT JOIN LATERAL (
+                            SELECT id, result, comments, created_at FROM "{schema}".test_reports
+                            WHERE order_test_id = ot.id ORDER BY created_at DESC LIMIT 1
+                        ) r ON true
+                        WHERE ot.order_id = o.id
+                    ), '[]'::json),
+                    'billing', (
+                        SELECT json_build_object(
+                            'id', b.id,
+                            'total_amount', b.total_amount::text,
+                            'discount_amount', b.discount_amount::text,
+                            'net_amount', b.net_amount::text,
+                            'paid_amount', paid.amount::text,
+                            'due_amount', greatest(b.net_amount - paid.amount, 0)::text,
+                            'payment_status', CASE WHEN paid.amount >= b.net_amount THEN 'PAID'
+                                                   WHEN paid.amount > 0 THEN 'PARTIAL' ELSE 'UNPAID' END
+                        )
+                        FROM "{schema}".billings b
+                        LEFT JOIN "{schema}".billing_balances bb ON bb.billing_id = b.id
+                        CROSS JOIN LATERAL (
+                            SELECT coalesce(bb.paid_total, 0) + coalesce(sum(pm.amount), 0) AS amount
+                            FROM "{schema}".payments pm
+                            WHERE pm.billing_id = b.id AND pm.created_txid >= coalesce((
+                                SELECT rolled_up_txid FROM "{schema}".payment_rollup_state WHERE id = :rollup_state_id
+                            ), 0)
+                        ) paid
+                        WHERE b.order_id = o.id
+                        LIMIT 1
+                    )
+                )::text, 'UTF8')
+                FROM "{schema}".orders o
+                JOIN "{schema}".patients p ON p.id = o.patient_id
+                LEFT JOIN "{schema}".consultants c ON c.id = o.consultant_id
+                WHERE o.id = :order_id
+            """),
+            {"order_id": order_id, "rollup_state_id": ROLLUP_STATE_ID},
+        )
+        return result.scalar_one_or_none()
+
+def get_order_crud(db: AsyncSession) -> OrderCRUD:
+    """Get OrderCRUD instance"""
+    return OrderCRUD(db)
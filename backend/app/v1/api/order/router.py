@@ -0,0 +1,51 @@
+# app/v1/api/order/router.py
+from fastapi import APIRouter, Depends, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from uuid import UUID
+
+from .schema import BulkTransitionRequest, BulkTransitionResponse, OrderDetail, OrderTestResponse
+from .controller import get_order_controller
+from app.core.auth import require_any_role
+from app.db.session import get_db
+from app.core.config import settings
+from app.models.user import User
+
+router = APIRouter(prefix=f"{settings.API_V1_STR}/orders", tags=["Orders"])
+
+@router.post("/tests/transitions", response_model=BulkTransitionResponse, status_code=status.HTTP_200_OK)
+async def bulk_transition_order_tests(
+    request: BulkTransitionRequest,
+    current_user: User = Depends(require_any_role),
+    db: AsyncSession = Depends(get_db)
+):
+    """Apply one status transition to a batch of order tests (e.g. scanned sample tubes)"""
+    controller = get_order_controller(db)
+    return await controller.bulk_transition(request, current_user.id)
+
+@router.get("/tests/accession/{accession_number}", response_model=OrderTestResponse, status_code=status.HTTP_200_OK)
+async def get_order_test_by_accession(
+    accession_number: str,
+    current_user: User = Depends(require_any_role),
+    db: AsyncSession = Depends(get_db)
+):
+    """Look up the order test behind a scanned tube label"""
+    controller = get_order_controller(db)
+    return await controller.get_order_test_by_accession(accession_number, current_user.id)
+
+@router.get(
+    "/{order_id}",
+    response_class=Response,
+    responses={status.HTTP_200_OK: {"model": OrderDetail, "content": {"application/json": {}}}},
+)
+async def get_order_detail(
+    order_id: UUID,
+    current_user: User = Depends(require_any_role),
+    db: AsyncSession = Depends(get_db)
+):
+    """Order with patient, consultant, tests, reports and billing.
+
+    The document is assembled by Postgres in a single statement and sent as
+    is, without ORM objects or response-model serialization.
+    """
+    controller = get_order_controller(db)
+    return Response(await controller.get_order_detail(order_id, current_user.id), media_type="application/json")
@@ -0,0 +1,125 @@
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
+from uuid import UUID
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+from enum import Enum
+
+from app.models.billing import PaymentStatus
+from app.models.order import OrderStatus, TestStatus
+
+# ----- Input Schemas -----
+
+class OrderTestTransitionItem(BaseModel):
+    # The tube is identified by either its order test id or its accession number label
+    order_test_id: Optional[UUID] = None
+    accession_number: Optional[str] = Field(None, max_length=20)
+    # Optimistic check: only transition if the test is still in this state
+    expected_status: Optional[TestStatus] = None
+    collected_at: Optional[datetime] = None  # scan time, defaults to now
+
+    @field_validator("collected_at")
+    @classmethod
+    def naive_collected_at(cls, v: Optional[datetime]) -> Optional[datetime]:
+        # sample_collected_at is a naive DateTime column; asyncpg rejects aware values
+        if v is not None and v.tzinfo is not None:
+            return v.astimezone(timezone.utc).replace(tzinfo=None)
+        return v
+
+    @model_validator(mode="after")
+    def check_identifier(self) -> "OrderTestTransitionItem":
+        if (self.order_test_id is None) == (self.accession_number is None):
+            raise ValueError("Give exactly one of order_test_id or accession_number")
+        return self
+
+class BulkTransitionRequest(BaseModel):
+    target_status: TestStatus
+    items: List[OrderTestTransitionItem] = Field(..., min_length=1, max_length=500)
+
+# ----- Output Schemas -----
+
+class TransitionOutcome(str, Enum):
+    UPDATED = "UPDATED"
+    UNCHANGED = "UNCHANGED"  # already in the target state, e.g. a tube scanned twice
+    CONFLICT = "CONFLICT"
+    NOT_FOUND = "NOT_FOUND"
+
+class OrderTestTransitionResult(BaseModel):
+    order_test_id: Optional[UUID] = None  # None for an accession number that matched no order test
+    accession_number: Optional[str] = None
+    outcome: TransitionOutcome
+    current_status: Optional[TestStatus] = None
+
+class BulkTransitionResponse(BaseModel):
+    results: List[OrderTestTransitionResult]
+    updated: int
+    completed_order_ids: List[UUID]
+
+class OrderTestResponse(BaseModel):
+    id: UUID
+    order_id: UUID
+    test_id: UUID
+    status: TestStatus
+    sample_collected_at: Optional[datetime] = None
+    accession_number: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+# ----- Order detail document -----
+# Built by Postgres (OrderCRUD.get_order_document) and sent as-is; these
+# models only document its shape in the OpenAPI schema.
+
+class OrderDetailPatient(BaseModel):
+    id: UUID
+    first_name: str
+    last_name: str
+    age: str
+    gender: str
+    contact_number: str
+    address: str
+
+class OrderDetailConsultant(BaseModel):
+    id: UUID
+    name: str
+    specialization: str
+    contact_number: str
+    hospital_affiliation: Optional[str] = None
+
+class OrderDetailLabTest(BaseModel):
+    id: UUID
+    name: str
+    sample_required: Optional[str] = None
+    cost: Decimal
+
+class OrderDetailReport(BaseModel):
+    id: UUID
+    result: Dict[str, Any]
+    comments: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+class OrderDetailTest(BaseModel):
+    id: UUID
+    status: TestStatus
+    sample_collected_at: Optional[datetime] = None
+    accession_number: Optional[str] = None
+    test: OrderDetailLabTest
+    report: Optional[OrderDetailReport] = None
+
+class OrderDetailBilling(BaseModel):
+    id: UUID
+    total_amount: Decimal
+    discount_amount: Optional[Decimal] = None
+    net_amount: Decimal
+    paid_amount: Decimal
+    due_amount: Decimal
+    payment_status: PaymentStatus
+
+class OrderDetail(BaseModel):
+    id: UUID
+    ordered_at: Optional[datetime] = None
+    status: OrderStatus
+    total_amount: Decimal
+    patient: OrderDetailPatient
+    consultant: Optional[OrderDetailConsultant] = None
+    tests: List[OrderDetailTest]
+    billing: Optional[OrderDetailBilling] = None
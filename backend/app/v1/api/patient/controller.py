@@ -0,0 +1,82 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from uuid import UUID
+from datetime import datetime, timezone
+from fastapi import HTTPException, status
+
+from app.core.audit import audit_log
+from app.core.config import settings
+from app.models.audit import AuditAction
+from .crud import PatientCRUD
+from .matching import blocking_keys, score_candidate
+from .schema import PatientCreate, PatientOut, DuplicateCandidate, PatientRegistration, AnalyteTrend, TrendPoint
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Observation times are stored as naive UTC; an offset given by the client is converted, not dropped"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+class PatientController:
+    """Business logic layer for patient operations"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.crud = PatientCRUD(db)
+
+    async def find_duplicates(self, patient_in: PatientCreate, actor_id: UUID,
+                              exclude_id: Optional[UUID] = None) -> List[DuplicateCandidate]:
+        """Ranked existing patients that are likely the same person"""
+        keys = blocking_keys(patient_in.first_name, patient_in.last_name, patient_in.gender, patient_in.contact_number)
+        probe = patient_in.model_dump()
+
+        candidates = []
+        for patient, key_types in await self.crud.find_candidates(keys, exclude_id):
+            candidate = PatientOut.model_validate(patient)
+            score = score_candidate(key_types, probe, candidate.model_dump())
+            if score >= settings.PATIENT_MATCH_MIN_SCORE:
+                candidates.append(DuplicateCandidate(patient=candidate, score=round(score, 3), matched_keys=sorted(key_types)))
+        candidates.sort(key=lambda candidate: candidate.score, reverse=True)
+        candidates = candidates[:settings.PATIENT_MATCH_MAX_CANDIDATES]
+
+        if candidates:
+            audit_log.record(
+                AuditAction.READ, "patient", actor_id=actor_id,
+                details={"duplicate_check": [candidate.patient.id for candidate in candidates]}, session=self.db
+            )
+        return candidates
+
+    async def register_patient(self, patient_in: PatientCreate, actor_id: UUID) -> PatientRegistration:
+        """Create the patient; likely duplicates are returned for the front desk to review"""
+        patient = await self.crud.create_patient(patient_in)
+        audit_log.record(AuditAction.CREATE, "patient", patient.id, actor_id, session=self.db)
+        duplicates = await self.find_duplicates(patient_in, actor_id, exclude_id=patient.id)
+        return PatientRegistration(patient=PatientOut.model_validate(patient), possible_duplicates=duplicates)
+
+    async def get_trend(self, patient_id: UUID, analyte: str, since: Optional[datetime],
+                        until: Optional[datetime], points: Optional[int], actor_id: UUID) -> AnalyteTrend:
+        """A patient's values of one analyte over time, optionally downsampled to `points` buckets"""
+        if await self.crud.get_patient(patient_id) is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Patient not found")
+        since, until = _naive_utc(since), _naive_utc(until)
+        if since is not None and until is not None and since >= until:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="'since' must be before 'until'")
+
+        rows = await self.crud.get_trend(patient_id, analyte, since, until, points)
+        total = rows[0].total if rows else 0
+        audit_log.record(AuditAction.READ, "patient", patient_id, actor_id, {"trend": analyte}, session=self.db)
+        return AnalyteTrend(
+            patient_id=patient_id,
+            analyte=analyte,
+            total=total,
+            downsampled=len(rows) < total,
+            points=[
+                TrendPoint(observed_at=row.observed_at, value=row.value, min=row.min, max=row.max,
+                           count=row.count, unit=row.unit)
+                for row in rows
+            ],
+        )
+
+def get_patient_controller(db: AsyncSession) -> PatientController:
+    """Get PatientController instance"""
+    return PatientController(db)
@@ -0,0 +1,144 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, insert, and_, or_, case, exists, func, text
+from sqlalchemy.engine import Row
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from app.models.patient import Patient
+from app.models.patient_match import PatientMatchKey
+from app.db.branches import current_schema
+from .matching import KEY_VERSION, KEY_WEIGHTS, blocking_keys
+from .schema import PatientCreate
+
+# Upper bound on patients sharing a key that are pulled in for scoring
+CANDIDATE_LIMIT = 50
+
+class PatientCRUD:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create_patient(self, patient_in: PatientCreate, patient_id: Optional[UUID] = None) -> Patient:
+        """Insert a patient together with its blocking keys (`patient_id` for ids assigned offline)"""
+        patient = Patient(**patient_in.model_dump())
+        if patient_id is not None:
+            patient.id = patient_id
+        self.db.add(patient)
+        await self.db.flush()
+        await self.replace_match_keys([patient])
+        return patient
+
+    async def replace_match_keys(self, patients: Sequence[Patient]) -> int:
+        """(Re)build the blocking keys of patients; returns the number of keys written"""
+        if not patients:
+            return 0
+        await self.db.execute(
+            delete(PatientMatchKey).where(PatientMatchKey.patient_id.in_([patient.id for patient in patients]))
+        )
+        rows = [
+            {"patient_id": patient.id, "key_type": key_type, "key_value": key_value, "key_version": KEY_VERSION}
+            for patient in patients
+            for key_type, key_value in blocking_keys(
+                patient.first_name, patient.last_name, patient.gender, patient.contact_number
+            )
+        ]
+        if rows:
+            await self.db.execute(insert(PatientMatchKey), rows)
+        return len(rows)
+
+    async def find_candidates(
+        self, keys: Sequence[Tuple[str, str]], exclude_id: Optional[UUID] = None
+    ) -> List[Tuple[Patient, List[str]]]:
+        """Patients sharing at least one blocking key, with the key types they share.
+
+        When more than CANDIDATE_LIMIT patients share a key, the ones sharing
+        the most (by key weight) are kept, so a common surname cannot crowd
+        out a patient who also matches on phone.
+        """
+        if not keys:
+            return []
+        key_score = func.sum(case(
+            *((PatientMatchKey.key_type == key_type, weight) for key_type, weight in KEY_WEIGHTS.items()), else_=0.0
+        ))
+        shared = (
+            select(
+                PatientMatchKey.patient_id,
+                func.array_agg(func.distinct(PatientMatchKey.key_type)).label("key_types"),
+            )
+            .where(or_(*(
+                and_(PatientMatchKey.key_type == key_type, PatientMatchKey.key_value == key_value)
+                for key_type, key_value in keys
+            )))
+            .group_by(PatientMatchKey.patient_id)
+            .order_by(key_score.desc(), PatientMatchKey.patient_id)
+            .limit(CANDIDATE_LIMIT)
+        )
+        if exclude_id is not None:
+            shared = shared.where(PatientMatchKey.patient_id != exclude_id)
+        shared = shared.subquery()
+
+        result = await self.db.execute(
+            select(Patient, shared.c.key_types).join(shared, shared.c.patient_id == Patient.id)
+        )
+        return [(patient, list(key_types)) for patient, key_types in result.all()]
+
+    async def get_patients_needing_keys(self, after: Optional[UUID], limit: int) -> List[Patient]:
+        """Next batch by id (keyset) of patients without current-version keys"""
+        query = (
+            select(Patient)
+            .where(~exists().where(
+                PatientMatchKey.patient_id == Patient.id, PatientMatchKey.key_version == KEY_VERSION
+            ))
+            .order_by(Patient.id)
+            .limit(limit)
+        )
+        if after is not None:
+            query = query.where(Patient.id > after)
+        result = await self.db.execute(query)
+        return list(result.scalars().all())
+
+    async def get_patient(self, patient_id: UUID) -> Optional[Patient]:
+        return await self.db.get(Patient, patient_id)
+
+    async def get_trend(self, patient_id: UUID, analyte: str, since: Optional[datetime],
+                        until: Optional[datetime], points: Optional[int]) -> List[Row]:
+        """Time series of one analyte, bucketed into at most `points` equal time spans.
+
+        The window is read once with an index-only range scan on
+        ix_analyte_observations_trend; when it holds no more than `points`
+        observations every observation is its own bucket. Values in different
+        units are never averaged together: a span with several units gives one
+        bucket per unit. Rows are (observed_at, value, min, max, count, unit, total).
+        """
+        schema = current_schema()
+        result = await self.db.execute(
+            text(f"""
+                WITH window_rows AS MATERIALIZED (
+                    SELECT observed_at, value, unit,
+                           row_number() OVER (ORDER BY observed_at) AS position
+                    FROM "{schema}".analyte_observations
+                    WHERE patient_id = :patient_id AND analyte = :analyte
+                      AND (CAST(:since AS timestamp) IS NULL OR observed_at >= CAST(:since AS timestamp))
+                      AND (CAST(:until AS timestamp) IS NULL OR observed_at < CAST(:until AS timestamp))
+                ), bounds AS (
+                    SELECT extract(epoch FROM min(observed_at)) AS first_s,
+                           extract(epoch FROM max(observed_at)) AS last_s,
+                           count(*) AS total
+                    FROM window_rows
+                )
+                SELECT min(w.observed_at) AS observed_at, avg(w.value) AS value,
+                       min(w.value) AS min, max(w.value) AS max, count(*) AS count,
+                       w.unit, max(b.total) AS total
+                FROM window_rows w CROSS JOIN bounds b
+                GROUP BY CASE
+                    WHEN CAST(:points AS int) IS NULL OR b.total <= CAST(:points AS int) THEN w.position
+                    ELSE width_bucket(extract(epoch FROM w.observed_at), b.first_s, b.last_s + 1, CAST(:points AS int))
+                END, w.unit
+                ORDER BY 1, w.unit
+            """),
+            {"patient_id": patient_id, "analyte": analyte, "since": since, "until": until, "points": points},
+        )
+        return list(result.all())
+
+def get_patient_crud(db: AsyncSession) -> PatientCRUD:
+    return PatientCRUD(db)
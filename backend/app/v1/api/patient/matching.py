@@ -0,0 +1,96 @@
+"""Blocking keys and scoring for duplicate-patient detection.
+
+Each patient gets a few coarse keys (normalized phone, phonetic name codes with
+gender). Registration looks candidates up by exact key match on the indexed
+patient_match_keys table, so only patients sharing a key are ever compared,
+then ranks them with a finer similarity score.
+"""
+
+import re
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Tuple
+
+# Bump when key generation changes; the rebuild job then re-keys every patient
+KEY_VERSION = 1
+
+PHONE_DIGITS = 10
+SOUNDEX_CODES = {
+    **dict.fromkeys("BFPV", "1"), **dict.fromkeys("CGJKQSXZ", "2"), **dict.fromkeys("DT", "3"),
+    "L": "4", **dict.fromkeys("MN", "5"), "R": "6",
+}
+
+# Free-text ages: a number and an optional unit word, of which only the first letter counts.
+# Shared with the SQL re-flagging path (ReportCRUD.get_flag_inputs), which must parse identically.
+AGE_PATTERN = r"^\s*([0-9]+(?:\.[0-9]+)?)\s*([a-z]*)"
+AGE_UNIT_YEARS = {"": 1.0, "y": 1.0, "m": 1 / 12, "w": 7 / 365.25, "d": 1 / 365.25, "h": 1 / 8766}
+_AGE_REGEX = re.compile(AGE_PATTERN, re.IGNORECASE)
+
+# Score contributed by each matching key type, plus name/age similarity on top
+KEY_WEIGHTS = {"phone": 0.5, "name": 0.3, "surname_phone": 0.2}
+
+def normalize_phone(phone: str) -> Optional[str]:
+    """Last PHONE_DIGITS digits, dropping country code and punctuation"""
+    digits = re.sub(r"\D", "", phone or "")
+    return digits[-PHONE_DIGITS:] if len(digits) >= 7 else None
+
+def normalize_name(name: str) -> str:
+    return re.sub(r"[^A-Z]", "", (name or "").upper())
+
+def soundex(name: str) -> Optional[str]:
+    letters = normalize_name(name)
+    if not letters:
+        return None
+    code = letters[0]
+    previous = SOUNDEX_CODES.get(letters[0])
+    for letter in letters[1:]:
+        digit = SOUNDEX_CODES.get(letter)
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        if letter not in "HW":  # H and W do not separate equal codes
+            previous = digit
+    return code.ljust(4, "0")
+
+def normalize_gender(gender: str) -> str:
+    return (gender or "").strip()[:1].upper() or "U"
+
+def blocking_keys(first_name: str, last_name: str, gender: str, contact_number: str) -> List[Tuple[str, str]]:
+    """(key type, key value) pairs a duplicate is expected to share"""
+    keys = []
+    phone = normalize_phone(contact_number)
+    if phone:
+        keys.append(("phone", phone))
+
+    first, last = soundex(first_name), soundex(last_name)
+    if first and last:
+        # Sorted, so a swapped first/last name still collides
+        keys.append(("name", ":".join(sorted((first, last))) + f":{normalize_gender(gender)}"))
+    if last and phone:
+        # Same family and phone, catching a misspelled first name
+        keys.append(("surname_phone", f"{last}:{phone}"))
+    return keys
+
+def parse_age(age: str) -> Optional[float]:
+    """Age in years: "34", "34 yrs", "6 months" (0.5), "3w", "10 days"; None for an unknown unit"""
+    if age and age.isascii() and age.isdigit():
+        return float(age)
+    match = _AGE_REGEX.match(age or "")
+    if match is None:
+        return None
+    factor = AGE_UNIT_YEARS.get(match.group(2)[:1].lower())
+    return None if factor is None else float(match.group(1)) * factor
+
+def score_candidate(matched_keys: List[str], probe: Dict[str, str], candidate: Dict[str, str]) -> float:
+    """0..1 likelihood that candidate is the same person as probe"""
+    score = sum(KEY_WEIGHTS.get(key_type, 0) for key_type in set(matched_keys))
+    probe_name = normalize_name(probe["first_name"] + probe["last_name"])
+    candidate_name = normalize_name(candidate["first_name"] + candidate["last_name"])
+    score += 0.2 * SequenceMatcher(None, probe_name, candidate_name).ratio()
+
+    probe_age, candidate_age = parse_age(probe["age"]), parse_age(candidate["age"])
+    if probe_age is not None and candidate_age is not None and abs(probe_age - candidate_age) > 2:
+        score -= 0.2
+    if normalize_gender(probe["gender"]) != normalize_gender(candidate["gender"]):
+        score -= 0.2
+    return max(0.0, min(1.0, score))
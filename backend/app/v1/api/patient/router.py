@@ -0,0 +1,59 @@
+# app/v1/api/patient/router.py
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from uuid import UUID
+from datetime import datetime
+
+from .schema import PatientCreate, PatientRegistration, DuplicateCandidate, MatchKeyRebuild, AnalyteTrend
+from .controller import get_patient_controller
+from app.core.auth import require_admin, require_any_role
+from app.db.session import get_db
+from app.core.config import settings
+from app.jobs.queue import enqueue_job
+from app.models.user import User
+
+router = APIRouter(prefix=f"{settings.API_V1_STR}/patients", tags=["Patients"])
+
+@router.post("", response_model=PatientRegistration, status_code=status.HTTP_201_CREATED)
+async def register_patient(
+    patient_in: PatientCreate,
+    current_user: User = Depends(require_any_role),
+    db: AsyncSession = Depends(get_db)
+):
+    """Register a patient, returning likely existing duplicates"""
+    controller = get_patient_controller(db)
+    return await controller.register_patient(patient_in, current_user.id)
+
+@router.post("/duplicates", response_model=List[DuplicateCandidate])
+async def find_duplicates(
+    patient_in: PatientCreate,
+    current_user: User = Depends(require_any_role),
+    db: AsyncSession = Depends(get_db)
+):
+    """Ranked candidate duplicates for the details being entered at the front desk"""
+    controller = get_patient_controller(db)
+    return await controller.find_duplicates(patient_in, current_user.id)
+
+@router.post("/match-keys/rebuild", response_model=MatchKeyRebuild, status_code=status.HTTP_202_ACCEPTED)
+async def rebuild_match_keys(
+    _: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """Key every patient that has no current-version blocking keys, in background batches"""
+    job = await enqueue_job(db, "rebuild_patient_match_keys")
+    return MatchKeyRebuild(job_id=job.id)
+
+@router.get("/{patient_id}/trends/{analyte}", response_model=AnalyteTrend)
+async def get_trend(
+    patient_id: UUID,
+    analyte: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    points: Optional[int] = Query(None, ge=1, le=settings.TREND_MAX_POINTS),
+    current_user: User = Depends(require_any_role),
+    db: AsyncSession = Depends(get_db)
+):
+    """Values of one analyte (e.g. CREAT) over time, downsampled to at most `points` buckets"""
+    controller = get_patient_controller(db)
+    return await controller.get_trend(patient_id, analyte, since, until, points, current_user.id)
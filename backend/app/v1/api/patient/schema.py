@@ -0,0 +1,63 @@
+from pydantic import BaseModel, ConfigDict, Field
+from uuid import UUID
+from datetime import datetime
+from typing import List, Optional
+
+# ----- Input Schemas -----
+
+class PatientCreate(BaseModel):
+    first_name: str = Field(..., min_length=1, max_length=100)
+    last_name: str = Field(..., min_length=1, max_length=100)
+    age: str = Field(..., min_length=1, max_length=20)
+    gender: str = Field(..., min_length=1, max_length=20)
+    contact_number: str = Field(..., min_length=5, max_length=30)
+    address: str = Field(..., min_length=1, max_length=500)
+
+class PatientUpdate(BaseModel):
+    first_name: Optional[str] = Field(None, min_length=1, max_length=100)
+    last_name: Optional[str] = Field(None, min_length=1, max_length=100)
+    age: Optional[str] = Field(None, min_length=1, max_length=20)
+    gender: Optional[str] = Field(None, min_length=1, max_length=20)
+    contact_number: Optional[str] = Field(None, min_length=5, max_length=30)
+    address: Optional[str] = Field(None, min_length=1, max_length=500)
+
+# ----- Output Schemas -----
+
+class PatientOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    first_name: str
+    last_name: str
+    age: str
+    gender: str
+    contact_number: str
+    address: str
+    created_at: Optional[datetime] = None
+
+class DuplicateCandidate(BaseModel):
+    patient: PatientOut
+    score: float
+    matched_keys: List[str]
+
+class PatientRegistration(BaseModel):
+    patient: PatientOut
+    possible_duplicates: List[DuplicateCandidate]
+
+class MatchKeyRebuild(BaseModel):
+    job_id: UUID
+
+class TrendPoint(BaseModel):
+    observed_at: datetime  # first observation of the bucket when downsampled
+    value: float  # mean of the bucket when downsampled
+    min: float
+    max: float
+    count: int
+    unit: Optional[str] = None
+
+class AnalyteTrend(BaseModel):
+    patient_id: UUID
+    analyte: str
+    total: int  # observations in the requested window
+    downsampled: bool
+    points: List[TrendPoint]
@@ -0,0 +1,115 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Sequence, Set, Tuple
+from uuid import UUID
+from fastapi import HTTPException, status
+
+from app.core.audit import audit_log
+from app.models.audit import AuditAction
+from app.models.report import TestReport
+from .crud import ReportCRUD
+from .flagging import ReportInput, flag_reports
+from .schema import (
+    ReportCreate, ReportOut, ReportBulkCreate, ReportBulkResult, ReportIngestResult, IngestOutcome
+)
+
+class ReportController:
+    """Business logic layer for report operations"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.crud = ReportCRUD(db)
+
+    async def ingest(self, reports: Sequence[ReportCreate], actor_id: UUID) -> Tuple[List[ReportIngestResult], List[TestReport]]:
+        """Validate, flag and store many reports with a fixed number of queries.
+
+        Each report is checked against its test's result schema (compiled once
+        per schema version); rejected ones are reported back, the rest stored.
+        An order test has at most one report: one that already has a report is
+        answered with EXISTS, and repeats of an order test within the batch
+        with DUPLICATE.
+        """
+        contexts = await self.crud.get_report_contexts([report_in.order_test_id for report_in in reports])
+        validators = await self.crud.get_validators(
+            {context.test_id: context.result_schema_version for context in contexts.values()}
+        )
+
+        outcomes: List[ReportIngestResult] = []
+        accepted: List[Tuple[ReportIngestResult, ReportCreate]] = []
+        inputs: List[ReportInput] = []
+        seen: Set[UUID] = set()
+        for report_in in reports:
+            context = contexts.get(report_in.order_test_id)
+            if context is None:
+                outcomes.append(ReportIngestResult(order_test_id=report_in.order_test_id, outcome=IngestOutcome.NOT_FOUND))
+                continue
+            if context.report_id is not None:
+                outcomes.append(ReportIngestResult(
+                    order_test_id=report_in.order_test_id, outcome=IngestOutcome.EXISTS, report_id=context.report_id
+                ))
+                continue
+            if report_in.order_test_id in seen:
+                outcomes.append(ReportIngestResult(order_test_id=report_in.order_test_id, outcome=IngestOutcome.DUPLICATE))
+                continue
+            seen.add(report_in.order_test_id)
+            result, validator = report_in.result, validators.get(context.test_id)
+            if validator is not None:
+                result, errors = validator.validate(result)
+                if errors:
+                    outcomes.append(ReportIngestResult(
+                        order_test_id=report_in.order_test_id, outcome=IngestOutcome.INVALID, errors=errors
+                    ))
+                    continue
+            outcome = ReportIngestResult(order_test_id=report_in.order_test_id, outcome=IngestOutcome.CREATED)
+            outcomes.append(outcome)
+            accepted.append((outcome, report_in))
+            inputs.append(ReportInput(context.test_id, context.age, context.gender, result))
+        if not accepted:
+            return outcomes, []
+
+        table = await self.crud.get_range_table()
+        flagged = flag_reports(table, inputs)
+        created = await self.crud.create_reports([
+            (report_in.order_test_id, result, report_in.comments)
+            for (_, report_in), result in zip(accepted, flagged)
+        ])
+        await self.crud.record_observations([report.id for report in created])
+        by_order_test = {report.order_test_id: report for report in created}
+        for outcome, _ in accepted:
+            report = by_order_test.get(outcome.order_test_id)
+            if report is None:
+                # Reported by a concurrent request since the contexts were read
+                outcome.outcome = IngestOutcome.EXISTS
+                continue
+            outcome.report_id = report.id
+            audit_log.record(
+                AuditAction.CREATE, "report", report.id, actor_id, {"order_test_id": report.order_test_id},
+                session=self.db,
+            )
+        return outcomes, created
+
+    async def create_report(self, report_in: ReportCreate, actor_id: UUID) -> ReportOut:
+        """Store entered results, validated by the test's schema and flagged against its reference ranges"""
+        (outcome,), created = await self.ingest([report_in], actor_id)
+        if outcome.outcome == IngestOutcome.NOT_FOUND:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order test not found")
+        if outcome.outcome == IngestOutcome.INVALID:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=outcome.errors)
+        if outcome.outcome == IngestOutcome.EXISTS:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Order test already has a report")
+        return ReportOut.model_validate(created[0])
+
+    async def create_reports(self, request: ReportBulkCreate, actor_id: UUID) -> ReportBulkResult:
+        """Bulk result ingestion (e.g. from an analyzer interface): valid reports are stored, invalid ones listed"""
+        outcomes, created = await self.ingest(request.reports, actor_id)
+        return ReportBulkResult(results=outcomes, created=len(created))
+
+    async def get_report(self, report_id: UUID, actor_id: UUID) -> ReportOut:
+        report = await self.crud.get_report(report_id)
+        if report is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report not found")
+        audit_log.record(AuditAction.READ, "report", report.id, actor_id, session=self.db)
+        return ReportOut.model_validate(report)
+
+def get_report_controller(db: AsyncSession) -> ReportController:
+    """Get ReportController instance"""
+    return ReportController(db)
@@ -0,0 +1,224 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Row
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+from datetime import datetime
+
+from app.models.order import Order, OrderTest
+from app.models.patient import Patient
+from app.models.report import TestReport
+from app.models.test import LabTest, ReferenceRange
+from app.core.cache import reference_range_cache
+from app.core.config import settings
+from app.db.branches import current_branch, current_schema
+from app.v1.api.patient.matching import AGE_PATTERN, AGE_UNIT_YEARS
+from .flagging import NUMERIC_PATTERN, RangeDef, RangeTable
+from .validation import ResultValidator, ValidatorCache
+
+# Years per unit of a parsed age, as parse_age applies them
+AGE_UNIT_SQL = "CASE lower(left(a.m[2], 1)) " + " ".join(
+    f"WHEN '{unit}' THEN {factor!r}" for unit, factor in AGE_UNIT_YEARS.items()
+) + " END"
+
+# Compiled per (test, schema version), so entries never need invalidating
+validator_cache = ValidatorCache(settings.RESULT_VALIDATOR_CACHE_SIZE)
+
+class ReportCRUD:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_range_table(self, use_cache: bool = True) -> RangeTable:
+        """All reference ranges of the branch compiled for flagging, cached per process until they change"""
+        branch = current_branch().name
+        table = reference_range_cache.get(branch) if use_cache else None
+        if table is None:
+            result = await self.db.execute(select(ReferenceRange))
+            table = RangeTable(
+                RangeDef(r.test_id, r.analyte, r.gender, r.age_min, r.age_max,
+                         r.low, r.high, r.critical_low, r.critical_high)
+                for r in result.scalars().all()
+            )
+            reference_range_cache.set(branch, table)
+        return table
+
+    async def get_report_contexts(self, order_test_ids: Sequence[UUID]) -> Dict[UUID, Row]:
+        """order test id -> (test_id, age, gender, result_schema_version, report_id) for result entry;
+        report_id is the order test's existing report, if any"""
+        result = await self.db.execute(
+            select(
+                OrderTest.id, OrderTest.test_id, Patient.age, Patient.gender, LabTest.result_schema_version,
+                TestReport.id.label("report_id"),
+            )
+            .join(Order, Order.id == OrderTest.order_id)
+            .join(Patient, Patient.id == Order.patient_id)
+            .join(LabTest, LabTest.id == OrderTest.test_id)
+            .outerjoin(TestReport, TestReport.order_test_id == OrderTest.id)
+            .where(OrderTest.id.in_(set(order_test_ids)))
+        )
+        return {row.id: row for row in result.all()}
+
+    async def get_validators(self, versions: Dict[UUID, int]) -> Dict[UUID, Optional[ResultValidator]]:
+        """Compiled validator per test (None without a schema), given each test's current schema version"""
+        validators: Dict[UUID, Optional[ResultValidator]] = {}
+        missing = []
+        for test_id, version in versions.items():
+            validator = validator_cache.get(test_id, version) if version else None
+            validators[test_id] = validator
+            if validator is None and version:
+                missing.append(test_id)
+        if missing:
+            result = await self.db.execute(
+                select(LabTest.id, LabTest.result_schema, LabTest.result_schema_version).where(LabTest.id.in_(missing))
+            )
+            for test_id, schema, version in result.all():
+                validator = ResultValidator(schema) if schema else None
+                if validator is not None:
+                    validator_cache.set(test_id, version, validator)
+                validators[test_id] = validator
+        return validators
+
+    async def get_report(self, report_id: UUID) -> Optional[TestReport]:
+        result = await self.db.execute(select(TestReport).where(TestReport.id == report_id))
+        return result.scalar_one_or_none()
+
+    async def create_reports(self, reports: Sequence[Tuple[UUID, Dict[str, Any], Optional[str]]]) -> List[TestReport]:
+        """Insert (order_test_id, flagged result, comments) rows in one statement.
+
+        Order tests that got a report meanwhile (a concurrent request) are
+        skipped; only the reports actually inserted are returned.
+        """
+        flagged_at = datetime.utcnow()
+        result = await self.db.scalars(
+            insert(TestReport)
+            .on_conflict_do_nothing(index_elements=[TestReport.order_test_id])
+            .returning(TestReport),
+            [
+                {"order_test_id": order_test_id, "result": result, "comments": comments, "flagged_at": flagged_at}
+                for order_test_id, result, comments in reports
+            ]
+        )
+        return list(result.all())
+
+    async def get_flag_inputs(self, test_id: Optional[UUID], after: Optional[UUID], limit: int) -> List[Row]:
+        """Next batch (keyset by report id) flattened by Postgres to one row per analyte value.
+
+        Rows are (report_id, test_id, analyte, value, age, gender) with value and
+        age already numeric (NULL when not understood; age in years, read as
+        parse_age reads it), so no per-value JSON handling happens in Python.
+        A report without results yields one row with a NULL analyte.
+        """
+        schema = current_schema()
+        result = await self.db.execute(
+            text(rf"""
+                WITH batch AS (
+                    SELECT r.id, ot.test_id, p.age, p.gender, r.result
+                    FROM "{schema}".test_reports r
+                    JOIN "{schema}".order_tests ot ON ot.id = r.order_test_id
+                    JOIN "{schema}".orders o ON o.id = ot.order_id
+                    JOIN "{schema}".patients p ON p.id = o.patient_id
+                    WHERE (CAST(:test_id AS uuid) IS NULL OR ot.test_id = CAST(:test_id AS uuid))
+                      AND (CAST(:after AS uuid) IS NULL OR r.id > CAST(:after AS uuid))
+                    ORDER BY r.id
+                    LIMIT :limit
+                ), entries AS (
+                    SELECT b.id, b.test_id, b.age, b.gender, e.key AS analyte,
+                           CASE jsonb_typeof(e.value) WHEN 'object' THEN e.value ->> 'value' ELSE e.value #>> '{{}}' END AS raw
+                    FROM batch b LEFT JOIN LATERAL jsonb_each(b.result) e ON true
+                )
+                SELECT id, test_id, analyte,
+                       CASE WHEN raw ~ '{NUMERIC_PATTERN}' THEN raw::float8 END AS value,
+                       a.m[1]::float8 * {AGE_UNIT_SQL} AS age,
+                       upper(left(trim(gender), 1)) AS gender
+                FROM entries CROSS JOIN LATERAL (SELECT regexp_match(age, :age_pattern, 'i') AS m) a
+                ORDER BY id
+            """),
+            {"test_id": test_id, "after": after, "limit": limit, "age_pattern": AGE_PATTERN},
+        )
+        return list(result.all())
+
+    async def apply_flags(self, report_ids: Sequence[UUID], analytes: Sequence[str], flags: Sequence[Optional[str]],
+                          lows: Sequence[Optional[float]], highs: Sequence[Optional[float]]) -> int:
+        """Merge flags into the stored results server-side, one UPDATE for the whole batch"""
+        if not report_ids:
+            return 0
+        schema = current_schema()
+        result = await self.db.execute(
+            text(f"""
+                UPDATE "{schema}".test_reports r
+                SET result = r.result || patch.entries, flagged_at = :flagged_at
+                FROM (
+                    SELECT u.id, jsonb_object_agg(
+                        u.analyte,
+                        CASE jsonb_typeof(t.result -> u.analyte)
+                            WHEN 'object' THEN t.result -> u.analyte
+                            ELSE jsonb_build_object('value', t.result -> u.analyte)
+                        END || jsonb_build_object(
+                            'flag', u.flag,
+                            'reference', CASE WHEN u.flag IS NULL THEN NULL
+                                              ELSE jsonb_build_object('low', u.low, 'high', u.high) END
+                        )
+                    ) AS entries
+                    FROM unnest(
+                        CAST(:ids AS uuid[]), CAST(:analytes AS text[]), CAST(:flags AS text[]),
+                        CAST(:lows AS float8[]), CAST(:highs AS float8[])
+                    ) AS u(id, analyte, flag, low, high)
+                    JOIN "{schema}".test_reports t ON t.id = u.id
+                    GROUP BY u.id
+                ) patch
+                WHERE r.id = patch.id
+            """),
+            {
+                "ids": list(report_ids), "analytes": list(analytes), "flags": list(flags),
+                "lows": list(lows), "highs": list(highs), "flagged_at": datetime.utcnow(),
+            },
+        )
+        return result.rowcount
+
+    async def record_observations(self, report_ids: Sequence[UUID]) -> int:
+        """Upsert the numeric analyte values of reports into the trend table.
+
+        Values are extracted by Postgres with the same parsing as re-flagging,
+        so the write path and the backfill produce identical rows.
+        """
+        if not report_ids:
+            return 0
+        schema = current_schema()
+        result = await self.db.execute(
+            text(rf"""
+                INSERT INTO "{schema}".analyte_observations (report_id, analyte, patient_id, observed_at, value, unit)
+                SELECT id, analyte, patient_id, observed_at, value, unit
+                FROM (
+                    SELECT r.id, e.key AS analyte, o.patient_id,
+                           coalesce(ot.sample_collected_at, r.created_at, o.ordered_at) AS observed_at,
+                           CASE WHEN v.raw ~ '{NUMERIC_PATTERN}' THEN v.raw::float8 END AS value,
+                           CASE jsonb_typeof(e.value) WHEN 'object' THEN left(e.value ->> 'unit', 20) END AS unit
+                    FROM "{schema}".test_reports r
+                    JOIN "{schema}".order_tests ot ON ot.id = r.order_test_id
+                    JOIN "{schema}".orders o ON o.id = ot.order_id
+                    CROSS JOIN LATERAL jsonb_each(r.result) e
+                    CROSS JOIN LATERAL (
+                        SELECT CASE jsonb_typeof(e.value) WHEN 'object' THEN e.value ->> 'value' ELSE e.value #>> '{{}}' END AS raw
+                    ) v
+                    WHERE r.id = ANY(CAST(:ids AS uuid[])) AND length(e.key) <= 50
+                ) entries
+                WHERE value IS NOT NULL AND observed_at IS NOT NULL
+                ON CONFLICT (report_id, analyte) DO UPDATE
+                SET patient_id = EXCLUDED.patient_id, observed_at = EXCLUDED.observed_at,
+                    value = EXCLUDED.value, unit = EXCLUDED.unit
+            """),
+            {"ids": list(report_ids)},
+        )
+        return result.rowcount
+
+    async def get_report_ids(self, after: Optional[UUID], limit: int) -> List[UUID]:
+        """Next batch of report ids in keyset order"""
+        query = select(TestReport.id).order_by(TestReport.id).limit(limit)
+        if after is not None:
+            query = query.where(TestReport.id > after)
+        result = await self.db.execute(query)
+        return list(result.scalars().all())
+
+def get_report_crud(db: AsyncSession) -> ReportCRUD:
+    return ReportCRUD(db)
@@ -0,0 +1,194 @@
+"""Vectorized reference-range flagging.
+
+Reference ranges are compiled into padded NumPy arrays of shape
+(analyte key, band): one row per (lab test, analyte), one column per
+gender/age band. A batch of N result values is flagged by gathering the N x
+bands candidate matrix, masking bands that do not apply to each patient,
+picking the most specific remaining band and comparing all values at once.
+"""
+
+import enum
+import re
+from typing import Any, Dict, Hashable, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.v1.api.patient.matching import normalize_gender, parse_age
+
+class ResultFlag(str, enum.Enum):
+    NORMAL = "NORMAL"
+    LOW = "LOW"
+    HIGH = "HIGH"
+    CRITICAL_LOW = "CRITICAL_LOW"
+    CRITICAL_HIGH = "CRITICAL_HIGH"
+
+# int8 flag codes produced by RangeTable.flag; 0 means no applicable range
+NO_RANGE = 0
+FLAG_BY_CODE: List[Optional[ResultFlag]] = [
+    None, ResultFlag.NORMAL, ResultFlag.LOW, ResultFlag.HIGH, ResultFlag.CRITICAL_LOW, ResultFlag.CRITICAL_HIGH
+]
+FLAG_VALUES = [flag.value if flag else None for flag in FLAG_BY_CODE]
+GENDER_CODES = {"M": 1, "F": 2}
+# A result value given as text is numeric when it matches this: "5", "-1.25", ".5", "5.", "1e3".
+# The SQL paths (re-flagging, trend observations) use the same pattern, so every path agrees.
+# Exponents are kept to two digits so the float8 cast in SQL cannot overflow.
+NUMERIC_PATTERN = r"^\s*[-+]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][-+]?[0-9]{1,2})?\s*$"
+_NUMERIC_REGEX = re.compile(NUMERIC_PATTERN)
+
+class RangeDef(NamedTuple):
+    test_id: Hashable
+    analyte: str
+    gender: Optional[str]
+    age_min: Optional[float]
+    age_max: Optional[float]
+    low: Optional[float]
+    high: Optional[float]
+    critical_low: Optional[float]
+    critical_high: Optional[float]
+
+def _float(value: Any) -> float:
+    return np.nan if value is None else float(value)
+
+class RangeTable:
+    """Reference ranges compiled for batch lookup"""
+
+    def __init__(self, ranges: Iterable[RangeDef]):
+        bands: Dict[Tuple[Hashable, str], List[RangeDef]] = {}
+        for definition in ranges:
+            bands.setdefault((definition.test_id, definition.analyte), []).append(definition)
+        self.key_index = {key: index for index, key in enumerate(bands)}
+
+        # The extra last row has no valid band and absorbs unknown keys
+        shape = (len(bands) + 1, max((len(rows) for rows in bands.values()), default=1))
+        self.valid = np.zeros(shape, dtype=bool)
+        self.gender = np.zeros(shape, dtype=np.int8)
+        self.age_min = np.full(shape, -np.inf)
+        self.age_max = np.full(shape, np.inf)
+        self.age_bounded = np.zeros(shape, dtype=bool)
+        self.specificity = np.zeros(shape, dtype=np.int8)
+        self.low, self.high, self.critical_low, self.critical_high = (np.full(shape, np.nan) for _ in range(4))
+
+        for key, rows in bands.items():
+            k = self.key_index[key]
+            for b, definition in enumerate(rows):
+                self.valid[k, b] = True
+                self.gender[k, b] = GENDER_CODES.get((definition.gender or "").upper(), 0)
+                if definition.age_min is not None:
+                    self.age_min[k, b] = definition.age_min
+                if definition.age_max is not None:
+                    self.age_max[k, b] = definition.age_max
+                bounded = definition.age_min is not None or definition.age_max is not None
+                self.age_bounded[k, b] = bounded
+                self.specificity[k, b] = 2 * (self.gender[k, b] != 0) + bounded
+                self.low[k, b] = _float(definition.low)
+                self.high[k, b] = _float(definition.high)
+                self.critical_low[k, b] = _float(definition.critical_low)
+                self.critical_high[k, b] = _float(definition.critical_high)
+
+    def keys_of(self, test_ids: Sequence[Hashable], analytes: Sequence[str]) -> np.ndarray:
+        missing = len(self.key_index)
+        return np.fromiter(
+            (self.key_index.get(key, missing) for key in zip(test_ids, analytes)), dtype=np.intp, count=len(test_ids)
+        )
+
+    def flag(self, keys: np.ndarray, values: np.ndarray, ages: np.ndarray,
+             genders: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Flag codes plus the applied (low, high) for N observations.
+
+        `keys` from keys_of, `ages` in years (NaN if unknown), `genders` as
+        GENDER_CODES (0 if unknown).
+        """
+        age = ages[:, None]
+        gender = self.gender[keys]
+        applies = self.valid[keys] & ((gender == 0) | (gender == genders[:, None]))
+        # An unknown age only matches bands without age bounds
+        in_band = (age >= self.age_min[keys]) & (age < self.age_max[keys])
+        applies &= in_band | (np.isnan(age) & ~self.age_bounded[keys])
+
+        ranked = np.where(applies, self.specificity[keys], -1)
+        band = ranked.argmax(axis=1)[:, None]
+        matched = np.take_along_axis(ranked, band, axis=1)[:, 0] >= 0
+
+        def pick(column: np.ndarray) -> np.ndarray:
+            return np.take_along_axis(column[keys], band, axis=1)[:, 0]
+
+        low, high = pick(self.low), pick(self.high)
+        # NaN bounds compare False, so a missing bound never triggers its flag
+        codes = np.select(
+            [values < pick(self.critical_low), values > pick(self.critical_high), values < low, values > high],
+            [4, 5, 2, 3],
+            default=1,
+        ).astype(np.int8)
+        codes[~matched | np.isnan(values)] = NO_RANGE
+        return codes, low, high
+
+def flag_columns(table: RangeTable, test_ids: Sequence[Hashable], analytes: Sequence[str],
+                 values: Sequence[Optional[float]], ages: Sequence[Optional[float]],
+                 genders: Sequence[Optional[str]]) -> Tuple[List[Optional[str]], List[Optional[float]], List[Optional[float]]]:
+    """Flag already flattened observations (one per analyte value, e.g. straight from SQL).
+
+    Returns flag names and the applied low/high bounds, None where no range applies.
+    """
+    codes, lows, highs = table.flag(
+        table.keys_of(test_ids, analytes),
+        np.array(values, dtype=float),  # None -> NaN
+        np.array(ages, dtype=float),
+        np.fromiter((GENDER_CODES.get(gender, 0) for gender in genders), dtype=np.int8, count=len(genders)),
+    )
+    matched = codes != NO_RANGE
+    flags = np.array(FLAG_VALUES, dtype=object)[codes].tolist()
+    lows = np.where(matched & ~np.isnan(lows), lows, None).tolist()
+    highs = np.where(matched & ~np.isnan(highs), highs, None).tolist()
+    return flags, lows, highs
+
+class ReportInput(NamedTuple):
+    test_id: Hashable
+    age: Optional[str]
+    gender: Optional[str]
+    result: Dict[str, Any]  # {"HGB": {"value": 13.2, "unit": "g/dL"}, ...}
+
+def _numeric(entry: Any) -> float:
+    value = entry.get("value") if isinstance(entry, dict) else entry
+    if type(value) is float or type(value) is int:
+        return value
+    if isinstance(value, str) and _NUMERIC_REGEX.match(value):
+        return float(value)
+    return np.nan
+
+def flag_reports(table: RangeTable, reports: Sequence[ReportInput]) -> List[Dict[str, Any]]:
+    """Results of many reports with `flag` and `reference` set per analyte, in one array pass"""
+    flagged: List[Dict[str, Any]] = []
+    targets, entries, test_ids, analytes, values, ages, genders = [], [], [], [], [], [], []
+    for report in reports:
+        age = parse_age(report.age)
+        age = np.nan if age is None else age
+        gender = GENDER_CODES.get(normalize_gender(report.gender), 0)
+        out: Dict[str, Any] = {}
+        flagged.append(out)
+        for analyte, entry in report.result.items():
+            targets.append(out)
+            entries.append(entry)
+            analytes.append(analyte)
+            values.append(_numeric(entry))
+        count = len(report.result)
+        test_ids.extend([report.test_id] * count)
+        ages.extend([age] * count)
+        genders.extend([gender] * count)
+    if not entries:
+        return flagged
+
+    codes, lows, highs = table.flag(
+        table.keys_of(test_ids, analytes),
+        np.asarray(values, dtype=float),
+        np.asarray(ages, dtype=float),
+        np.asarray(genders, dtype=np.int8),
+    )
+    # Missing bounds go out as None (NaN is not valid JSON)
+    lows = np.where(np.isnan(lows), None, lows).tolist()
+    highs = np.where(np.isnan(highs), None, highs).tolist()
+    for out, analyte, entry, code, low, high in zip(targets, analytes, entries, codes.tolist(), lows, highs):
+        entry = dict(entry) if isinstance(entry, dict) else {"value": entry}
+        entry["flag"] = FLAG_VALUES[code]
+        entry["reference"] = None if code == NO_RANGE else {"low": low, "high": high}
+        out[analyte] = entry
+    return flagged
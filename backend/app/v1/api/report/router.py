@@ -0,0 +1,53 @@
+# app/v1/api/report/router.py
+from fastapi import APIRouter, Depends, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from uuid import UUID
+
+from .schema import ReportCreate, ReportOut, ReportBulkCreate, ReportBulkResult, ObservationBackfill
+from .controller import get_report_controller
+from app.core.auth import require_admin, require_any_role
+from app.db.session import get_db
+from app.core.config import settings
+from app.jobs.queue import enqueue_job
+from app.models.user import User
+
+router = APIRouter(prefix=f"{settings.API_V1_STR}/reports", tags=["Reports"])
+
+@router.post("", response_model=ReportOut, status_code=status.HTTP_201_CREATED)
+async def create_report(
+    report_in: ReportCreate,
+    current_user: User = Depends(require_any_role),
+    db: AsyncSession = Depends(get_db)
+):
+    """Enter the results of an order test; each analyte is flagged against its reference range"""
+    controller = get_report_controller(db)
+    return await controller.create_report(report_in, current_user.id)
+
+@router.post("/bulk", response_model=ReportBulkResult)
+async def create_reports(
+    request: ReportBulkCreate,
+    current_user: User = Depends(require_any_role),
+    db: AsyncSession = Depends(get_db)
+):
+    """Ingest many reports at once; each is validated on its own and rejected ones are listed with their errors"""
+    controller = get_report_controller(db)
+    return await controller.create_reports(request, current_user.id)
+
+@router.post("/observations/backfill", response_model=ObservationBackfill, status_code=status.HTTP_202_ACCEPTED)
+async def backfill_observations(
+    _: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """(Re)build the analyte trend table from all stored reports, in background batches"""
+    job = await enqueue_job(db, "backfill_analyte_observations")
+    return ObservationBackfill(job_id=job.id)
+
+@router.get("/{report_id}", response_model=ReportOut)
+async def get_report(
+    report_id: UUID,
+    current_user: User = Depends(require_any_role),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get a report with its flagged results"""
+    controller = get_report_controller(db)
+    return await controller.get_report(report_id, current_user.id)
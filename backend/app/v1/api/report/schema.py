@@ -0,0 +1,50 @@
+from pydantic import BaseModel, ConfigDict, Field
+from uuid import UUID
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from enum import Enum
+
+from app.core.config import settings
+
+# ----- Input Schemas -----
+
+class ReportCreate(BaseModel):
+    order_test_id: UUID
+    # Analyte code -> {"value": ..., "unit": ...}
+    result: Dict[str, Dict[str, Any]]
+    comments: Optional[str] = None
+
+class ReportBulkCreate(BaseModel):
+    reports: List[ReportCreate] = Field(..., min_length=1, max_length=settings.REPORT_BULK_MAX_ITEMS)
+
+# ----- Output Schemas -----
+
+class ReportOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    order_test_id: UUID
+    result: Dict[str, Any]
+    comments: Optional[str] = None
+    created_at: Optional[datetime] = None
+    flagged_at: Optional[datetime] = None
+
+class ObservationBackfill(BaseModel):
+    job_id: UUID
+
+class IngestOutcome(str, Enum):
+    CREATED = "CREATED"
+    INVALID = "INVALID"  # rejected by the test's result schema
+    NOT_FOUND = "NOT_FOUND"
+    EXISTS = "EXISTS"  # the order test already has a report; report_id is that report
+    DUPLICATE = "DUPLICATE"  # the same order test came earlier in this batch
+
+class ReportIngestResult(BaseModel):
+    order_test_id: UUID
+    outcome: IngestOutcome
+    report_id: Optional[UUID] = None
+    errors: List[str] = []
+
+class ReportBulkResult(BaseModel):
+    results: List[ReportIngestResult]
+    created: int
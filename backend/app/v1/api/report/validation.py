@@ -0,0 +1,194 @@
+"""Per-test result schemas compiled into validators.
+
+A LabTest may carry a `result_schema` describing the analytes of its report:
+
+    {"analytes": {"HGB": {"type": "number", "unit": "g/dL", "min": 0, "max": 30},
+                  "ABO": {"type": "choice", "values": ["A", "B", "AB", "O"]},
+                  "NOTE": {"type": "text", "max_length": 200, "required": false}},
+     "allow_extra": false}
+
+`ResultValidator` compiles it once into one check closure per analyte, specialized
+on the analyte's type, so validating a result is a single walk over its
+entries without interpreting the schema again. Compiled validators are cached
+by (test id, schema version): every schema change bumps the version, so a
+cached validator is never stale and needs no invalidation.
+"""
+
+import math
+from collections import OrderedDict
+from typing import Any, Callable, Dict, FrozenSet, Hashable, List, Optional, Tuple
+
+ANALYTE_TYPES = ("number", "integer", "text", "choice", "boolean")
+
+# value -> (normalized value, error message or None)
+ValueCheck = Callable[[Any], Tuple[Any, Optional[str]]]
+
+def _number_check(spec: Dict[str, Any], integer: bool) -> ValueCheck:
+    low, high = spec.get("min"), spec.get("max")
+    expected = "an integer" if integer else "a number"
+
+    def check(value: Any) -> Tuple[Any, Optional[str]]:
+        kind = type(value)
+        if kind is not int and kind is not float:
+            if kind is not str:
+                return value, f"expected {expected}"
+            try:
+                value = float(value)
+            except ValueError:
+                return value, f"expected {expected}"
+        if math.isnan(value) or math.isinf(value):
+            return value, f"expected {expected}"
+        if integer:
+            if value != int(value):
+                return value, "expected an integer"
+            value = int(value)
+        if low is not None and value < low:
+            return value, f"below the minimum of {low}"
+        if high is not None and value > high:
+            return value, f"above the maximum of {high}"
+        return value, None
+
+    return check
+
+def _text_check(spec: Dict[str, Any]) -> ValueCheck:
+    max_length = spec.get("max_length")
+
+    def check(value: Any) -> Tuple[Any, Optional[str]]:
+        if type(value) is not str:
+            return value, "expected text"
+        if max_length is not None and len(value) > max_length:
+            return value, f"longer than {max_length} characters"
+        return value, None
+
+    return check
+
+def _choice_check(spec: Dict[str, Any]) -> ValueCheck:
+    # Case-insensitive lookup returning the canonical spelling
+    canonical = {str(choice).casefold(): choice for choice in spec["values"]}
+    allowed = ", ".join(str(choice) for choice in spec["values"])
+
+    def check(value: Any) -> Tuple[Any, Optional[str]]:
+        choice = canonical.get(value.casefold()) if type(value) is str else None
+        if choice is None:
+            return value, f"expected one of {allowed}"
+        return choice, None
+
+    return check
+
+_BOOLEANS = {"true": True, "false": False, "positive": True, "negative": False, "yes": True, "no": False}
+
+def _boolean_check(spec: Dict[str, Any]) -> ValueCheck:
+    def check(value: Any) -> Tuple[Any, Optional[str]]:
+        if type(value) is bool:
+            return value, None
+        parsed = _BOOLEANS.get(value.casefold()) if type(value) is str else None
+        if parsed is None:
+            return value, "expected true/false"
+        return parsed, None
+
+    return check
+
+def _value_check(spec: Dict[str, Any]) -> ValueCheck:
+    kind = spec.get("type", "number")
+    if kind == "number":
+        return _number_check(spec, integer=False)
+    if kind == "integer":
+        return _number_check(spec, integer=True)
+    if kind == "text":
+        return _text_check(spec)
+    if kind == "choice":
+        return _choice_check(spec)
+    if kind == "boolean":
+        return _boolean_check(spec)
+    raise ValueError(f"Unknown analyte type '{kind}'")
+
+class ResultValidator:
+    """A result schema compiled for repeated validation"""
+
+    __slots__ = ("checks", "units", "required", "allow_extra")
+
+    def __init__(self, schema: Dict[str, Any]):
+        analytes: Dict[str, Dict[str, Any]] = schema.get("analytes") or {}
+        self.checks: Dict[str, ValueCheck] = {code: _value_check(spec) for code, spec in analytes.items()}
+        # analyte -> (canonical unit, casefolded unit) for analytes with a fixed unit
+        self.units: Dict[str, Tuple[str, str]] = {
+            code: (spec["unit"], spec["unit"].casefold()) for code, spec in analytes.items() if spec.get("unit")
+        }
+        self.required: FrozenSet[str] = frozenset(
+            code for code, spec in analytes.items() if spec.get("required", True)
+        )
+        self.allow_extra: bool = bool(schema.get("allow_extra", False))
+
+    def validate(self, result: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+        """Normalized result plus the errors found, each as "<analyte>: <problem>".
+
+        Numeric strings become numbers, choices their canonical spelling and
+        missing units the schema's unit; other entry keys are kept as sent.
+        """
+        checks, units = self.checks, self.units
+        normalized: Dict[str, Any] = {}
+        errors: List[str] = []
+        for analyte, entry in result.items():
+            check = checks.get(analyte)
+            if check is None:
+                if self.allow_extra:
+                    normalized[analyte] = entry
+                else:
+                    errors.append(f"{analyte}: not an analyte of this test")
+                continue
+
+            entry = dict(entry) if type(entry) is dict else {"value": entry}
+            value = entry.get("value")
+            if value is None:
+                if analyte in self.required:
+                    errors.append(f"{analyte}: value is required")
+                continue
+            entry["value"], error = check(value)
+            if error is not None:
+                errors.append(f"{analyte}: {error}")
+                continue
+
+            unit = units.get(analyte)
+            if unit is not None:
+                sent = entry.get("unit")
+                if sent is None:
+                    entry["unit"] = unit[0]
+                elif type(sent) is not str or sent.casefold() != unit[1]:
+                    errors.append(f"{analyte}: unit must be {unit[0]}")
+                    continue
+                else:
+                    entry["unit"] = unit[0]
+            normalized[analyte] = entry
+
+        if not self.required <= result.keys():
+            errors.extend(f"{analyte}: value is required" for analyte in sorted(self.required.difference(result)))
+        return normalized, errors
+
+class ValidatorCache:
+    """Bounded LRU of compiled validators keyed by (test id, schema version)"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, int], ResultValidator]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, test_id: Hashable, version: int) -> Optional[ResultValidator]:
+        key = (str(test_id), version)
+        validator = self._entries.get(key)
+        if validator is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return validator
+
+    def set(self, test_id: Hashable, version: int, validator: ResultValidator) -> None:
+        key = (str(test_id), version)
+        self._entries[key] = validator
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
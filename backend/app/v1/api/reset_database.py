@@ -1,10 +1,24 @@
 # app/api/reset_database.py
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+import asyncpg
 import logging
+from app.db.branches import branches
 from app.db.dbconnection import db_manager
+from app.db.session import get_db
 from app.db.base import Base
+from app.db.snapshots import (
+    create_snapshot, drop_snapshot, list_snapshots, restore_snapshot, truncate_ddl, validate_snapshot_name,
+)
+from app.db.triggers import install_triggers
+from app.core.cache import invalidation_bus
+from app.core.auth import require_admin
 from app.core.config import settings
+from app.models.user import User
+from app.v1.api.order.accession import accession_allocator
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +31,30 @@ router = APIRouter(
     },
 )
 
+def _ensure_not_production() -> None:
+    if settings.ENV == "production":
+        logger.error("Attempted to reset database in production environment")
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Database reset not allowed in production environment"
+        )
+
+def _forget_local_state() -> None:
+    """Drop what this process holds about rows that no longer exist"""
+    accession_allocator.discard()
+    invalidation_bus.flush()
+
+async def _check_snapshot(name: str, exists: bool) -> None:
+    try:
+        validate_snapshot_name(name)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    if (name in await list_snapshots()) != exists:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND if exists else status.HTTP_409_CONFLICT,
+            detail=f"Snapshot '{name}' {'not found' if exists else 'already exists'}"
+        )
+
 @router.delete(
     "/reset-database",
     status_code=status.HTTP_200_OK,
@@ -42,26 +80,22 @@ router = APIRouter(
 )
 async def reset_database():
     """
-    Reset the entire database by dropping all tables and recreating them.
+    Reset the entire database by dropping all tables and recreating them, in every branch schema.
     This operation is destructive and should only be used in development/testing.
     """
-    if settings.ENV == "production":
-        logger.error("Attempted to reset database in production environment")
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Database reset not allowed in production environment"
-        )
+    _ensure_not_production()
 
     try:
         logger.info("Starting database reset process")
-        engine = db_manager.engine
-
-        # Drop and recreate all tables using async run_sync
-        async with engine.begin() as conn:
-            logger.info("Dropping all tables")
-            await conn.run_sync(Base.metadata.drop_all)
-            logger.info("Recreating all tables")
-            await conn.run_sync(Base.metadata.create_all)
+        for branch in branches.values():
+            # Drop and recreate all tables using async run_sync
+            async with db_manager.branch_engine(branch).begin() as conn:
+                logger.info(f"Dropping all tables of branch '{branch.name}'")
+                await conn.run_sync(Base.metadata.drop_all)
+                logger.info(f"Recreating all tables of branch '{branch.name}'")
+                await conn.run_sync(Base.metadata.create_all)
+                await install_triggers(conn, branch)
+        _forget_local_state()
 
         logger.info("Database reset completed successfully")
         return {
@@ -83,3 +117,78 @@ async def reset_database():
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=error_msg
         )
+
+@router.delete("/reset-database/truncate", status_code=status.HTTP_200_OK)
+async def truncate_database(current_user: User = Depends(require_admin)):
+    """
+    Empty every table of every branch with a single TRUNCATE each. Much faster than a reset,
+    but keeps the schema as it is, so model changes are not picked up.
+    """
+    _ensure_not_production()
+
+    try:
+        for branch in branches.values():
+            async with db_manager.engine_for(branch).begin() as conn:
+                logger.info(f"Truncating all tables of branch '{branch.name}' for user {current_user.id}")
+                await conn.execute(text(truncate_ddl(branch)))
+        _forget_local_state()
+    except SQLAlchemyError as e:
+        error_msg = f"Database truncate failed: {str(e)}"
+        logger.error(error_msg)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=error_msg)
+    return {"message": "Database truncated", "environment": settings.ENV}
+
+@router.get("/snapshots", response_model=List[str])
+async def get_snapshots(current_user: User = Depends(require_admin)):
+    """Names of the saved database snapshots"""
+    _ensure_not_production()
+    return await list_snapshots()
+
+@router.post("/snapshots/{name}", status_code=status.HTTP_201_CREATED)
+async def save_snapshot(name: str, db: AsyncSession = Depends(get_db),
+                        current_user: User = Depends(require_admin)):
+    """
+    Save the current database (every branch) as a named snapshot, e.g. right after seeding.
+    Clients connected to the database are disconnected while it is copied.
+    """
+    _ensure_not_production()
+    await _check_snapshot(name, exists=False)
+    try:
+        # Our own connections would block the copy, the one that authenticated this request included
+        await db.close()
+        await db_manager.dispose()
+        await create_snapshot(name)
+    except asyncpg.PostgresError as e:
+        error_msg = f"Saving snapshot failed: {str(e)}"
+        logger.error(error_msg)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=error_msg)
+    return {"message": f"Snapshot '{name}' saved"}
+
+@router.post("/snapshots/{name}/restore")
+async def restore_database_snapshot(name: str, db: AsyncSession = Depends(get_db),
+                                    current_user: User = Depends(require_admin)):
+    """
+    Replace the database with a saved snapshot. Copies files instead of rows, so a seeded
+    dataset comes back in a fraction of the time a reset and reseed takes.
+    """
+    _ensure_not_production()
+    await _check_snapshot(name, exists=True)
+    try:
+        await db.close()
+        await db_manager.dispose()
+        await restore_snapshot(name)
+    except asyncpg.PostgresError as e:
+        error_msg = f"Restoring snapshot failed: {str(e)}"
+        logger.error(error_msg)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=error_msg)
+    # Pooled connections to the dropped database are dead
+    await db_manager.dispose()
+    _forget_local_state()
+    return {"message": f"Database restored from snapshot '{name}'"}
+
+@router.delete("/snapshots/{name}")
+async def delete_snapshot(name: str, current_user: User = Depends(require_admin)):
+    _ensure_not_production()
+    await _check_snapshot(name, exists=True)
+    await drop_snapshot(name)
+    return {"message": f"Snapshot '{name}' deleted"}
@@ -0,0 +1,238 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+from pydantic import ValidationError
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+from datetime import datetime
+from fastapi import HTTPException, status
+import json
+
+from app.core.audit import audit_log
+from app.core.config import settings
+from app.models.audit import AuditAction
+from app.models.order import TEST_STATUS_TRANSITIONS, TestStatus
+from app.v1.api.order.controller import OrderController
+from app.v1.api.order.schema import BulkTransitionRequest, OrderTestTransitionItem, TransitionOutcome
+from app.v1.api.patient.crud import PatientCRUD
+from app.v1.api.patient.schema import PatientCreate, PatientUpdate
+from .crud import SyncCRUD
+from .cursor import SyncToken
+from .schema import (
+    MutationOutcome, MutationResult, OrderTestSync, SyncChange, SyncEntity, SyncMutation,
+    SyncUpload, SyncUploadResult,
+)
+
+def _errors(e: ValidationError) -> List[str]:
+    return [f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()]
+
+class SyncController:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.crud = SyncCRUD(db)
+
+    async def get_changes(self, token: Optional[str], limit: Optional[int]) -> bytes:
+        """The next page of changes after `token` (from the beginning without one), as JSON"""
+        if token:
+            after = SyncToken.decode(token)
+            if after is None:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Malformed sync token")
+            if after.expired():
+                raise HTTPException(
+                    status_code=status.HTTP_410_GONE,
+                    detail="Sync token has expired; sync again without a token"
+                )
+        else:
+            after = SyncToken.initial()
+        limit = min(limit or settings.SYNC_BATCH_SIZE, settings.SYNC_MAX_BATCH_SIZE)
+
+        horizon = await self.crud.get_horizon()
+        rows = await self.crud.get_changes(after, horizon, limit + 1)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if has_more:
+            # Continue mid-stream; the sync is not done, so it keeps its start time
+            next_token = SyncToken(rows[-1].change_txid, rows[-1].change_seq, after.started)
+        elif (horizon, 0) > (after.txid, after.seq):
+            # Caught up: everything below the horizon has been sent
+            next_token = SyncToken(horizon, 0, int(datetime.utcnow().timestamp()))
+        else:
+            next_token = after._replace(started=int(datetime.utcnow().timestamp()))
+
+        changes = ",".join(row.change for row in rows)
+        return (
+            f'{{"token":{json.dumps(next_token.encode())},"has_more":{json.dumps(has_more)},'
+            f'"changes":[{changes}]}}'
+        ).encode()
+
+    async def upload(self, upload: SyncUpload, actor_id: UUID) -> SyncUploadResult:
+        """Apply writes queued while offline.
+
+        A write only applies if its row is still at `base_seq`, so edits made
+        on the server in the meantime are never overwritten; the client gets
+        the server's row back instead. Several writes to the same row in one
+        upload (a tube collected then completed offline) build on each other:
+        only the first one's `base_seq` is checked.
+        """
+        results: Dict[int, MutationResult] = {}
+        order_tests: Dict[int, SyncMutation] = {}
+        written: Dict[UUID, Optional[int]] = {}  # patient id -> seq after this upload's last write, None if rejected
+        for index, mutation in enumerate(upload.mutations):
+            if mutation.entity == SyncEntity.ORDER_TESTS:
+                order_tests[index] = mutation
+            else:
+                results[index] = await self._apply_patient(mutation, written, actor_id)
+        if order_tests:
+            results.update(await self._apply_order_tests(order_tests, actor_id))
+
+        # Outcomes reported with the rows as they are now: new seqs, the server's side of conflicts
+        for entity in SyncEntity:
+            indexes = [
+                index for index, result in results.items()
+                if upload.mutations[index].entity == entity
+                and result.outcome in (MutationOutcome.APPLIED, MutationOutcome.CONFLICT)
+            ]
+            rows = await self.crud.get_rows(entity.value, [upload.mutations[index].id for index in indexes])
+            for index in indexes:
+                result = results[index]
+                row = rows.get(upload.mutations[index].id)
+                if row is None:
+                    result.outcome = MutationOutcome.NOT_FOUND
+                elif result.outcome == MutationOutcome.APPLIED:
+                    result.seq = row.seq
+                else:
+                    result.current = SyncChange(entity=entity.value, op="upsert", id=row.id, seq=row.seq, data=row.data)
+
+        ordered = [results[index] for index in range(len(upload.mutations))]
+        return SyncUploadResult(
+            results=ordered,
+            applied=sum(result.outcome == MutationOutcome.APPLIED for result in ordered)
+        )
+
+    async def _apply_patient(self, mutation: SyncMutation, written: Dict[UUID, Optional[int]],
+                             actor_id: UUID) -> MutationResult:
+        base_seq = mutation.base_seq
+        if mutation.id in written:
+            base_seq = written[mutation.id]
+            if base_seq is None:
+                # Builds on an earlier write of this upload that was rejected
+                return MutationResult(client_id=mutation.client_id, outcome=MutationOutcome.CONFLICT)
+
+        patient_crud = PatientCRUD(self.db)
+        if base_seq is None:
+            try:
+                patient_in = PatientCreate.model_validate(mutation.data)
+            except ValidationError as e:
+                return MutationResult(client_id=mutation.client_id, outcome=MutationOutcome.INVALID, errors=_errors(e))
+            try:
+                async with self.db.begin_nested():
+                    patient = await patient_crud.create_patient(patient_in, mutation.id)
+            except IntegrityError:
+                # Already created, e.g. an upload retried after its response was lost
+                written[mutation.id] = None
+                return MutationResult(client_id=mutation.client_id, outcome=MutationOutcome.CONFLICT)
+            await self.db.refresh(patient, ["change_seq"])
+            written[mutation.id] = patient.change_seq
+            audit_log.record(
+                AuditAction.CREATE, "patient", patient.id, actor_id, {"sync": mutation.client_id},
+                session=self.db,
+            )
+            return MutationResult(client_id=mutation.client_id, outcome=MutationOutcome.APPLIED)
+
+        try:
+            changes = PatientUpdate.model_validate(mutation.data).model_dump(exclude_unset=True)
+        except ValidationError as e:
+            return MutationResult(client_id=mutation.client_id, outcome=MutationOutcome.INVALID, errors=_errors(e))
+        if not changes:
+            return MutationResult(client_id=mutation.client_id, outcome=MutationOutcome.INVALID, errors=["Nothing to update"])
+        patient = await self.crud.update_patient(mutation.id, base_seq, changes)
+        if patient is None:
+            # Changed since base_seq, or never existed; told apart with the current rows
+            written[mutation.id] = None
+            return MutationResult(client_id=mutation.client_id, outcome=MutationOutcome.CONFLICT)
+        await patient_crud.replace_match_keys([patient])
+        written[mutation.id] = patient.change_seq
+        audit_log.record(
+            AuditAction.UPDATE, "patient", patient.id, actor_id,
+            {"sync": mutation.client_id, "fields": sorted(changes)}, session=self.db
+        )
+        return MutationResult(client_id=mutation.client_id, outcome=MutationOutcome.APPLIED)
+
+    async def _apply_order_tests(self, mutations: Dict[int, SyncMutation], actor_id: UUID) -> Dict[int, MutationResult]:
+        """Status changes of scanned tubes, applied through the bulk transition in rounds.
+
+        Round n applies every order test's n-th write of the upload, each
+        round as one bulk transition per target status.
+        """
+        results: Dict[int, MutationResult] = {}
+        queues: Dict[UUID, List[Tuple[int, SyncMutation, OrderTestSync]]] = {}
+        for index, mutation in mutations.items():
+            if mutation.base_seq is None and mutation.id not in queues:
+                results[index] = MutationResult(
+                    client_id=mutation.client_id, outcome=MutationOutcome.INVALID, errors=["base_seq is required"]
+                )
+                continue
+            try:
+                change = OrderTestSync.model_validate(mutation.data)
+            except ValidationError as e:
+                results[index] = MutationResult(client_id=mutation.client_id, outcome=MutationOutcome.INVALID, errors=_errors(e))
+                continue
+            if change.status not in TEST_STATUS_TRANSITIONS:
+                results[index] = MutationResult(
+                    client_id=mutation.client_id, outcome=MutationOutcome.INVALID,
+                    errors=[f"Order tests cannot be moved to {change.status.value}"]
+                )
+                continue
+            queues.setdefault(mutation.id, []).append((index, mutation, change))
+
+        expected = {order_test_id: queue[0][1].base_seq for order_test_id, queue in queues.items()}
+        order_controller = OrderController(self.db)
+        while queues:
+            batch = {order_test_id: queue.pop(0) for order_test_id, queue in queues.items()}
+            locked = set(await self.crud.lock_order_tests_at({order_test_id: expected[order_test_id] for order_test_id in batch}))
+
+            by_status: Dict[TestStatus, List[Tuple[int, SyncMutation, OrderTestSync]]] = {}
+            for order_test_id, (index, mutation, change) in batch.items():
+                if order_test_id in locked:
+                    by_status.setdefault(change.status, []).append((index, mutation, change))
+                else:
+                    results[index] = MutationResult(client_id=mutation.client_id, outcome=MutationOutcome.CONFLICT)
+            for target_status, group in by_status.items():
+                response = await order_controller.bulk_transition(
+                    BulkTransitionRequest(
+                        target_status=target_status,
+                        items=[
+                            OrderTestTransitionItem(order_test_id=mutation.id, collected_at=change.collected_at)
+                            for _, mutation, change in group
+                        ]
+                    ),
+                    actor_id
+                )
+                outcomes = {result.order_test_id: result.outcome for result in response.results}
+                for index, mutation, _ in group:
+                    outcome = outcomes[mutation.id]
+                    if outcome in (TransitionOutcome.UPDATED, TransitionOutcome.UNCHANGED):
+                        results[index] = MutationResult(client_id=mutation.client_id, outcome=MutationOutcome.APPLIED)
+                    elif outcome == TransitionOutcome.CONFLICT:
+                        results[index] = MutationResult(client_id=mutation.client_id, outcome=MutationOutcome.CONFLICT)
+                    else:
+                        results[index] = MutationResult(client_id=mutation.client_id, outcome=MutationOutcome.NOT_FOUND)
+
+            # Later writes of an order test build on this round only if it applied
+            applied = [
+                order_test_id for order_test_id, (index, _, _) in batch.items()
+                if results[index].outcome == MutationOutcome.APPLIED
+            ]
+            seqs = await self.crud.get_rows(SyncEntity.ORDER_TESTS.value, applied) if applied else {}
+            for order_test_id, (index, _, _) in batch.items():
+                if order_test_id in seqs:
+                    expected[order_test_id] = seqs[order_test_id].seq
+                    continue
+                for later_index, later, _ in queues.get(order_test_id, []):
+                    results[later_index] = MutationResult(client_id=later.client_id, outcome=MutationOutcome.CONFLICT)
+                queues.pop(order_test_id, None)
+            queues = {order_test_id: queue for order_test_id, queue in queues.items() if queue}
+        return results
+
+def get_sync_controller(db: AsyncSession) -> SyncController:
+    """Get SyncController instance"""
+    return SyncController(db)
@@ -0,0 +1,110 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, func, select, text, update
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.engine import Row
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+from uuid import UUID
+
+from app.db.branches import current_schema
+from app.models.patient import Patient
+from app.models.sync import SYNC_TABLES, SyncTombstone
+from .cursor import SyncToken
+
+class SyncCRUD:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_horizon(self) -> int:
+        """Transactions below this txid have all finished"""
+        result = await self.db.execute(select(func.txid_snapshot_xmin(func.txid_current_snapshot())))
+        return result.scalar_one()
+
+    async def get_changes(self, after: SyncToken, horizon: int, limit: int) -> List[Row]:
+        """Up to `limit` changes after `after` from transactions below `horizon`, in stream order.
+
+        Rows are (change_txid, change_seq, change) with `change` the SyncChange
+        JSON text built by Postgres. Each table contributes at most `limit`
+        rows from an index range scan on (change_txid, change_seq) before the
+        merge.
+        """
+        schema = current_schema()
+        sources = [
+            f"""(
+                SELECT t.change_txid, t.change_seq, json_build_object(
+                    'entity', '{table}', 'op', 'upsert', 'id', t.id, 'seq', t.change_seq,
+                    'data', to_jsonb(t) - 'change_txid' - 'change_seq'
+                )::text AS change
+                FROM "{schema}".{table} t
+                WHERE (t.change_txid, t.change_seq) > (:txid, :seq) AND t.change_txid < :horizon
+                ORDER BY t.change_txid, t.change_seq
+                LIMIT :limit
+            )"""
+            for table in SYNC_TABLES
+        ]
+        sources.append(f"""(
+            SELECT d.change_txid, d.change_seq, json_build_object(
+                'entity', d.entity, 'op', 'delete', 'id', d.entity_id, 'seq', d.change_seq
+            )::text AS change
+            FROM "{schema}".sync_tombstones d
+            WHERE (d.change_txid, d.change_seq) > (:txid, :seq) AND d.change_txid < :horizon
+            ORDER BY d.change_txid, d.change_seq
+            LIMIT :limit
+        )""")
+        result = await self.db.execute(
+            text(f"""
+                SELECT change_txid, change_seq, change
+                FROM ({" UNION ALL ".join(sources)}) changes
+                ORDER BY change_txid, change_seq
+                LIMIT :limit
+            """),
+            {"txid": after.txid, "seq": after.seq, "horizon": horizon, "limit": limit},
+        )
+        return list(result.all())
+
+    async def get_rows(self, entity: str, ids: Sequence[UUID]) -> Dict[UUID, Row]:
+        """Current (id, seq, data) of synced rows, shaped like their SyncChange"""
+        if not ids:
+            return {}
+        result = await self.db.execute(
+            text(f"""
+                SELECT t.id, t.change_seq AS seq, to_jsonb(t) - 'change_txid' - 'change_seq' AS data
+                FROM "{current_schema()}".{entity} t
+                WHERE t.id = ANY(CAST(:ids AS uuid[]))
+            """).columns(data=JSONB),
+            {"ids": list(ids)},
+        )
+        return {row.id: row for row in result}
+
+    async def update_patient(self, patient_id: UUID, base_seq: int, values: Dict[str, Any]) -> Optional[Patient]:
+        """Apply an offline edit only if the patient is still at `base_seq`"""
+        result = await self.db.execute(
+            update(Patient)
+            .where(Patient.id == patient_id, Patient.change_seq == base_seq)
+            .values(**values)
+            .returning(Patient)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        return result.scalar_one_or_none()
+
+    async def lock_order_tests_at(self, seqs: Dict[UUID, int]) -> List[UUID]:
+        """Lock the order tests still at their expected seq; returns their ids"""
+        result = await self.db.execute(
+            text(f"""
+                SELECT t.id FROM "{current_schema()}".order_tests t
+                JOIN unnest(CAST(:ids AS uuid[]), CAST(:seqs AS bigint[])) AS expected(id, seq)
+                  ON expected.id = t.id AND expected.seq = t.change_seq
+                ORDER BY t.id
+                FOR UPDATE OF t
+            """),
+            {"ids": list(seqs), "seqs": list(seqs.values())},
+        )
+        return list(result.scalars().all())
+
+    async def purge_tombstones(self, before: datetime) -> int:
+        result = await self.db.execute(delete(SyncTombstone).where(SyncTombstone.deleted_at < before))
+        return result.rowcount
+
+def get_sync_crud(db: AsyncSession) -> SyncCRUD:
+    """Get SyncCRUD instance"""
+    return SyncCRUD(db)
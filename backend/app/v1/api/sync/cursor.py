@@ -0,0 +1,51 @@
+"""Sync tokens: positions in the change stream of the synced tables.
+
+Every insert or update of a synced row stamps it with (change_txid,
+change_seq): the id of the writing transaction and a value from the branch's
+sync_change_seq. Deletes leave a tombstone stamped the same way. A token is
+the position (txid, seq) up to which a client has all changes, and the next
+page is every row ordered after it by (change_txid, change_seq).
+
+Sequence values are taken when a row is written, not when its transaction
+commits, so a plain "seq > token" cursor would skip rows of transactions that
+commit after a later sequence value was already handed out. Pages therefore
+only contain rows whose transaction is below the current snapshot's xmin:
+all those transactions have finished, and every transaction that has not
+will get a txid of at least xmin, so it sorts after any position handed out
+so far. A long-running transaction delays sync until it ends, the same trade
+the payment ledger rollup makes.
+
+The token also carries when the client's sync started. Tombstones are purged
+after SYNC_TOMBSTONE_RETENTION_DAYS, so older tokens could miss deletes and
+are rejected; the client then syncs again from scratch.
+"""
+
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional
+
+from app.core.config import settings
+
+class SyncToken(NamedTuple):
+    txid: int
+    seq: int
+    started: int  # Unix time the sync this token continues began
+
+    def encode(self) -> str:
+        return f"{self.txid}-{self.seq}-{self.started}"
+
+    @classmethod
+    def decode(cls, token: str) -> Optional["SyncToken"]:
+        """None for a malformed token"""
+        parts = token.split("-")
+        # isdigit alone also accepts digits int() cannot read, such as "²"
+        if len(parts) != 3 or not all(part.isascii() and part.isdigit() for part in parts):
+            return None
+        return cls(*(int(part) for part in parts))
+
+    @classmethod
+    def initial(cls) -> "SyncToken":
+        return cls(0, 0, int(datetime.utcnow().timestamp()))
+
+    def expired(self) -> bool:
+        retention = timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+        return datetime.utcfromtimestamp(self.started) < datetime.utcnow() - retention
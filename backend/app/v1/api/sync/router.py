@@ -0,0 +1,48 @@
+# app/v1/api/sync/router.py
+from fastapi import APIRouter, Depends, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from .schema import SyncPage, SyncUpload, SyncUploadResult
+from .controller import get_sync_controller
+from app.core.auth import require_any_role
+from app.db.session import get_db
+from app.core.config import settings
+from app.models.user import User
+
+router = APIRouter(prefix=f"{settings.API_V1_STR}/sync", tags=["Sync"])
+
+@router.get(
+    "/changes",
+    response_class=Response,
+    responses={status.HTTP_200_OK: {"model": SyncPage, "content": {"application/json": {}}}},
+)
+async def get_changes(
+    token: Optional[str] = Query(None, max_length=64),
+    limit: Optional[int] = Query(None, ge=1, le=settings.SYNC_MAX_BATCH_SIZE),
+    _: User = Depends(require_any_role),
+    db: AsyncSession = Depends(get_db)
+):
+    """Patients, consultants, tests, orders and order tests changed since `token`.
+
+    Without a token the whole data set is sent. Keep requesting with the
+    returned token while `has_more` is true; once it is false, store the token
+    for the next sync. Deleted rows come as changes with op "delete". A 410
+    means the token is older than the tombstone retention: start over without one.
+    """
+    controller = get_sync_controller(db)
+    return Response(await controller.get_changes(token, limit), media_type="application/json")
+
+@router.post("/upload", response_model=SyncUploadResult)
+async def upload(
+    upload: SyncUpload,
+    current_user: User = Depends(require_any_role),
+    db: AsyncSession = Depends(get_db)
+):
+    """Apply patient registrations and edits and tube scans queued while offline.
+
+    Each write is checked against the `seq` the client based it on; rows
+    changed on the server since are returned as conflicts, with the server's row.
+    """
+    controller = get_sync_controller(db)
+    return await controller.upload(upload, current_user.id)
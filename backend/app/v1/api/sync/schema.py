@@ -0,0 +1,66 @@
+from pydantic import BaseModel, Field
+from uuid import UUID
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from enum import Enum
+
+from app.core.config import settings
+from app.models.order import TestStatus
+
+# ----- Input Schemas -----
+
+class SyncEntity(str, Enum):
+    """Tables a collection center may write to while offline"""
+    PATIENTS = "patients"
+    ORDER_TESTS = "order_tests"
+
+class SyncMutation(BaseModel):
+    client_id: str = Field(..., min_length=1, max_length=64)  # the client's queue entry, echoed back
+    entity: SyncEntity
+    id: UUID  # generated offline for new patients
+    # `seq` of the row as the client last synced it; None creates a patient.
+    # The write is only applied if the row has not changed since.
+    base_seq: Optional[int] = None
+    # patients: PatientCreate fields to create, PatientUpdate fields to update;
+    # order_tests: {"status": "SAMPLE_COLLECTED" | "COMPLETED", "collected_at": optional scan time}
+    data: Dict[str, Any]
+
+class OrderTestSync(BaseModel):
+    """`data` of an order_tests mutation"""
+    status: TestStatus
+    collected_at: Optional[datetime] = None  # scan time, defaults to upload time
+
+class SyncUpload(BaseModel):
+    mutations: List[SyncMutation] = Field(..., min_length=1, max_length=settings.SYNC_UPLOAD_MAX_ITEMS)
+
+# ----- Output Schemas -----
+
+class SyncChange(BaseModel):
+    entity: str
+    op: str  # "upsert" or "delete"
+    id: UUID
+    seq: int  # base_seq for uploads touching this row
+    data: Optional[Dict[str, Any]] = None  # the whole row; None for deletes
+
+class SyncPage(BaseModel):
+    """Documents the /v1/sync/changes body, which Postgres builds (SyncCRUD.get_changes)"""
+    token: str  # pass back to continue; store once has_more is false
+    has_more: bool
+    changes: List[SyncChange]
+
+class MutationOutcome(str, Enum):
+    APPLIED = "APPLIED"
+    CONFLICT = "CONFLICT"  # changed on the server since base_seq (or created twice); see `current`
+    NOT_FOUND = "NOT_FOUND"
+    INVALID = "INVALID"
+
+class MutationResult(BaseModel):
+    client_id: str
+    outcome: MutationOutcome
+    seq: Optional[int] = None  # new seq of the row once applied
+    current: Optional[SyncChange] = None  # the server's row on conflict
+    errors: List[str] = []
+
+class SyncUploadResult(BaseModel):
+    results: List[MutationResult]
+    applied: int
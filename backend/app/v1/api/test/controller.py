@@ -0,0 +1,103 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Optional
+from uuid import UUID
+from fastapi import HTTPException, status
+
+from app.core.cache import InvalidationHook, invalidation_bus
+from app.core.compression import PayloadCache
+from app.core.config import settings
+from app.db.branches import current_branch
+from app.db.session import get_db_context
+from app.jobs.queue import enqueue_job
+from .crud import LabTestCRUD, get_lab_test_crud
+from .schema import (
+    LabTestCatalog, LabTestOut, ReferenceRangeOut,
+    ReferenceRangeUpdate, ReferenceRangeUpdateResult, ResultSchema, ResultSchemaOut
+)
+
+async def build_catalog_snapshot() -> bytes:
+    """Serialize the current branch's lab-test catalog once for the precompressed snapshot"""
+    async with get_db_context() as db:
+        tests = await get_lab_test_crud(db).get_catalog()
+        catalog = LabTestCatalog(tests=[LabTestOut.model_validate(test) for test in tests])
+    return catalog.model_dump_json().encode()
+
+# Catalog snapshot per branch. Kept out of a LocalCache so it keeps serving
+# while the listener is down; the snapshot TTL then bounds staleness.
+_catalog_snapshots: Dict[str, PayloadCache] = {}
+
+def catalog_snapshot() -> PayloadCache:
+    """Snapshot cache of the current branch's catalog"""
+    branch = current_branch().name
+    snapshot = _catalog_snapshots.get(branch)
+    if snapshot is None:
+        snapshot = PayloadCache(build_catalog_snapshot, ttl_seconds=settings.CATALOG_SNAPSHOT_TTL_SECONDS)
+        _catalog_snapshots[branch] = snapshot
+    return snapshot
+
+def _drop_catalog_snapshot(branch: Optional[str]) -> None:
+    """Invalidate one branch's snapshot in this worker, or all of them (None)"""
+    for name, snapshot in _catalog_snapshots.items():
+        if branch is None or name == branch:
+            snapshot.invalidate()
+
+invalidation_bus.register(InvalidationHook("lab_test_catalog", _drop_catalog_snapshot))
+
+async def invalidate_catalog(db: AsyncSession) -> None:
+    """Drop the current branch's catalog snapshot in every worker once `db` commits"""
+    await invalidation_bus.publish(db, "lab_test_catalog", current_branch().name)
+
+class LabTestController:
+    """Business logic layer for lab test operations"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.crud = LabTestCRUD(db)
+
+    async def get_reference_ranges(self, test_id: UUID) -> List[ReferenceRangeOut]:
+        if await self.crud.get_lab_test(test_id) is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Lab test not found")
+        return [ReferenceRangeOut.model_validate(r) for r in await self.crud.get_reference_ranges(test_id)]
+
+    async def replace_reference_ranges(self, test_id: UUID, update: ReferenceRangeUpdate) -> ReferenceRangeUpdateResult:
+        """Replace a test's ranges and re-flag its existing reports in the background"""
+        if await self.crud.get_lab_test(test_id) is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Lab test not found")
+        for reference in update.ranges:
+            if reference.age_min is not None and reference.age_max is not None and reference.age_min >= reference.age_max:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail=f"age_min must be below age_max for {reference.analyte}"
+                )
+
+        ranges = await self.crud.replace_reference_ranges(test_id, update.ranges)
+        await invalidation_bus.publish(self.db, "reference_ranges", current_branch().name)
+        await invalidate_catalog(self.db)
+        job = await enqueue_job(self.db, "reflag_reports", {"test_id": str(test_id)})
+        return ReferenceRangeUpdateResult(
+            ranges=[ReferenceRangeOut.model_validate(r) for r in ranges], reflag_job_id=job.id
+        )
+
+    async def get_result_schema(self, test_id: UUID) -> ResultSchemaOut:
+        test = await self.crud.get_lab_test(test_id)
+        if test is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Lab test not found")
+        return ResultSchemaOut(test_id=test.id, version=test.result_schema_version, result_schema=test.result_schema)
+
+    async def set_result_schema(self, test_id: UUID, schema: Optional[ResultSchema]) -> ResultSchemaOut:
+        """Replace (or with None, drop) the schema that results of this test are validated against.
+
+        Existing reports are left as they are; the new version takes effect for
+        result entry as soon as this commits, since validators are cached per version.
+        """
+        version = await self.crud.set_result_schema(
+            test_id, schema.model_dump(exclude_none=True) if schema is not None else None
+        )
+        if version is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Lab test not found")
+        await invalidate_catalog(self.db)
+        return ResultSchemaOut(test_id=test_id, version=version, result_schema=schema)
+
+def get_lab_test_controller(db: AsyncSession) -> LabTestController:
+    """Get LabTestController instance"""
+    return LabTestController(db)
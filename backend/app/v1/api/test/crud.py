@@ -0,0 +1,49 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, update
+from typing import Any, Dict, List, Optional, Sequence
+from uuid import UUID
+
+from app.models.test import LabTest, ReferenceRange
+from .schema import ReferenceRangeIn
+
+class LabTestCRUD:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_catalog(self) -> List[LabTest]:
+        """Get all lab tests ordered by name"""
+        result = await self.db.execute(select(LabTest).order_by(LabTest.name))
+        return list(result.scalars().all())
+
+    async def get_lab_test(self, test_id: UUID) -> Optional[LabTest]:
+        result = await self.db.execute(select(LabTest).where(LabTest.id == test_id))
+        return result.scalar_one_or_none()
+
+    async def get_reference_ranges(self, test_id: UUID) -> List[ReferenceRange]:
+        result = await self.db.execute(
+            select(ReferenceRange)
+            .where(ReferenceRange.test_id == test_id)
+            .order_by(ReferenceRange.analyte, ReferenceRange.gender, ReferenceRange.age_min)
+        )
+        return list(result.scalars().all())
+
+    async def replace_reference_ranges(self, test_id: UUID, ranges: Sequence[ReferenceRangeIn]) -> List[ReferenceRange]:
+        """Swap the whole set of ranges of a test"""
+        await self.db.execute(delete(ReferenceRange).where(ReferenceRange.test_id == test_id))
+        rows = [ReferenceRange(test_id=test_id, **reference.model_dump()) for reference in ranges]
+        self.db.add_all(rows)
+        await self.db.flush()
+        return rows
+
+    async def set_result_schema(self, test_id: UUID, schema: Optional[Dict[str, Any]]) -> Optional[int]:
+        """Store a test's result schema; returns the new schema version"""
+        result = await self.db.execute(
+            update(LabTest)
+            .where(LabTest.id == test_id)
+            .values(result_schema=schema, result_schema_version=LabTest.result_schema_version + 1)
+            .returning(LabTest.result_schema_version)
+        )
+        return result.scalar_one_or_none()
+
+def get_lab_test_crud(db: AsyncSession) -> LabTestCRUD:
+    return LabTestCRUD(db)
@@ -0,0 +1,65 @@
+# app/v1/api/test/router.py
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from uuid import UUID
+
+from .controller import catalog_snapshot, get_lab_test_controller
+from .schema import (
+    LabTestCatalog, ReferenceRangeOut, ReferenceRangeUpdate, ReferenceRangeUpdateResult,
+    ResultSchema, ResultSchemaOut
+)
+from app.core.auth import get_current_active_user, require_admin
+from app.db.session import get_db
+from app.core.config import settings
+from app.models.user import User
+
+router = APIRouter(prefix=f"{settings.API_V1_STR}/tests", tags=["Lab Tests"])
+
+@router.get("/catalog", response_model=LabTestCatalog)
+async def get_catalog(request: Request, _: User = Depends(get_current_active_user)) -> Response:
+    """Lab-test catalog snapshot, precompressed and revalidated by ETag"""
+    payload = await catalog_snapshot().get()
+    return payload.response(request, max_age=settings.CATALOG_SNAPSHOT_TTL_SECONDS)
+
+@router.get("/{test_id}/reference-ranges", response_model=List[ReferenceRangeOut])
+async def get_reference_ranges(
+    test_id: UUID,
+    _: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Reference ranges of a lab test per analyte, gender and age band"""
+    controller = get_lab_test_controller(db)
+    return await controller.get_reference_ranges(test_id)
+
+@router.put("/{test_id}/reference-ranges", response_model=ReferenceRangeUpdateResult)
+async def replace_reference_ranges(
+    test_id: UUID,
+    update: ReferenceRangeUpdate,
+    _: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """Replace the reference ranges of a lab test; existing reports are re-flagged in the background"""
+    controller = get_lab_test_controller(db)
+    return await controller.replace_reference_ranges(test_id, update)
+
+@router.get("/{test_id}/result-schema", response_model=ResultSchemaOut)
+async def get_result_schema(
+    test_id: UUID,
+    _: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Analytes, units, types and allowed values that results of a lab test are validated against"""
+    controller = get_lab_test_controller(db)
+    return await controller.get_result_schema(test_id)
+
+@router.put("/{test_id}/result-schema", response_model=ResultSchemaOut)
+async def set_result_schema(
+    test_id: UUID,
+    schema: Optional[ResultSchema] = None,
+    _: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """Replace the result schema of a lab test; an empty body removes it"""
+    controller = get_lab_test_controller(db)
+    return await controller.set_result_schema(test_id, schema)
@@ -0,0 +1,66 @@
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+from uuid import UUID
+from decimal import Decimal
+from typing import Dict, List, Literal, Optional
+
+class LabTestOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    name: str
+    description: Optional[str] = None
+    cost: Decimal
+    sample_required: Optional[str] = None
+
+class LabTestCatalog(BaseModel):
+    tests: List[LabTestOut]
+
+class ReferenceRangeIn(BaseModel):
+    analyte: str = Field(..., min_length=1, max_length=20)
+    gender: Optional[Literal["M", "F"]] = None
+    age_min: Optional[int] = Field(None, ge=0)
+    age_max: Optional[int] = Field(None, ge=0)
+    low: Optional[Decimal] = None
+    high: Optional[Decimal] = None
+    critical_low: Optional[Decimal] = None
+    critical_high: Optional[Decimal] = None
+    unit: Optional[str] = Field(None, max_length=20)
+
+class ReferenceRangeOut(ReferenceRangeIn):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    test_id: UUID
+
+class ReferenceRangeUpdate(BaseModel):
+    ranges: List[ReferenceRangeIn] = Field(..., max_length=500)
+
+class ReferenceRangeUpdateResult(BaseModel):
+    ranges: List[ReferenceRangeOut]
+    reflag_job_id: UUID
+
+class AnalyteSpec(BaseModel):
+    type: Literal["number", "integer", "text", "choice", "boolean"] = "number"
+    unit: Optional[str] = Field(None, max_length=20)
+    required: bool = True
+    min: Optional[float] = None  # number / integer
+    max: Optional[float] = None
+    values: Optional[List[str]] = Field(None, min_length=1, max_length=100)  # choice
+    max_length: Optional[int] = Field(None, ge=1)  # text
+
+    @model_validator(mode="after")
+    def check_type_options(self) -> "AnalyteSpec":
+        if self.type == "choice" and not self.values:
+            raise ValueError("a choice analyte needs its allowed values")
+        if self.min is not None and self.max is not None and self.min > self.max:
+            raise ValueError("min must not be above max")
+        return self
+
+class ResultSchema(BaseModel):
+    analytes: Dict[str, AnalyteSpec] = Field(..., min_length=1, max_length=500)
+    allow_extra: bool = False  # accept analytes not listed, unchecked
+
+class ResultSchemaOut(BaseModel):
+    test_id: UUID
+    version: int
+    result_schema: Optional[ResultSchema] = None
@@ -1,5 +1,6 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, delete
+from sqlalchemy.engine import Row
 from sqlalchemy.exc import IntegrityError
 from typing import Optional, List
 from uuid import UUID
@@ -8,8 +9,15 @@ from datetime import datetime
 from app.models.user import User, UserRole
 from app.core.security import hash_password, verify_password
 from app.core.auth import get_refresh_token_expire_time
+from app.core.cache import invalidation_bus, row_version
+from app.db.rows import RowMapper
 from .schema import UserCreate, UserUpdate
 
+# Columns of UserOut, for list endpoints that skip ORM hydration
+USER_ROWS = RowMapper(
+    User.id, User.username, User.full_name, User.role, User.is_active, User.created_at, User.updated_at
+)
+
 class UserCRUD:
     def __init__(self, db: AsyncSession):
         self.db = db
@@ -42,12 +50,14 @@ class UserCRUD:
         )
         return result.scalar_one_or_none()
 
-    async def get_users(self, skip: int = 0, limit: int = 100, is_active: Optional[bool] = None) -> List[User]:
-        query = select(User).offset(skip).limit(limit)
+    async def get_users(self, skip: int = 0, limit: int = 100, is_active: Optional[bool] = None) -> List[Row]:
+        """USER_ROWS rows, newest first"""
+        query = USER_ROWS.select().offset(skip).limit(limit)
         if is_active is not None:
             query = query.where(User.is_active == is_active)
         result = await self.db.execute(query.order_by(User.created_at.desc()))
-        return list(result.scalars().all())
+        return list(result.all())
+
     async def update_user(self, user_id: UUID, user_data: UserUpdate) -> Optional[User]:
         """Update user information"""
         update_data = user_data.model_dump(exclude_unset=True)
@@ -67,6 +77,7 @@ class UserCRUD:
         
         updated_user = result.scalar_one_or_none()
         if updated_user:
+            await invalidation_bus.publish(self.db, "user", user_id, row_version(updated_user.updated_at))
             await self.db.commit()
         else:
             await self.db.rollback()
@@ -76,10 +87,12 @@ class UserCRUD:
     async def delete_user(self, user_id: UUID) -> bool:
         """Delete user (hard delete)"""
         result = await self.db.execute(
-            delete(User).where(User.id == user_id)
+            delete(User).where(User.id == user_id).returning(User.updated_at)
         )
+        updated_at = result.scalar_one_or_none()
         
-        if result.rowcount > 0:
+        if updated_at is not None:
+            await invalidation_bus.publish(self.db, "user", user_id, row_version(updated_at))
             await self.db.commit()
             return True
         else:
@@ -176,15 +189,15 @@ class UserCRUD:
             await self.db.rollback()
             return False
 
-    async def get_users_by_role(self, role: UserRole, is_active: bool = True) -> List[User]:
-        """Get users by role"""
+    async def get_users_by_role(self, role: UserRole, is_active: bool = True) -> List[Row]:
+        """Get users by role, as USER_ROWS rows"""
         result = await self.db.execute(
-            select(User).where(
+            USER_ROWS.select().where(
                 User.role == role,
                 User.is_active == is_active
             ).order_by(User.created_at.desc())
         )
-        return list(result.scalars().all())
+        return list(result.all())
 
 def get_user_crud(db: AsyncSession) -> UserCRUD:
     """Get UserCRUD instance"""
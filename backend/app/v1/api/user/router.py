@@ -9,7 +9,7 @@ from .schema import (
     TokenResponse, RefreshTokenResponse, PasswordChange, 
     RefreshTokenRequest, MessageResponse
 )
-from .crud import get_user_crud, UserCRUD
+from .crud import get_user_crud, UserCRUD, USER_ROWS
 from app.core.auth import (
     create_access_token, create_refresh_token, decode_token, 
     get_current_user, get_current_active_user, require_admin,
@@ -242,7 +242,8 @@ async def get_users(
     else:
         users = await user_crud.get_users(skip, limit, is_active)
     
-    return users
+    # Column rows serialized directly; response_model only documents the shape
+    return USER_ROWS.response(users)
 
 @router.get("/users/{user_id}", response_model=UserOut)
 async def get_user(
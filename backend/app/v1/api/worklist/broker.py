@@ -0,0 +1,95 @@
+"""In-process fan-out of worklist NOTIFY events to SSE subscribers"""
+
+import asyncio
+import json
+import logging
+from collections import deque
+from typing import Deque, List, Optional, Set
+
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.db.notify import notification_listener
+from .schema import WorklistEvent, WorklistFilter
+
+logger = logging.getLogger(__name__)
+
+# Sentinel pushed to a subscriber whose view can no longer be trusted
+RESYNC = None
+
+class WorklistSubscription:
+    def __init__(self, filters: WorklistFilter, branch: str):
+        self.filters = filters
+        self.branch = branch
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.WORKLIST_CLIENT_QUEUE_SIZE)
+
+    def push(self, event: Optional[WorklistEvent]) -> None:
+        if event is not None and (event.branch != self.branch or not self.filters.matches(event)):
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too far behind: drop the backlog and make the client start over
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+class WorklistBroker:
+    """Shares the process-wide LISTEN connection between all worklist streams"""
+
+    def __init__(self):
+        self._subscriptions: Set[WorklistSubscription] = set()
+        self._recent: Deque[WorklistEvent] = deque(maxlen=settings.WORKLIST_BUFFER_SIZE)
+        self._started = False
+
+    async def subscribe(self, filters: WorklistFilter, branch: str) -> WorklistSubscription:
+        if not self._started:
+            self._started = True
+            await notification_listener.subscribe(settings.WORKLIST_NOTIFY_CHANNEL, self._on_notify)
+            notification_listener.on_reconnect(self._on_reconnect)
+        subscription = WorklistSubscription(filters, branch)
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: WorklistSubscription) -> None:
+        self._subscriptions.discard(subscription)
+
+    def last_event_id(self, branch: str) -> Optional[int]:
+        for event in reversed(self._recent):
+            if event.branch == branch:
+                return event.event_id
+        return None
+
+    def events_after(self, event_id: int, branch: str) -> Optional[List[WorklistEvent]]:
+        """Events of `branch` delivered after event_id, or None if it is no longer buffered.
+
+        Ids come from a sequence and NOTIFYs arrive in commit order, so ids are
+        not strictly increasing; resume by position rather than by comparison.
+        """
+        events = [event for event in self._recent if event.branch == branch]
+        for position, event in enumerate(events):
+            if event.event_id == event_id:
+                return events[position + 1:]
+        return None
+
+    def _on_notify(self, channel: str, payload: str) -> None:
+        try:
+            data = json.loads(payload)
+            event = WorklistEvent(
+                event_id=data.pop("event_id"), op=data.pop("op"), branch=data.pop("branch", None),
+                old_status=data.pop("old_status", None), item=data
+            )
+        except (ValueError, KeyError, ValidationError) as e:
+            logger.warning(f"Ignoring malformed worklist notification: {str(e)}")
+            return
+        self._recent.append(event)
+        for subscription in self._subscriptions:
+            subscription.push(event)
+
+    def _on_reconnect(self) -> None:
+        # Notifications may have been missed while disconnected
+        self._recent.clear()
+        for subscription in self._subscriptions:
+            subscription.push(RESYNC)
+
+worklist_broker = WorklistBroker()
@@ -0,0 +1,37 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from typing import List
+
+from app.models.order import OrderTest
+from app.models.test import LabTest
+from .schema import WorklistFilter, WorklistItem
+
+class WorklistCRUD:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_worklist(self, filters: WorklistFilter, limit: int) -> List[WorklistItem]:
+        """Current order tests matching a client's filter, oldest first"""
+        query = (
+            select(
+                OrderTest.id,
+                OrderTest.order_id,
+                OrderTest.test_id,
+                OrderTest.status,
+                LabTest.sample_required,
+                OrderTest.sample_collected_at,
+            )
+            .join(LabTest, LabTest.id == OrderTest.test_id)
+            .order_by(OrderTest.order_id)
+            .limit(limit)
+        )
+        if filters.statuses:
+            query = query.where(OrderTest.status.in_(filters.statuses))
+        if filters.sample_required:
+            query = query.where(LabTest.sample_required.in_(filters.sample_required))
+        result = await self.db.execute(query)
+        return [WorklistItem.model_validate(row._asdict()) for row in result]
+
+def get_worklist_crud(db: AsyncSession) -> WorklistCRUD:
+    """Get WorklistCRUD instance"""
+    return WorklistCRUD(db)
@@ -0,0 +1,91 @@
+# app/v1/api/worklist/router.py
+import asyncio
+import json
+from fastapi import APIRouter, Depends, Header, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import AsyncGenerator, List, Optional
+
+from .schema import WorklistFilter, WorklistEvent
+from .crud import get_worklist_crud
+from .broker import worklist_broker, RESYNC
+from app.core.auth import get_streaming_user, require_any_role
+from app.core.audit import audit_log
+from app.core.config import settings
+from app.models.audit import AuditAction
+from app.db.branches import current_branch
+from app.db.session import get_db_context
+from app.models.order import TestStatus
+from app.models.user import User
+
+router = APIRouter(prefix=f"{settings.API_V1_STR}/worklist", tags=["Worklist"])
+
+def format_sse(data: str, event: str, event_id: Optional[int] = None) -> str:
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines += [f"event: {event}", f"data: {data}"]
+    return "\n".join(lines) + "\n\n"
+
+async def snapshot_message(filters: WorklistFilter) -> str:
+    # Take the id before querying: events racing the query are re-sent afterwards
+    event_id = worklist_broker.last_event_id(current_branch().name)
+    async with get_db_context() as db:
+        items = await get_worklist_crud(db).get_worklist(filters, settings.WORKLIST_SNAPSHOT_LIMIT)
+    data = json.dumps({"items": [item.model_dump(mode="json") for item in items]})
+    return format_sse(data, "snapshot", event_id)
+
+def event_message(event: WorklistEvent, filters: WorklistFilter) -> str:
+    # A row whose new status is outside the view left it: tell the client to drop it
+    name = event.op.lower() if filters.shows(event.item) else "remove"
+    return format_sse(event.item.model_dump_json(), name, event.event_id)
+
+@router.get("/stream")
+async def stream_worklist(
+    request: Request,
+    sample_required: List[str] = Query([]),
+    status: List[TestStatus] = Query([TestStatus.PENDING, TestStatus.SAMPLE_COLLECTED]),
+    last_event_id: Optional[str] = Header(None),
+    user: User = Depends(get_streaming_user)
+):
+    """Server-Sent Events stream of the lab worklist.
+
+    Sends a `snapshot` of matching order tests on connect, then `insert`/`update`
+    events, and `remove` when a status change takes a row out of the view.
+    Reconnecting with Last-Event-ID replays missed events when this worker
+    still has them buffered, otherwise a fresh snapshot is sent.
+    """
+    require_any_role(user)
+    filters = WorklistFilter(sample_required=sample_required, statuses=status)
+    audit_log.record(AuditAction.READ, "worklist", actor_id=user.id, details=filters.model_dump(mode="json"))
+
+    async def event_stream() -> AsyncGenerator[str, None]:
+        subscription = await worklist_broker.subscribe(filters, current_branch().name)
+        try:
+            replay = None
+            if last_event_id and last_event_id.isdigit():
+                replay = worklist_broker.events_after(int(last_event_id), current_branch().name)
+            if replay is None:
+                yield await snapshot_message(filters)
+            else:
+                for event in replay:
+                    if filters.matches(event):
+                        yield event_message(event, filters)
+
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.queue.get(), timeout=settings.WORKLIST_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is RESYNC:
+                    yield await snapshot_message(filters)
+                else:
+                    yield event_message(event, filters)
+        finally:
+            worklist_broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,37 @@
+from pydantic import BaseModel
+from uuid import UUID
+from datetime import datetime
+from typing import List, Optional
+
+from app.models.order import TestStatus
+
+class WorklistFilter(BaseModel):
+    """Per-client subscription filter; empty lists match everything"""
+    sample_required: List[str] = []
+    statuses: List[TestStatus] = [TestStatus.PENDING, TestStatus.SAMPLE_COLLECTED]
+
+    def shows(self, item: "WorklistItem") -> bool:
+        if self.sample_required and item.sample_required not in self.sample_required:
+            return False
+        return not self.statuses or item.status in self.statuses
+
+    def matches(self, event: "WorklistEvent") -> bool:
+        """Whether the client needs the event: the row enters, changes in or leaves its view"""
+        if self.shows(event.item):
+            return True
+        return event.old_status is not None and self.shows(event.item.model_copy(update={"status": event.old_status}))
+
+class WorklistItem(BaseModel):
+    id: UUID
+    order_id: UUID
+    test_id: UUID
+    status: TestStatus
+    sample_required: Optional[str] = None
+    sample_collected_at: Optional[datetime] = None
+
+class WorklistEvent(BaseModel):
+    event_id: int  # per branch; ids of different branches overlap
+    op: str  # INSERT or UPDATE
+    branch: Optional[str] = None
+    old_status: Optional[TestStatus] = None  # None on INSERT
+    item: WorklistItem
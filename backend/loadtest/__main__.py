@@ -0,0 +1,104 @@
+"""Load-test harness.
+
+    python -m loadtest seed --patients 100000 --orders 300000 --reset
+    python -m loadtest run login_storm --concurrency 50 --duration 30 --out runs/login.json
+    python -m loadtest run dashboards --base-url http://localhost:8000
+    python -m loadtest compare runs/baseline.json runs/login.json --threshold 0.1
+    python -m loadtest bench flagging --size 50000
+    python -m loadtest keys --rows 10000000
+
+Without --base-url the app is driven in-process through its ASGI interface.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from dataclasses import fields
+from pathlib import Path
+
+from loadtest.benchmarks import BENCHMARKS
+from loadtest.keys import run_key_benchmark
+from loadtest.seed import SeedConfig, seed_database
+from loadtest.stats import compare_reports, write_report
+from loadtest.workloads import SCENARIOS, run_scenario
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m loadtest", description="Seed, run and compare load tests")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed = commands.add_parser("seed", help="Bulk load a generated dataset")
+    for field in fields(SeedConfig):
+        if field.type is bool or field.type == "bool":
+            seed.add_argument(f"--{field.name}", action="store_true")
+        else:
+            seed.add_argument(f"--{field.name.replace('_', '-')}", type=int, default=field.default)
+
+    run = commands.add_parser("run", help="Replay a scripted workload")
+    run.add_argument("scenario", choices=sorted(SCENARIOS))
+    run.add_argument("--concurrency", type=int, default=20)
+    run.add_argument("--duration", type=float, default=30, help="seconds")
+    run.add_argument("--base-url", default=None, help="e.g. http://localhost:8000; in-process if omitted")
+    run.add_argument("--out", default=None, help="write the JSON report to this file")
+
+    compare = commands.add_parser("compare", help="Flag regressions between two JSON reports")
+    compare.add_argument("baseline")
+    compare.add_argument("candidate")
+    compare.add_argument("--threshold", type=float, default=0.1, help="allowed relative change")
+
+    bench = commands.add_parser("bench", help="Run a micro-benchmark (no server or database needed)")
+    bench.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    bench.add_argument("--size", type=int, default=10000)
+    bench.add_argument("--repeat", type=int, default=3, help="runs per variant, the fastest counts")
+    bench.add_argument("--out", default=None, help="write the JSON report to this file")
+
+    keys = commands.add_parser("keys", help="Insert throughput and index size of uuid4 vs uuid7 primary keys")
+    keys.add_argument("--rows", type=int, default=1000000, help="rows per key type")
+    keys.add_argument("--batch-size", type=int, default=50000)
+    keys.add_argument("--keep", action="store_true", help="keep the scratch tables for inspection")
+    keys.add_argument("--out", default=None, help="write the JSON report to this file")
+
+    commands.add_parser("list", help="List available scenarios and benchmarks")
+    return parser
+
+def main() -> int:
+    args = build_parser().parse_args()
+
+    if args.command == "seed":
+        config = SeedConfig(**{field.name: getattr(args, field.name) for field in fields(SeedConfig)})
+        counts = asyncio.run(seed_database(config))
+        print(json.dumps(counts, indent=2))
+        return 0
+
+    if args.command == "run":
+        report = asyncio.run(run_scenario(args.scenario, args.concurrency, args.duration, args.base_url))
+        write_report(report, args.out)
+        return 0
+
+    if args.command == "compare":
+        baseline = json.loads(Path(args.baseline).read_text())
+        candidate = json.loads(Path(args.candidate).read_text())
+        regressions = compare_reports(baseline, candidate, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if not regressions:
+            print("No regressions")
+        return 1 if regressions else 0
+
+    if args.command == "bench":
+        report = {"benchmark": args.benchmark, **BENCHMARKS[args.benchmark].run(args.size, args.repeat)}
+        write_report(report, args.out)
+        return 0
+
+    if args.command == "keys":
+        write_report(asyncio.run(run_key_benchmark(args.rows, args.batch_size, args.keep)), args.out)
+        return 0
+
+    for name, workload in sorted(SCENARIOS.items()):
+        print(f"{name:<24} {workload.description}")
+    for name, spec in sorted(BENCHMARKS.items()):
+        print(f"bench {name:<18} {spec.description}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
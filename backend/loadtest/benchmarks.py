@@ -0,0 +1,306 @@
+"""Micro-benchmarks of hot code paths, run without a server or database"""
+
+import random
+import time
+from typing import Any, Callable, Dict, List
+
+from loadtest.seed import CATALOG
+
+Benchmark = Callable[[int, int], Dict[str, Any]]
+
+class BenchmarkSpec:
+    def __init__(self, name: str, description: str, run: Benchmark):
+        self.name = name
+        self.description = description
+        self.run = run
+
+BENCHMARKS: Dict[str, BenchmarkSpec] = {}
+
+def benchmark(name: str, description: str):
+    def decorator(run: Benchmark) -> Benchmark:
+        BENCHMARKS[name] = BenchmarkSpec(name, description, run)
+        return run
+    return decorator
+
+def best_of(repeat: int, func: Callable[[], Any]) -> float:
+    """Fastest wall time in seconds over `repeat` runs"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+@benchmark("flagging", "Reference-range flagging: NumPy batch vs per-value Python loop")
+def bench_flagging(size: int, repeat: int) -> Dict[str, Any]:
+    """`size` reports flattened to one row per analyte value, as the re-flag job reads them"""
+    import numpy as np
+    from app.v1.api.report.flagging import GENDER_CODES, RangeDef, RangeTable, flag_columns
+
+    rng = random.Random(42)
+    ranges: List[RangeDef] = []
+    for test_index, (_, _, _, _, analytes) in enumerate(CATALOG):
+        for code, _, mean, sd in analytes:
+            ranges.append(RangeDef(test_index, code, None, None, None, mean - 2 * sd, mean + 2 * sd, mean - 4 * sd, mean + 4 * sd))
+            # Typical paediatric age bands plus adult bands per gender on top of the general one
+            for age_min, age_max in ((0, 1), (1, 6), (6, 12), (12, 18)):
+                spread = 1.5 + age_min / 12
+                ranges.append(RangeDef(test_index, code, None, age_min, age_max, mean - spread * sd, mean + spread * sd, None, None))
+            ranges.append(RangeDef(test_index, code, "M", 18, None, mean - 1.8 * sd, mean + 2.2 * sd, mean - 4 * sd, mean + 4 * sd))
+            ranges.append(RangeDef(test_index, code, "F", 18, None, mean - 2.2 * sd, mean + 1.8 * sd, mean - 4 * sd, mean + 4 * sd))
+    table = RangeTable(ranges)
+
+    test_ids, analytes, values, ages, genders = [], [], [], [], []
+    for _ in range(size):
+        test_index = rng.randrange(len(CATALOG))
+        age, gender = float(rng.randint(0, 90)), rng.choice(["M", "F"])
+        for code, _, mean, sd in CATALOG[test_index][4]:
+            test_ids.append(test_index)
+            analytes.append(code)
+            values.append(round(rng.gauss(mean, sd * 1.5), 3))
+            ages.append(age)
+            genders.append(gender)
+
+    by_key: Dict[Any, List[RangeDef]] = {}
+    for definition in ranges:
+        by_key.setdefault((definition.test_id, definition.analyte), []).append(definition)
+
+    def flag_loop():
+        """Reference implementation: most specific applicable band per value, in Python"""
+        flags, lows, highs = [], [], []
+        for test_id, analyte, value, age, gender in zip(test_ids, analytes, values, ages, genders):
+            best, best_rank = None, -1
+            for d in by_key.get((test_id, analyte), ()):
+                if d.gender is not None and d.gender != gender:
+                    continue
+                bounded = d.age_min is not None or d.age_max is not None
+                if bounded and (age is None or (d.age_min is not None and age < d.age_min)
+                                or (d.age_max is not None and age >= d.age_max)):
+                    continue
+                rank = 2 * (d.gender is not None) + bounded
+                if rank > best_rank:
+                    best, best_rank = d, rank
+            flag = None
+            if best is not None and value is not None:
+                if best.critical_low is not None and value < best.critical_low:
+                    flag = "CRITICAL_LOW"
+                elif best.critical_high is not None and value > best.critical_high:
+                    flag = "CRITICAL_HIGH"
+                elif best.low is not None and value < best.low:
+                    flag = "LOW"
+                elif best.high is not None and value > best.high:
+                    flag = "HIGH"
+                else:
+                    flag = "NORMAL"
+            flags.append(flag)
+            lows.append(best.low if flag else None)
+            highs.append(best.high if flag else None)
+        return flags, lows, highs
+
+    def flag_batch():
+        return flag_columns(table, test_ids, analytes, values, ages, genders)
+
+    reference, vectorized = flag_loop(), flag_batch()
+    mismatches = sum(a != b for a, b in zip(reference[0], vectorized[0]))
+
+    # The array evaluation alone, with inputs already converted
+    keys = table.keys_of(test_ids, analytes)
+    value_array, age_array = np.array(values), np.array(ages)
+    gender_array = np.array([GENDER_CODES[gender] for gender in genders], dtype=np.int8)
+
+    count = len(values)
+    loop_s = best_of(repeat, flag_loop)
+    batch_s = best_of(repeat, flag_batch)
+    core_s = best_of(repeat, lambda: table.flag(keys, value_array, age_array, gender_array))
+    return {
+        "reports": size,
+        "values": count,
+        "bands_per_analyte": len(ranges) // len(by_key),
+        "mismatches": mismatches,
+        "loop_values_per_s": round(count / loop_s),
+        "batch_values_per_s": round(count / batch_s),
+        "array_only_values_per_s": round(count / core_s),
+        "speedup": round(loop_s / batch_s, 2),
+        "flags": {flag or "NO_RANGE": vectorized[0].count(flag) for flag in sorted(set(vectorized[0]), key=str)},
+    }
+
+@benchmark("validation", "Result-schema validation: compiled validator vs Pydantic models built from the schema")
+def bench_validation(size: int, repeat: int) -> Dict[str, Any]:
+    """`size` results of one large panel (every catalog analyte plus coded ones), ~5% invalid"""
+    from typing import Literal, Optional
+    from pydantic import ValidationError, confloat, create_model
+    from app.v1.api.report.validation import ResultValidator
+
+    rng = random.Random(42)
+    numeric = {code: (unit, mean, sd) for *_, analytes in CATALOG for code, unit, mean, sd in analytes}
+    schema: Dict[str, Any] = {"analytes": {
+        code: {"type": "number", "unit": unit or None, "min": 0, "max": mean + 10 * sd}
+        for code, (unit, mean, sd) in numeric.items()
+    }}
+    schema["analytes"]["ABO"] = {"type": "choice", "values": ["A", "B", "AB", "O"]}
+    schema["analytes"]["RH"] = {"type": "choice", "values": ["POS", "NEG"]}
+    schema["analytes"]["NOTE"] = {"type": "text", "max_length": 200, "required": False}
+    for spec in schema["analytes"].values():
+        if spec.get("unit") is None:
+            spec.pop("unit", None)
+
+    results = []
+    for _ in range(size):
+        result = {
+            code: {"value": round(abs(rng.gauss(mean, sd)), 3), **({"unit": unit} if unit else {})}
+            for code, (unit, mean, sd) in numeric.items()
+        }
+        result["ABO"] = {"value": rng.choice(["A", "B", "AB", "O"])}
+        result["RH"] = {"value": rng.choice(["POS", "NEG"])}
+        if rng.random() < 0.05:
+            result[rng.choice(list(numeric))]["value"] = rng.choice(["n/a", -1, 1e9])
+        results.append(result)
+
+    def build_model():
+        """The generic approach: a Pydantic model per analyte and one for the result"""
+        fields = {}
+        for code, spec in schema["analytes"].items():
+            if spec["type"] == "number":
+                value_type = confloat(ge=spec["min"], le=spec["max"])
+            elif spec["type"] == "choice":
+                value_type = Literal[tuple(spec["values"])]
+            else:
+                value_type = str
+            unit_type = Optional[Literal[spec["unit"]]] if spec.get("unit") else Optional[str]
+            entry = create_model(f"Entry_{code}", value=(value_type, ...), unit=(unit_type, None))
+            fields[code] = (entry if spec.get("required", True) else Optional[entry], ... if spec.get("required", True) else None)
+        return create_model("Result", **fields)
+
+    def pydantic_valid(model, result) -> bool:
+        try:
+            model.model_validate(result)
+            return True
+        except ValidationError:
+            return False
+
+    validator, model = ResultValidator(schema), build_model()
+    compiled_invalid = sum(bool(validator.validate(result)[1]) for result in results)
+    pydantic_invalid = sum(not pydantic_valid(model, result) for result in results)
+
+    count, sample = len(results), results[:max(len(results) // 50, 1)]
+    compiled_s = best_of(repeat, lambda: [validator.validate(result) for result in results])
+    prebuilt_s = best_of(repeat, lambda: [pydantic_valid(model, result) for result in results])
+    per_request_s = best_of(repeat, lambda: [pydantic_valid(build_model(), result) for result in sample])
+    compile_s = best_of(repeat, lambda: ResultValidator(schema))
+    return {
+        "results": count,
+        "analytes_per_result": len(schema["analytes"]),
+        "invalid": compiled_invalid,
+        "pydantic_invalid": pydantic_invalid,
+        "compiled_results_per_s": round(count / compiled_s),
+        "pydantic_prebuilt_results_per_s": round(count / prebuilt_s),
+        "pydantic_built_per_result_results_per_s": round(len(sample) / per_request_s),
+        "compile_ms": round(compile_s * 1000, 3),
+        "speedup_vs_prebuilt": round(prebuilt_s / compiled_s, 2),
+    }
+
+@benchmark("uuid7", "Primary key generation: uuid4 vs time-ordered uuid7 (see `keys` for the database side)")
+def bench_uuid7(size: int, repeat: int) -> Dict[str, Any]:
+    """Generation rate, plus how many of `size` consecutive keys sort after every earlier one (B-tree right-edge appends)"""
+    import uuid
+    from app.core.ids import uuid7
+
+    def append_ratio(generate: Callable[[], uuid.UUID]) -> float:
+        appends, highest = 0, uuid.UUID(int=0)
+        for _ in range(size):
+            key = generate()
+            if key > highest:
+                appends, highest = appends + 1, key
+        return round(appends / size, 4)
+
+    uuid4_s = best_of(repeat, lambda: [uuid.uuid4() for _ in range(size)])
+    uuid7_s = best_of(repeat, lambda: [uuid7() for _ in range(size)])
+    return {
+        "keys": size,
+        "uuid4_per_s": round(size / uuid4_s),
+        "uuid7_per_s": round(size / uuid7_s),
+        "uuid4_append_ratio": append_ratio(uuid.uuid4),
+        "uuid7_append_ratio": append_ratio(uuid7),
+    }
+
+@benchmark("rows", "List endpoint read path: ORM entities + response model vs column rows serialized directly")
+def bench_rows(size: int, repeat: int) -> Dict[str, Any]:
+    """GET /v1/users over `size` users in an in-memory SQLite copy of the table (same SQLAlchemy row
+    processing as Postgres, minus the network); time and peak allocations per 10k rows"""
+    import json
+    import tracemalloc
+    from datetime import datetime, timedelta
+    from typing import List as ListOf
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+    from sqlalchemy import create_engine, event, insert, select
+    from sqlalchemy.orm import Session
+    from sqlalchemy.pool import StaticPool
+    from app.core.config import settings
+    from app.core.ids import uuid7
+    from app.models.user import User, UserRole
+    from app.v1.api.user.crud import USER_ROWS
+    from app.v1.api.user.schema import UserOut
+
+    # One shared connection, so the in-memory database lives across sessions
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+
+    @event.listens_for(engine, "connect")
+    def attach_schema(connection, _):
+        connection.execute(f"ATTACH DATABASE ':memory:' AS \"{settings.DB_SCHEMA}\"")
+
+    rng, now = random.Random(42), datetime(2026, 1, 1)
+    with engine.begin() as connection:
+        # Hand-written DDL: SQLite cannot render the Postgres column types, but binds and reads them fine
+        connection.exec_driver_sql(f'''
+            CREATE TABLE "{settings.DB_SCHEMA}".users (
+                id CHAR(32) PRIMARY KEY, username VARCHAR(50) NOT NULL UNIQUE, password_hash VARCHAR(255) NOT NULL,
+                full_name VARCHAR(100) NOT NULL, role VARCHAR(13) NOT NULL, is_active BOOLEAN NOT NULL,
+                refresh_token TEXT, refresh_token_expires_at DATETIME,
+                created_at DATETIME NOT NULL, updated_at DATETIME NOT NULL
+            )
+        ''')
+        connection.execute(insert(User), [{
+            "id": uuid7(), "username": f"user_{i:07d}", "password_hash": "x" * 60,
+            "full_name": f"Load Test User {i}", "role": rng.choice(list(UserRole)), "is_active": True,
+            "refresh_token": "r" * 200, "created_at": now - timedelta(minutes=i), "updated_at": now,
+        } for i in range(size)])
+
+    adapter = TypeAdapter(ListOf[UserOut])
+
+    def orm_path() -> bytes:
+        """What the endpoint did: entities into the identity map, then FastAPI's response_model pass"""
+        with Session(engine) as session:
+            users = session.execute(select(User).order_by(User.created_at.desc())).scalars().all()
+            validated = adapter.validate_python(users, from_attributes=True)
+            content = jsonable_encoder(adapter.dump_python(validated, mode="json"))
+            return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+    def rows_path() -> bytes:
+        with Session(engine) as session:
+            rows = session.execute(USER_ROWS.select().order_by(User.created_at.desc())).all()
+            return USER_ROWS.to_json(rows)
+
+    if json.loads(orm_path()) != json.loads(rows_path()):
+        raise AssertionError("ORM and row paths serialize differently")
+
+    def peak_bytes(func: Callable[[], Any]) -> int:
+        tracemalloc.start()
+        try:
+            func()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    per_10k = 10000 / size
+    orm_s, rows_s = best_of(repeat, orm_path), best_of(repeat, rows_path)
+    orm_peak, rows_peak = peak_bytes(orm_path), peak_bytes(rows_path)
+    return {
+        "rows": size,
+        "orm_ms_per_10k": round(orm_s * 1000 * per_10k, 2),
+        "rows_ms_per_10k": round(rows_s * 1000 * per_10k, 2),
+        "orm_peak_kib_per_10k": round(orm_peak / 1024 * per_10k),
+        "rows_peak_kib_per_10k": round(rows_peak / 1024 * per_10k),
+        "speedup": round(orm_s / rows_s, 2),
+        "memory_ratio": round(orm_peak / rows_peak, 2),
+    }
@@ -0,0 +1,71 @@
+"""Primary-key layout benchmark against a real database.
+
+    python -m loadtest keys --rows 10000000
+
+Loads the same number of rows into two scratch tables that differ only in how
+their uuid primary key is generated, random (v4) or time-ordered (v7), and
+reports insert throughput, WAL volume and the resulting table and index
+sizes. Keys are generated before each batch is timed, so the numbers measure
+the database side: B-tree page splits, WAL and buffer churn. Random keys start
+to fall behind once the primary key index outgrows shared_buffers.
+"""
+
+import time
+import uuid
+from typing import Any, Callable, Dict
+
+import asyncpg
+
+from app.core.config import settings
+from app.core.ids import uuid7
+
+KEY_GENERATORS: Dict[str, Callable[[], uuid.UUID]] = {"uuid4": uuid.uuid4, "uuid7": uuid7}
+
+async def _load(conn: asyncpg.Connection, table: str, generate: Callable[[], uuid.UUID],
+                rows: int, batch_size: int) -> Dict[str, Any]:
+    qualified = f'"{settings.DB_SCHEMA}"."{table}"'
+    await conn.execute(f"DROP TABLE IF EXISTS {qualified}")
+    await conn.execute(f"CREATE TABLE {qualified} (id uuid PRIMARY KEY, seq bigint NOT NULL)")
+
+    wal_start = await conn.fetchval("SELECT pg_current_wal_lsn()")
+    elapsed = 0.0
+    for start in range(0, rows, batch_size):
+        records = [(generate(), seq) for seq in range(start, min(start + batch_size, rows))]
+        started = time.perf_counter()
+        await conn.copy_records_to_table(table, records=records, columns=["id", "seq"], schema_name=settings.DB_SCHEMA)
+        elapsed += time.perf_counter() - started
+
+    sizes = await conn.fetchrow(
+        "SELECT pg_current_wal_lsn() - $1::pg_lsn AS wal_bytes, pg_relation_size($2::regclass) AS table_bytes, "
+        "pg_relation_size($3::regclass) AS index_bytes",
+        wal_start, qualified, f'"{settings.DB_SCHEMA}"."{table}_pkey"',
+    )
+    result = {
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows / elapsed) if elapsed else None,
+        "wal_bytes": int(sizes["wal_bytes"]),
+        "table_bytes": sizes["table_bytes"],
+        "index_bytes": sizes["index_bytes"],
+    }
+    # Leaf fill factor shows the half-empty pages random inserts leave behind (needs pgstattuple)
+    try:
+        result["avg_leaf_density"] = await conn.fetchval(
+            "SELECT avg_leaf_density FROM pgstatindex($1)", f'"{settings.DB_SCHEMA}"."{table}_pkey"'
+        )
+    except asyncpg.PostgresError:
+        result["avg_leaf_density"] = None
+    return result
+
+async def run_key_benchmark(rows: int, batch_size: int, keep: bool = False) -> Dict[str, Any]:
+    conn = await asyncpg.connect(settings.DATABASE_DSN)
+    tables = [f"loadtest_keys_{name}" for name in KEY_GENERATORS]
+    try:
+        variants = {}
+        for (name, generate), table in zip(KEY_GENERATORS.items(), tables):
+            variants[name] = await _load(conn, table, generate, rows, batch_size)
+        return {"benchmark": "keys", "rows": rows, "batch_size": batch_size, "variants": variants}
+    finally:
+        if not keep:
+            for table in tables:
+                await conn.execute(f'DROP TABLE IF EXISTS "{settings.DB_SCHEMA}"."{table}"')
+        await conn.close()
@@ -0,0 +1,288 @@
+"""Bulk dataset generator for load tests.
+
+Rows are generated in chunks and written with COPY, so millions of rows can be
+seeded with bounded memory. Generation is deterministic for a given --seed.
+
+COPY skips the app's write paths, so the tables those maintain next to the
+rows (patient match keys, analyte observations, billing balances) are filled
+afterwards by the same code the backfill jobs run. Payments go into the
+ledger with their billings.
+"""
+
+import json
+import random
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import asyncpg
+
+from app.core.config import settings
+from app.core.ids import uuid7_from
+from app.core.security import hash_password
+from app.db.dbconnection import db_manager
+from app.db.session import get_db_context
+from app.v1.api.billing.crud import get_billing_crud
+from app.v1.api.patient.crud import get_patient_crud
+from app.v1.api.report.crud import get_report_crud
+
+LOADTEST_PASSWORD = "loadtest123"
+CHUNK_SIZE = 5000
+
+FIRST_NAMES = ["Aarav", "Vivaan", "Aditya", "Ananya", "Diya", "Ishaan", "Kavya", "Meera", "Rohan", "Saanvi",
+               "Arjun", "Priya", "Rahul", "Sneha", "Vikram", "Neha", "Karan", "Pooja", "Amit", "Riya"]
+LAST_NAMES = ["Sharma", "Verma", "Patel", "Gupta", "Singh", "Kumar", "Reddy", "Nair", "Iyer", "Khan",
+              "Das", "Mehta", "Joshi", "Rao", "Bose"]
+CITIES = ["Mumbai", "Pune", "Delhi", "Bengaluru", "Chennai", "Hyderabad", "Kolkata", "Jaipur"]
+SPECIALIZATIONS = ["General Medicine", "Cardiology", "Endocrinology", "Nephrology", "Gynecology",
+                   "Pediatrics", "Orthopedics", "Dermatology"]
+
+# (name, sample, cost, popularity weight, analytes as (code, unit, mean, sd))
+CATALOG: List[Tuple[str, str, int, int, List[Tuple[str, str, float, float]]]] = [
+    ("Complete Blood Count", "Blood", 350, 30, [("HGB", "g/dL", 13.5, 1.8), ("WBC", "10^3/uL", 7.5, 2.2), ("PLT", "10^3/uL", 250, 60)]),
+    ("Fasting Blood Glucose", "Blood", 120, 20, [("GLU", "mg/dL", 100, 25)]),
+    ("HbA1c", "Blood", 450, 12, [("HBA1C", "%", 6.0, 1.1)]),
+    ("Lipid Profile", "Blood", 600, 15, [("CHOL", "mg/dL", 190, 35), ("HDL", "mg/dL", 48, 10), ("LDL", "mg/dL", 115, 30), ("TRIG", "mg/dL", 150, 60)]),
+    ("Kidney Function Test", "Blood", 550, 12, [("CREAT", "mg/dL", 1.0, 0.3), ("UREA", "mg/dL", 30, 10)]),
+    ("Liver Function Test", "Blood", 650, 10, [("ALT", "U/L", 30, 15), ("AST", "U/L", 28, 12), ("BILI", "mg/dL", 0.8, 0.3)]),
+    ("Thyroid Stimulating Hormone", "Blood", 400, 10, [("TSH", "mIU/L", 2.5, 1.5)]),
+    ("Vitamin D", "Blood", 1200, 6, [("VITD", "ng/mL", 25, 10)]),
+    ("C-Reactive Protein", "Blood", 500, 5, [("CRP", "mg/L", 4, 5)]),
+    ("Urine Routine", "Urine", 150, 12, [("PH", "", 6.0, 0.7), ("SG", "", 1.015, 0.005)]),
+    ("Stool Routine", "Stool", 200, 3, [("OCCULT", "", 0.1, 0.3)]),
+    ("Throat Swab Culture", "Swab", 800, 2, [("CFU", "CFU/mL", 1000, 2000)]),
+]
+
+@dataclass
+class SeedConfig:
+    users: int = 20
+    patients: int = 10000
+    consultants: int = 100
+    lab_tests: int = 50
+    orders: int = 30000
+    days: int = 365
+    seed: int = 42
+    reset: bool = False
+
+class DatasetGenerator:
+    def __init__(self, config: SeedConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.now = datetime.now().replace(microsecond=0)
+
+    def _uuid(self, at: Optional[datetime] = None) -> uuid.UUID:
+        # Time-ordered like the app's keys, stamped with the row's own (back-dated) creation time
+        return uuid7_from(int((at or self.now).timestamp() * 1000), self.rng.getrandbits(74))
+
+    def _phone(self) -> str:
+        return f"9{self.rng.randint(100000000, 999999999)}"
+
+    def _address(self) -> str:
+        return f"{self.rng.randint(1, 999)}, Sector {self.rng.randint(1, 60)}, {self.rng.choice(CITIES)}"
+
+    def users(self) -> List[tuple]:
+        # bcrypt is deliberately slow: hash the shared load-test password once
+        password_hash = hash_password(LOADTEST_PASSWORD)
+        rows = []
+        for i in range(self.config.users):
+            role = "ADMIN" if i < max(self.config.users // 10, 1) else "LAB_ASSISTANT"
+            rows.append((self._uuid(), f"loadtest_{i:05d}", password_hash, f"Load Test User {i}",
+                         role, True, self.now, self.now))
+        return rows
+
+    def patients(self) -> List[tuple]:
+        rows = []
+        for _ in range(self.config.patients):
+            # Bimodal age mix: children and adults, skewed towards middle age
+            age = int(abs(self.rng.gauss(8, 4))) if self.rng.random() < 0.15 else int(min(max(self.rng.gauss(45, 16), 18), 95))
+            gender = self.rng.choices(["Male", "Female", "Other"], weights=[49, 49, 2])[0]
+            created_at = self.now - timedelta(days=self.rng.uniform(0, self.config.days))
+            rows.append((self._uuid(created_at), self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES), str(age),
+                         gender, self._phone(), self._address(), created_at, created_at))
+        return rows
+
+    def consultants(self) -> List[tuple]:
+        return [
+            (self._uuid(), f"Dr. {self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}",
+             self.rng.choice(SPECIALIZATIONS), self._phone(),
+             f"{self.rng.choice(CITIES)} General Hospital" if self.rng.random() < 0.7 else None, self._address())
+            for _ in range(self.config.consultants)
+        ]
+
+    def lab_tests(self) -> List[Dict[str, Any]]:
+        tests = []
+        for i in range(self.config.lab_tests):
+            name, sample, cost, weight, analytes = CATALOG[i % len(CATALOG)]
+            variant = i // len(CATALOG)
+            tests.append({
+                "id": self._uuid(),
+                "name": name if variant == 0 else f"{name} (Panel {variant + 1})",
+                "description": f"{name} - {', '.join(code for code, *_ in analytes)}",
+                "cost": Decimal(cost + 50 * variant),
+                "sample_required": sample,
+                # Popularity falls off for the long tail of variants
+                "weight": weight / (1 + variant),
+                "analytes": analytes,
+            })
+        return tests
+
+    def _ordered_at(self) -> datetime:
+        day = self.now - timedelta(days=int(self.rng.expovariate(1 / max(self.config.days / 4, 1))) % self.config.days)
+        # Morning rush: most samples are drawn between 07:00 and 11:00
+        hour = int(min(max(self.rng.gauss(9.5, 2.5), 6), 20))
+        return day.replace(hour=hour, minute=self.rng.randint(0, 59), second=self.rng.randint(0, 59))
+
+    def order_chunks(self, patient_ids: Sequence[uuid.UUID], consultant_ids: Sequence[uuid.UUID],
+                     tests: List[Dict[str, Any]]):
+        """Yield (orders, order_tests, reports, billings, payments) row lists, CHUNK_SIZE orders at a time"""
+        test_weights = [test["weight"] for test in tests]
+        for start in range(0, self.config.orders, CHUNK_SIZE):
+            orders, order_tests, reports, billings, payments = [], [], [], [], []
+            for _ in range(min(CHUNK_SIZE, self.config.orders - start)):
+                # Repeat patients: a minority of patients account for most visits
+                patient_id = patient_ids[int(len(patient_ids) * self.rng.random() ** 2)]
+                consultant_id = self.rng.choice(consultant_ids) if consultant_ids and self.rng.random() < 0.7 else None
+                ordered_at = self._ordered_at()
+                is_recent = (self.now - ordered_at) < timedelta(days=2)
+                status = self.rng.choices(
+                    ["PENDING", "COMPLETED", "CANCELLED"],
+                    weights=[70, 28, 2] if is_recent else [3, 94, 3]
+                )[0]
+
+                order_id = self._uuid(ordered_at)
+                count = self.rng.choices(range(1, 9), weights=[35, 25, 15, 10, 6, 4, 3, 2])[0]
+                chosen = {test["id"]: test for test in self.rng.choices(tests, weights=test_weights, k=count)}
+                total = sum(test["cost"] for test in chosen.values())
+
+                for test in chosen.values():
+                    if status == "COMPLETED":
+                        test_status = "COMPLETED"
+                    elif status == "CANCELLED":
+                        test_status = "PENDING"
+                    else:
+                        test_status = self.rng.choices(["PENDING", "SAMPLE_COLLECTED", "COMPLETED"], weights=[50, 35, 15])[0]
+                    collected_at = ordered_at + timedelta(minutes=self.rng.randint(5, 90)) if test_status != "PENDING" else None
+                    order_test_id = self._uuid(ordered_at)
+                    order_tests.append((order_test_id, order_id, test["id"], test_status, collected_at))
+
+                    if test_status == "COMPLETED":
+                        result = {
+                            code: {"value": round(max(self.rng.gauss(mean, sd), 0), 3), "unit": unit}
+                            for code, unit, mean, sd in test["analytes"]
+                        }
+                        reported_at = collected_at + timedelta(hours=self.rng.uniform(1, 24))
+                        reports.append((self._uuid(reported_at), order_test_id, json.dumps(result), None, reported_at))
+
+                orders.append((order_id, patient_id, consultant_id, ordered_at, status, total))
+                billing = self._billing(order_id, total, ordered_at, status)
+                billings.append(billing)
+                if billing[5]:
+                    # One ledger entry for what was paid at the counter
+                    payments.append((self._uuid(ordered_at), billing[0], billing[5], billing[9], ordered_at))
+            yield orders, order_tests, reports, billings, payments
+
+    def _billing(self, order_id: uuid.UUID, total: Decimal, ordered_at: datetime, order_status: str) -> tuple:
+        discount = (total * Decimal(self.rng.choice([5, 10, 15])) / 100).quantize(Decimal("0.01")) if self.rng.random() < 0.2 else Decimal(0)
+        net = total - discount
+        payment_status = "PAID" if order_status == "COMPLETED" else self.rng.choices(["PAID", "PARTIAL", "UNPAID"], weights=[60, 25, 15])[0]
+        paid = net if payment_status == "PAID" else (net * Decimal("0.5")).quantize(Decimal("0.01")) if payment_status == "PARTIAL" else Decimal(0)
+        method = self.rng.choices(["CASH", "CARD", "UPI"], weights=[30, 20, 50])[0] if paid else None
+        return (self._uuid(ordered_at), order_id, total, discount, net, paid, net - paid,
+                self.rng.choice(["LAB", "DOCTOR"]) if discount else None,
+                payment_status, method, ordered_at if paid else None, ordered_at)
+
+TABLE_COLUMNS = {
+    "users": ["id", "username", "password_hash", "full_name", "role", "is_active", "created_at", "updated_at"],
+    "patients": ["id", "first_name", "last_name", "age", "gender", "contact_number", "address", "created_at", "updated_at"],
+    "consultants": ["id", "name", "specialization", "contact_number", "hospital_affiliation", "address"],
+    "lab_tests": ["id", "name", "description", "cost", "sample_required"],
+    "orders": ["id", "patient_id", "consultant_id", "ordered_at", "status", "total_amount"],
+    "order_tests": ["id", "order_id", "test_id", "status", "sample_collected_at"],
+    "test_reports": ["id", "order_test_id", "result", "comments", "created_at"],
+    "billings": ["id", "order_id", "total_amount", "discount_amount", "net_amount", "paid_amount", "due_amount",
+                 "discount_by", "payment_status", "payment_method", "paid_at", "created_at"],
+    "payments": ["id", "billing_id", "amount", "method", "received_at"],
+}
+
+async def copy_rows(conn: asyncpg.Connection, table: str, rows: List[tuple]) -> None:
+    if rows:
+        await conn.copy_records_to_table(
+            table, records=rows, columns=TABLE_COLUMNS[table], schema_name=settings.DB_SCHEMA
+        )
+
+async def seed_database(config: SeedConfig) -> Dict[str, int]:
+    """Create the schema if needed and bulk load a generated dataset"""
+    await db_manager.init_db()
+    await db_manager.dispose()
+
+    generator = DatasetGenerator(config)
+    counts = {table: 0 for table in TABLE_COLUMNS}
+    conn = await asyncpg.connect(settings.DATABASE_DSN)
+    try:
+        async with conn.transaction():
+            if config.reset:
+                tables = ", ".join(f'"{settings.DB_SCHEMA}"."{table}"' for table in TABLE_COLUMNS)
+                await conn.execute(f"TRUNCATE {tables} CASCADE")
+
+            users = generator.users()
+            patients = generator.patients()
+            consultants = generator.consultants()
+            tests = generator.lab_tests()
+            await copy_rows(conn, "users", users)
+            await copy_rows(conn, "patients", patients)
+            await copy_rows(conn, "consultants", consultants)
+            await copy_rows(conn, "lab_tests", [
+                (test["id"], test["name"], test["description"], test["cost"], test["sample_required"])
+                for test in tests
+            ])
+            counts.update(users=len(users), patients=len(patients), consultants=len(consultants), lab_tests=len(tests))
+
+            patient_ids = [row[0] for row in patients]
+            consultant_ids = [row[0] for row in consultants]
+            chunks = generator.order_chunks(patient_ids, consultant_ids, tests)
+            for orders, order_tests, reports, billings, payments in chunks:
+                for table, rows in (("orders", orders), ("order_tests", order_tests), ("test_reports", reports),
+                                    ("billings", billings), ("payments", payments)):
+                    await copy_rows(conn, table, rows)
+                    counts[table] += len(rows)
+    finally:
+        await conn.close()
+
+    counts.update(await fill_derived_tables())
+    conn = await asyncpg.connect(settings.DATABASE_DSN)
+    try:
+        await conn.execute("ANALYZE")
+    finally:
+        await conn.close()
+    await db_manager.dispose()
+    return counts
+
+async def fill_derived_tables() -> Dict[str, int]:
+    """Build what the app's write paths keep next to the copied rows, one committed batch at a time"""
+    counts = {"patient_match_keys": 0, "analyte_observations": 0, "billing_balances": 0}
+    after = None
+    while True:
+        async with get_db_context() as db:
+            crud = get_patient_crud(db)
+            patients = await crud.get_patients_needing_keys(after, settings.PATIENT_MATCH_BATCH_SIZE)
+            counts["patient_match_keys"] += await crud.replace_match_keys(patients)
+        if len(patients) < settings.PATIENT_MATCH_BATCH_SIZE:
+            break
+        after = patients[-1].id
+
+    after = None
+    while True:
+        async with get_db_context() as db:
+            crud = get_report_crud(db)
+            report_ids = await crud.get_report_ids(after, settings.OBSERVATION_BACKFILL_BATCH_SIZE)
+            counts["analyte_observations"] += await crud.record_observations(report_ids)
+        if len(report_ids) < settings.OBSERVATION_BACKFILL_BATCH_SIZE:
+            break
+        after = report_ids[-1]
+
+    # The payments were committed above, so the rollup folds all of them in
+    async with get_db_context() as db:
+        counts["billing_balances"] = await get_billing_crud(db).rollup_balances()
+    return counts
@@ -0,0 +1,78 @@
+"""Latency recording, percentile reports and run-to-run comparison"""
+
+import json
+import math
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+def percentile(sorted_values: List[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(p / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+class LatencyRecorder:
+    def __init__(self):
+        self._latencies: Dict[str, List[float]] = defaultdict(list)
+        self._errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, endpoint: str, latency_ms: float, ok: bool) -> None:
+        self._latencies[endpoint].append(latency_ms)
+        if not ok:
+            self._errors[endpoint] += 1
+
+    def report(self, scenario: str, duration_s: float, concurrency: int, target: str) -> Dict[str, Any]:
+        endpoints = {}
+        total = 0
+        for endpoint, values in sorted(self._latencies.items()):
+            values = sorted(values)
+            total += len(values)
+            endpoints[endpoint] = {
+                "count": len(values),
+                "errors": self._errors[endpoint],
+                "throughput_rps": round(len(values) / duration_s, 2),
+                "mean_ms": round(sum(values) / len(values), 2),
+                "p50_ms": round(percentile(values, 50), 2),
+                "p95_ms": round(percentile(values, 95), 2),
+                "p99_ms": round(percentile(values, 99), 2),
+                "max_ms": round(values[-1], 2),
+            }
+        return {
+            "scenario": scenario,
+            "target": target,
+            "finished_at": datetime.utcnow().isoformat(),
+            "duration_s": round(duration_s, 2),
+            "concurrency": concurrency,
+            "total_requests": total,
+            "throughput_rps": round(total / duration_s, 2) if duration_s else 0,
+            "endpoints": endpoints,
+        }
+
+def write_report(report: Dict[str, Any], path: Optional[str]) -> None:
+    text = json.dumps(report, indent=2)
+    if path:
+        Path(path).write_text(text)
+    print(text)
+
+def compare_reports(baseline: Dict[str, Any], candidate: Dict[str, Any], threshold: float) -> List[str]:
+    """Regressions where p95/p99 grew or throughput fell by more than `threshold` (a fraction)"""
+    regressions = []
+    for endpoint, base in baseline["endpoints"].items():
+        current = candidate["endpoints"].get(endpoint)
+        if current is None:
+            regressions.append(f"{endpoint}: missing from candidate run")
+            continue
+        for metric in ("p95_ms", "p99_ms"):
+            if base[metric] and current[metric] > base[metric] * (1 + threshold):
+                regressions.append(f"{endpoint}: {metric} {base[metric]} -> {current[metric]}")
+        if base["throughput_rps"] and current["throughput_rps"] < base["throughput_rps"] * (1 - threshold):
+            regressions.append(
+                f"{endpoint}: throughput_rps {base['throughput_rps']} -> {current['throughput_rps']}"
+            )
+        base_error_rate = base["errors"] / base["count"]
+        if current["errors"] / current["count"] > base_error_rate + threshold:
+            regressions.append(f"{endpoint}: errors {base['errors']} -> {current['errors']}")
+    return regressions
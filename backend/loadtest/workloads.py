@@ -0,0 +1,238 @@
+"""Scripted workloads replayed against the API by concurrent virtual users"""
+
+import asyncio
+import itertools
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+import asyncpg
+import httpx
+
+from app.core.config import settings
+from loadtest.seed import CITIES, FIRST_NAMES, LAST_NAMES, LOADTEST_PASSWORD
+from loadtest.stats import LatencyRecorder
+
+API = settings.API_V1_STR
+TRANSITION_BATCH_SIZE = 100
+# Share of walk-ins who are already registered, so duplicate matching finds candidates
+REPEAT_PATIENT_SHARE = 0.2
+KNOWN_PATIENTS = 1000
+
+class WorkloadExhausted(Exception):
+    """Raised by a step when the scenario has no more work (e.g. no rows left to transition)"""
+
+class VirtualUser:
+    """One simulated client: its own auth token, recording every request it makes"""
+
+    def __init__(self, client: httpx.AsyncClient, recorder: LatencyRecorder, shared: Dict[str, Any]):
+        self.client = client
+        self.recorder = recorder
+        self.shared = shared
+        self.headers: Dict[str, str] = {}
+
+    async def request(self, method: str, path: str, endpoint: Optional[str] = None, **kwargs) -> httpx.Response:
+        """Send a request and record its latency under `endpoint` (defaults to the path)"""
+        started = time.perf_counter()
+        ok = False
+        try:
+            response = await self.client.request(method, path, headers=self.headers, **kwargs)
+            ok = response.status_code < 400
+            return response
+        finally:
+            self.recorder.record(f"{method} {endpoint or path}", (time.perf_counter() - started) * 1000, ok)
+
+    async def login(self, username: str) -> None:
+        response = await self.request(
+            "POST", f"{API}/auth/login", json={"username": username, "password": LOADTEST_PASSWORD}
+        )
+        if response.status_code == 200:
+            self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+Step = Callable[[VirtualUser], Awaitable[None]]
+Setup = Callable[[Dict[str, Any]], Awaitable[None]]
+
+class Scenario:
+    def __init__(self, name: str, description: str, step: Step,
+                 login_as: Optional[str] = None, setup: Optional[Setup] = None):
+        self.name = name
+        self.description = description
+        self.step = step
+        self.login_as = login_as  # "ADMIN" or "LAB_ASSISTANT" to log in before the first step
+        self.setup = setup
+
+SCENARIOS: Dict[str, Scenario] = {}
+
+def scenario(name: str, description: str, login_as: Optional[str] = None, setup: Optional[Setup] = None):
+    def decorator(step: Step) -> Step:
+        SCENARIOS[name] = Scenario(name, description, step, login_as, setup)
+        return step
+    return decorator
+
+async def fetch_rows(query: str, *args) -> List[asyncpg.Record]:
+    conn = await asyncpg.connect(settings.DATABASE_DSN)
+    try:
+        return await conn.fetch(query, *args)
+    finally:
+        await conn.close()
+
+async def load_usernames(shared: Dict[str, Any]) -> None:
+    schema = settings.DB_SCHEMA
+    rows = await fetch_rows(f'SELECT username, role::text AS role FROM "{schema}".users WHERE username LIKE \'loadtest_%\'')
+    shared["usernames"] = {
+        role: itertools.cycle([row["username"] for row in rows if row["role"] == role] or [None])
+        for role in ("ADMIN", "LAB_ASSISTANT")
+    }
+    shared["all_usernames"] = itertools.cycle([row["username"] for row in rows] or [None])
+
+def order_test_loader(status: str) -> Setup:
+    """Setup that queues order tests in `status` for a transition workload"""
+    async def setup(shared: Dict[str, Any]) -> None:
+        await load_usernames(shared)
+        rows = await fetch_rows(
+            f'SELECT id FROM "{settings.DB_SCHEMA}".order_tests WHERE status::text = $1', status
+        )
+        shared["order_test_ids"] = [str(row["id"]) for row in rows]
+    return setup
+
+def next_batch(shared: Dict[str, Any]) -> List[str]:
+    ids = shared["order_test_ids"]
+    batch, shared["order_test_ids"] = ids[:TRANSITION_BATCH_SIZE], ids[TRANSITION_BATCH_SIZE:]
+    return batch
+
+@scenario("login_storm", "Shift change: every user logs in and loads their profile", setup=load_usernames)
+async def login_storm(user: VirtualUser) -> None:
+    await user.login(next(user.shared["all_usernames"]))
+    await user.request("GET", f"{API}/auth/me")
+
+@scenario("dashboards", "Admin dashboard refreshes: user lists and cache metrics",
+          login_as="ADMIN", setup=load_usernames)
+async def dashboards(user: VirtualUser) -> None:
+    await user.request("GET", f"{API}/users", params={"limit": 100})
+    await user.request("GET", f"{API}/users", params={"role": "LAB_ASSISTANT"}, endpoint=f"{API}/users?role")
+    await user.request("GET", f"{API}/admin/metrics/cache")
+
+@scenario("sample_collection_rush", "Morning rush: scanned tubes marked collected in batches",
+          login_as="LAB_ASSISTANT", setup=order_test_loader("PENDING"))
+async def sample_collection_rush(user: VirtualUser) -> None:
+    batch = next_batch(user.shared)
+    if not batch:
+        raise WorkloadExhausted
+    await user.request("POST", f"{API}/orders/tests/transitions", json={
+        "target_status": "SAMPLE_COLLECTED",
+        "items": [{"order_test_id": order_test_id} for order_test_id in batch],
+    })
+
+@scenario("result_entry_rush", "Result entry: collected tests completed in batches",
+          login_as="LAB_ASSISTANT", setup=order_test_loader("SAMPLE_COLLECTED"))
+async def result_entry_rush(user: VirtualUser) -> None:
+    batch = next_batch(user.shared)
+    if not batch:
+        raise WorkloadExhausted
+    await user.request("POST", f"{API}/orders/tests/transitions", json={
+        "target_status": "COMPLETED",
+        "items": [{"order_test_id": order_test_id} for order_test_id in batch],
+    })
+
+async def load_known_patients(shared: Dict[str, Any]) -> None:
+    """Setup for registrations: a sample of existing patients to walk in again"""
+    await load_usernames(shared)
+    rows = await fetch_rows(
+        f'SELECT first_name, last_name, age, gender, contact_number, address '
+        f'FROM "{settings.DB_SCHEMA}".patients ORDER BY random() LIMIT $1', KNOWN_PATIENTS
+    )
+    shared["known_patients"] = [dict(row) for row in rows]
+    shared["rng"] = random.Random()
+
+def walk_in(shared: Dict[str, Any]) -> Dict[str, str]:
+    rng, known = shared["rng"], shared["known_patients"]
+    if known and rng.random() < REPEAT_PATIENT_SHARE:
+        return rng.choice(known)
+    return {
+        "first_name": rng.choice(FIRST_NAMES),
+        "last_name": rng.choice(LAST_NAMES),
+        "age": str(rng.randint(1, 90)),
+        "gender": rng.choice(["Male", "Female"]),
+        "contact_number": f"9{rng.randint(100000000, 999999999)}",
+        "address": f"{rng.randint(1, 999)}, Sector {rng.randint(1, 60)}, {rng.choice(CITIES)}",
+    }
+
+async def load_open_billings(shared: Dict[str, Any]) -> None:
+    """Setup for order entry: orders whose bill is not settled yet"""
+    await load_usernames(shared)
+    rows = await fetch_rows(
+        f'SELECT id, order_id FROM "{settings.DB_SCHEMA}".billings WHERE payment_status::text <> \'PAID\''
+    )
+    shared["open_billings"] = [(str(row["order_id"]), str(row["id"])) for row in rows]
+
+@scenario("patient_registration", "Front desk: walk-ins checked for duplicates, then registered",
+          login_as="LAB_ASSISTANT", setup=load_known_patients)
+async def patient_registration(user: VirtualUser) -> None:
+    patient = walk_in(user.shared)
+    await user.request("POST", f"{API}/patients/duplicates", json=patient)
+    await user.request("POST", f"{API}/patients", json=patient)
+
+@scenario("order_entry", "Front desk: open orders reviewed and their bills settled at the counter",
+          login_as="LAB_ASSISTANT", setup=load_open_billings)
+async def order_entry(user: VirtualUser) -> None:
+    if not user.shared["open_billings"]:
+        raise WorkloadExhausted
+    order_id, billing_id = user.shared["open_billings"].pop()
+    await user.request("GET", f"{API}/orders/{order_id}", endpoint=f"{API}/orders/{{order_id}}")
+    response = await user.request(
+        "GET", f"{API}/billings/{billing_id}/balance", endpoint=f"{API}/billings/{{billing_id}}/balance"
+    )
+    if response.status_code != 200 or float(response.json()["due_amount"]) <= 0:
+        return
+    await user.request(
+        "POST", f"{API}/billings/{billing_id}/payments", endpoint=f"{API}/billings/{{billing_id}}/payments",
+        json={"amount": response.json()["due_amount"], "method": "UPI", "counter": "front desk"},
+    )
+
+@asynccontextmanager
+async def open_client(base_url: Optional[str]) -> AsyncIterator[httpx.AsyncClient]:
+    """HTTP client over localhost, or straight into the ASGI app when no URL is given"""
+    if base_url:
+        async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+            yield client
+        return
+
+    from app.main import app
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=60) as client:
+            yield client
+
+async def run_scenario(name: str, concurrency: int, duration: float, base_url: Optional[str]) -> Dict[str, Any]:
+    """Run `concurrency` virtual users through a scenario for `duration` seconds"""
+    workload = SCENARIOS[name]
+    shared: Dict[str, Any] = {}
+    if workload.setup:
+        await workload.setup(shared)
+
+    recorder = LatencyRecorder()
+    async with open_client(base_url) as client:
+        users = [VirtualUser(client, recorder, shared) for _ in range(concurrency)]
+        if workload.login_as:
+            await asyncio.gather(*(user.login(next(shared["usernames"][workload.login_as])) for user in users))
+            recorder = LatencyRecorder()  # logins are setup, not part of the measurement
+            for user in users:
+                user.recorder = recorder
+
+        started = time.perf_counter()
+        deadline = started + duration
+
+        async def loop(user: VirtualUser) -> None:
+            while time.perf_counter() < deadline:
+                try:
+                    await workload.step(user)
+                except WorkloadExhausted:
+                    return
+                except httpx.HTTPError:
+                    pass  # already recorded as an error
+
+        await asyncio.gather(*(loop(user) for user in users))
+        elapsed = time.perf_counter() - started
+
+    return recorder.report(name, elapsed, concurrency, base_url or "in-process")
@@ -0,0 +1,2 @@
+# Feature modules import models that refer to each other by name: register them all first
+import app.db.base  # noqa: F401
@@ -0,0 +1,101 @@
+import hashlib
+
+import pytest
+
+from app.core.config import settings
+from app.v1.api.attachment.storage import AttachmentStore, RangeNotSatisfiable, file_response, parse_range
+
+CONTENT = b"0123456789abcdef"
+SHA256 = hashlib.sha256(CONTENT).hexdigest()
+ETAG = f'"{SHA256}"'
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-3", (0, 3)),
+    ("bytes=4-", (4, 15)),
+    ("bytes=-4", (12, 15)),
+    ("bytes=-100", (0, 15)),
+    ("bytes=10-100", (10, 15)),
+    (" bytes=15-15 ", (15, 15)),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, len(CONTENT)) == expected
+
+@pytest.mark.parametrize("header", [None, "", "bytes=-", "bytes=0-1,4-5", "items=0-1", "bytes=a-b"])
+def test_ignored_ranges_send_the_whole_file(header):
+    assert parse_range(header, len(CONTENT)) is None
+
+@pytest.mark.parametrize("header", ["bytes=16-", "bytes=5-4", "bytes=-0"])
+def test_unsatisfiable_ranges(header):
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range(header, len(CONTENT))
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "ATTACHMENT_ACCEL_REDIRECT_PREFIX", None)
+    store = AttachmentStore(str(tmp_path), chunk_size=5)
+    path = store.path(SHA256)
+    path.parent.mkdir(parents=True)
+    path.write_bytes(CONTENT)
+    return store
+
+async def send_response(response, method="GET"):
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    await response({"type": "http", "method": method, "extensions": {}}, None, send)
+    status = messages[0]["status"]
+    headers = {name.decode(): value.decode() for name, value in messages[0]["headers"]}
+    return status, headers, b"".join(message.get("body", b"") for message in messages[1:])
+
+def download(store, **headers):
+    return file_response(store, SHA256, len(CONTENT), "text/plain", "result.txt", headers)
+
+@pytest.mark.asyncio
+async def test_whole_file_in_chunks(store):
+    status, headers, body = await send_response(download(store))
+    assert status == 200
+    assert body == CONTENT
+    assert headers["content-length"] == str(len(CONTENT))
+    assert headers["etag"] == ETAG
+
+@pytest.mark.asyncio
+async def test_range(store):
+    status, headers, body = await send_response(download(store, range="bytes=3-9"))
+    assert status == 206
+    assert body == CONTENT[3:10]
+    assert headers["content-range"] == f"bytes 3-9/{len(CONTENT)}"
+
+@pytest.mark.asyncio
+async def test_if_range_with_current_etag_keeps_the_range(store):
+    status, _, body = await send_response(download(store, **{"range": "bytes=-2", "if-range": ETAG}))
+    assert (status, body) == (206, CONTENT[-2:])
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("if_range", ['"other"', "Wed, 21 Oct 2015 07:28:00 GMT", f"W/{ETAG}"])
+async def test_if_range_with_another_validator_sends_the_whole_file(store, if_range):
+    status, _, body = await send_response(download(store, **{"range": "bytes=0-1", "if-range": if_range}))
+    assert (status, body) == (200, CONTENT)
+
+@pytest.mark.asyncio
+async def test_if_range_mismatch_skips_the_range_check(store):
+    status, _, _ = await send_response(download(store, **{"range": "bytes=99-", "if-range": '"other"'}))
+    assert status == 200
+
+@pytest.mark.asyncio
+async def test_unsatisfiable_range(store):
+    status, headers, _ = await send_response(download(store, range="bytes=99-"))
+    assert status == 416
+    assert headers["content-range"] == f"bytes */{len(CONTENT)}"
+
+@pytest.mark.asyncio
+async def test_if_none_match(store):
+    status, _, body = await send_response(download(store, **{"if-none-match": f'"stale", {ETAG}'}))
+    assert (status, body) == (304, b"")
+
+@pytest.mark.asyncio
+async def test_head_sends_headers_only(store):
+    status, headers, body = await send_response(download(store), method="HEAD")
+    assert (status, body) == (200, b"")
+    assert headers["content-length"] == str(len(CONTENT))
@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from app.core.cache import InvalidationBus, InvalidationHook, LocalCache
+from app.db.notify import notification_listener
+
+@pytest.fixture(autouse=True)
+def listener_connected(monkeypatch):
+    monkeypatch.setattr(type(notification_listener), "connected", property(lambda self: True))
+
+def test_set_after_eviction_is_skipped():
+    cache = LocalCache("user", 10, 60)
+    generation = cache.generation
+    # The writer's invalidation lands between the reader's query and its set
+    cache.evict("u1", 2.0)
+    cache.set("u1", "stale", version=1.0, generation=generation)
+    assert cache.get("u1") is None
+
+    cache.set("u1", "fresh", version=2.0, generation=cache.generation)
+    assert cache.get("u1") == "fresh"
+
+def test_older_invalidation_keeps_newer_entry():
+    cache = LocalCache("user", 10, 60)
+    cache.set("u1", "v2", version=2.0)
+    assert not cache.evict("u1", 1.0)
+    assert cache.get("u1") == "v2"
+    assert cache.evict("u1", 2.0)
+    assert cache.get("u1") is None
+
+def test_nothing_is_cached_while_disconnected(monkeypatch):
+    monkeypatch.setattr(type(notification_listener), "connected", property(lambda self: False))
+    cache = LocalCache("user", 10, 60)
+    cache.set("u1", "v1", version=1.0)
+    assert cache.get("u1") is None
+
+def test_hook_runs_on_notify_and_flush():
+    calls = []
+    bus = InvalidationBus()
+    bus.register(InvalidationHook("lab_test_catalog", calls.append))
+    bus._on_notify("cache", json.dumps({"entity": "lab_test_catalog", "id": "main"}))
+    bus.flush()
+    assert calls == ["main", None]
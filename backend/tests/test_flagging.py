@@ -0,0 +1,88 @@
+import math
+import re
+
+import pytest
+
+from app.v1.api.patient.matching import AGE_PATTERN, AGE_UNIT_YEARS, parse_age
+from app.v1.api.report.flagging import (
+    NUMERIC_PATTERN, RangeDef, RangeTable, ReportInput, _numeric, flag_columns, flag_reports
+)
+
+TEST = "cbc"
+
+def table() -> RangeTable:
+    return RangeTable([
+        RangeDef(TEST, "HGB", None, None, None, 12, 16, 7, 20),
+        RangeDef(TEST, "HGB", "M", None, None, 13, 17, 7, 20),
+        RangeDef(TEST, "HGB", "M", 0, 12, 11, 14, 7, 20),
+        RangeDef(TEST, "GLU", None, None, None, 70, None, None, None),
+    ])
+
+@pytest.mark.parametrize("age, years", [
+    ("34", 34.0),
+    ("34 yrs", 34.0),
+    ("34Y", 34.0),
+    ("6 months", 0.5),
+    ("3w", 3 * 7 / 365.25),
+    ("10 days", 10 / 365.25),
+    ("12 hours", 12 / 8766),
+    (" 2.5 y", 2.5),
+])
+def test_parse_age_reads_units(age, years):
+    assert parse_age(age) == pytest.approx(years)
+
+@pytest.mark.parametrize("age", ["", None, "unknown", "34 score", "-3", "٣٤"])
+def test_parse_age_rejects_what_it_cannot_read(age):
+    assert parse_age(age) is None
+
+def test_age_units_match_the_sql_pattern():
+    # The SQL path takes the first letter of the unit group, as parse_age does
+    match = re.match(AGE_PATTERN, "6 Months", re.IGNORECASE)
+    assert match.group(2)[:1].lower() in AGE_UNIT_YEARS
+
+@pytest.mark.parametrize("value, expected", [
+    (5, 5), (1.25, 1.25), ("5", 5.0), ("-1.25", -1.25), (".5", 0.5), ("5.", 5.0),
+    ("1e3", 1000.0), (" +2E-2 ", 0.02), ({"value": "13.2", "unit": "g/dL"}, 13.2),
+])
+def test_numeric_values(value, expected):
+    assert _numeric(value) == expected
+
+@pytest.mark.parametrize("value", ["1e400", "abc", "1,5", "", None, True, [], {"unit": "g/dL"}, "--1", "."])
+def test_non_numeric_values_are_nan(value):
+    assert math.isnan(_numeric(value))
+
+@pytest.mark.parametrize("text", ["5", "-1.25", ".5", "5.", "1e3", "1e400", "abc", "."])
+def test_python_and_sql_share_the_numeric_grammar(text):
+    assert (re.match(NUMERIC_PATTERN, text) is not None) == (not math.isnan(_numeric(text)))
+
+def test_most_specific_band_wins():
+    flagged = flag_reports(table(), [
+        ReportInput(TEST, "40", "Male", {"HGB": 12.5}),
+        ReportInput(TEST, "8", "M", {"HGB": 12.5}),
+        ReportInput(TEST, "40", "Female", {"HGB": 12.5}),
+    ])
+    assert [report["HGB"]["flag"] for report in flagged] == ["LOW", "NORMAL", "NORMAL"]
+    assert flagged[0]["HGB"]["reference"] == {"low": 13.0, "high": 17.0}
+    assert flagged[1]["HGB"]["reference"] == {"low": 11.0, "high": 14.0}
+
+def test_flags_critical_and_missing_bounds():
+    flagged = flag_reports(table(), [ReportInput(TEST, "40", "F", {"HGB": 6, "GLU": {"value": 500, "unit": "mg/dL"}})])[0]
+    assert flagged["HGB"]["flag"] == "CRITICAL_LOW"
+    # No upper bound: a high value is still normal, and the bound goes out as None
+    assert flagged["GLU"] == {"value": 500, "unit": "mg/dL", "flag": "NORMAL", "reference": {"low": 70.0, "high": None}}
+
+def test_unknown_age_only_matches_unbounded_bands():
+    flagged = flag_reports(table(), [ReportInput(TEST, "unknown", "M", {"HGB": 12.5})])[0]
+    assert flagged["HGB"]["reference"] == {"low": 13.0, "high": 17.0}
+
+def test_no_range_or_no_number_leaves_the_value_unflagged():
+    flagged = flag_reports(table(), [ReportInput(TEST, "40", "M", {"TSH": 2.0, "HGB": "haemolysed"})])[0]
+    assert flagged["TSH"] == {"value": 2.0, "flag": None, "reference": None}
+    assert flagged["HGB"]["flag"] is None
+
+def test_flag_columns_matches_flag_reports():
+    flags, lows, highs = flag_columns(table(), [TEST, TEST, TEST], ["HGB", "HGB", "TSH"], [12.5, None, 1.0],
+                                      [40.0, 40.0, 40.0], ["M", "M", "M"])
+    assert flags == ["LOW", None, None]
+    assert lows == [13.0, None, None]
+    assert highs == [17.0, None, None]
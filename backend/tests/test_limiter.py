@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from app.core.limiter import GradientLimiter
+
+def limiter(limit=1, max_queue=10):
+    return GradientLimiter("test", initial_limit=limit, min_limit=1, max_limit=100, max_queue=max_queue)
+
+async def queued(gate, timeout=5):
+    """Start an acquire and let it reach the queue"""
+    task = asyncio.create_task(gate.acquire(timeout))
+    await asyncio.sleep(0)
+    return task
+
+@pytest.mark.asyncio
+async def test_sheds_past_the_queue():
+    gate = limiter(max_queue=1)
+    assert await gate.acquire(1)
+    waiting = await queued(gate)
+    assert await gate.acquire(1) is False
+    gate.release(0.01, ok=True)
+    assert await waiting
+    assert gate.metrics()["rejected"] == 1
+
+@pytest.mark.asyncio
+async def test_queue_timeout_is_shed():
+    gate = limiter()
+    assert await gate.acquire(1)
+    assert await gate.acquire(0.01) is False
+    assert gate.metrics()["queued"] == 0
+
+@pytest.mark.asyncio
+async def test_release_hands_the_slot_to_the_oldest_waiter():
+    gate = limiter()
+    assert await gate.acquire(1)
+    first, second = await queued(gate), await queued(gate)
+    gate.release(0.01, ok=True)
+    assert await first
+    assert not second.done()
+    assert gate.inflight == 1
+    gate.release(0.01, ok=True)
+    assert await second
+    gate.release(0.01, ok=True)
+    assert gate.inflight == 0
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_the_queue():
+    gate = limiter()
+    assert await gate.acquire(1)
+    waiting = await queued(gate)
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    assert gate.metrics()["queued"] == 0
+    gate.release(0.01, ok=True)
+    assert gate.inflight == 0
+
+@pytest.mark.asyncio
+async def test_slot_handed_to_a_cancelled_waiter_is_passed_on():
+    gate = limiter()
+    assert await gate.acquire(1)
+    first, second = await queued(gate), await queued(gate)
+    # The slot goes to `first` in the same loop iteration that cancels it
+    gate.release(0.01, ok=True)
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert await second
+    assert gate.inflight == 1
+    gate.release(0.01, ok=True)
+    assert gate.inflight == 0
+
+@pytest.mark.asyncio
+async def test_no_slot_leaks_under_cancellation_churn():
+    gate = limiter(limit=3, max_queue=1000)
+
+    async def request(hold):
+        if await gate.acquire(5):
+            try:
+                await asyncio.sleep(hold)
+            finally:
+                gate.release(0.001, ok=True)
+
+    tasks = [asyncio.create_task(request(0.001 * (i % 5))) for i in range(200)]
+    await asyncio.sleep(0.002)
+    for task in tasks[::3]:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    assert gate.inflight == 0
+    assert gate.metrics()["queued"] == 0
+    # Still admits immediately afterwards
+    assert await gate.acquire(0)
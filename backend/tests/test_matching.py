@@ -0,0 +1,52 @@
+import pytest
+
+from app.v1.api.patient.matching import blocking_keys, normalize_phone, score_candidate, soundex
+
+def patient(first_name="Rahul", last_name="Sharma", age="34", gender="Male", contact_number="+91 98765 43210"):
+    return {"first_name": first_name, "last_name": last_name, "age": age, "gender": gender,
+            "contact_number": contact_number}
+
+@pytest.mark.parametrize("name, code", [
+    ("Robert", "R163"), ("Rupert", "R163"), ("Ashcraft", "A261"), ("Tymczak", "T522"),
+    ("Pfister", "P236"), ("Lee", "L000"), ("o'Neil", "O540"),
+])
+def test_soundex(name, code):
+    assert soundex(name) == code
+
+def test_soundex_of_nothing_spellable():
+    assert soundex("") is None
+    assert soundex("123") is None
+
+def test_normalize_phone_drops_country_code_and_punctuation():
+    assert normalize_phone("+91 (98765) 43210") == "9876543210"
+    assert normalize_phone("12-34") is None
+
+def test_swapped_names_share_the_name_key():
+    keys = dict(blocking_keys("Rahul", "Sharma", "M", "9876543210"))
+    swapped = dict(blocking_keys("Sharma", "Rahul", "Male", "0000000"))
+    assert keys["name"] == swapped["name"]
+    assert keys["surname_phone"] == "S650:9876543210"
+
+def test_same_person_scores_high():
+    score = score_candidate(["phone", "name", "surname_phone"], patient(), patient(age="34 yrs"))
+    assert score == pytest.approx(1.0)
+
+def test_score_weighs_the_matched_keys():
+    probe = patient()
+    phone_only = score_candidate(["phone"], probe, patient(first_name="Priya", gender="Female"))
+    name_only = score_candidate(["name"], probe, patient(first_name="Rahool"))
+    assert 0 < phone_only < name_only < 1
+
+def test_age_and_gender_mismatch_lower_the_score():
+    probe = patient()
+    same = score_candidate(["name"], probe, patient())
+    assert score_candidate(["name"], probe, patient(age="60")) == pytest.approx(same - 0.2)
+    assert score_candidate(["name"], probe, patient(gender="F")) == pytest.approx(same - 0.2)
+    # Ages in other units are compared in years: 6 months is within two years of 1
+    assert score_candidate(["name"], patient(age="1"), patient(age="6 months")) == pytest.approx(same)
+
+def test_score_is_clamped():
+    probe = patient()
+    stranger = patient(first_name="Zed", last_name="Quo", age="90", gender="F")
+    assert score_candidate([], probe, stranger) == 0.0
+    assert score_candidate(["phone", "phone", "name", "surname_phone", "unknown"], probe, probe) == 1.0
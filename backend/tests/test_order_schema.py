@@ -0,0 +1,10 @@
+from datetime import datetime
+
+import pytest
+
+from app.v1.api.order.schema import OrderTestTransitionItem
+
+@pytest.mark.parametrize("collected_at", ["2026-03-01T14:30:00+05:30", "2026-03-01T09:00:00Z", "2026-03-01T09:00:00"])
+def test_collected_at_is_naive_utc(collected_at):
+    item = OrderTestTransitionItem(accession_number="A1", collected_at=collected_at)
+    assert item.collected_at == datetime(2026, 3, 1, 9, 0)
@@ -0,0 +1,89 @@
+import pytest
+
+from app.v1.api.report.validation import ResultValidator, ValidatorCache
+
+SCHEMA = {
+    "analytes": {
+        "HGB": {"type": "number", "unit": "g/dL", "min": 0, "max": 30},
+        "RBC": {"type": "integer"},
+        "ABO": {"type": "choice", "values": ["A", "B", "AB", "O"]},
+        "HIV": {"type": "boolean"},
+        "NOTE": {"type": "text", "max_length": 10, "required": False},
+    },
+}
+VALID = {"HGB": 13.2, "RBC": 5, "ABO": "A", "HIV": False}
+
+def validate(result, schema=SCHEMA):
+    return ResultValidator(schema).validate(result)
+
+def test_valid_result_is_normalized():
+    normalized, errors = validate({"HGB": "13.2", "RBC": 5.0, "ABO": "ab", "HIV": "Negative", "NOTE": "ok"})
+    assert errors == []
+    assert normalized == {
+        "HGB": {"value": 13.2, "unit": "g/dL"},
+        "RBC": {"value": 5},
+        "ABO": {"value": "AB"},
+        "HIV": {"value": False},
+        "NOTE": {"value": "ok"},
+    }
+    assert type(normalized["RBC"]["value"]) is int
+
+def test_entry_keys_are_kept_and_units_canonical():
+    normalized, errors = validate({**VALID, "HGB": {"value": 13.2, "unit": "G/DL", "comment": "repeat"}})
+    assert errors == []
+    assert normalized["HGB"] == {"value": 13.2, "unit": "g/dL", "comment": "repeat"}
+
+@pytest.mark.parametrize("analyte, value, error", [
+    ("HGB", "high", "HGB: expected a number"),
+    ("HGB", "nan", "HGB: expected a number"),
+    ("HGB", "1e400", "HGB: expected a number"),
+    ("HGB", True, "HGB: expected a number"),
+    ("HGB", -1, "HGB: below the minimum of 0"),
+    ("HGB", 31, "HGB: above the maximum of 30"),
+    ("HGB", {"value": 13, "unit": "mmol/L"}, "HGB: unit must be g/dL"),
+    ("RBC", 4.5, "RBC: expected an integer"),
+    ("ABO", "C", "ABO: expected one of A, B, AB, O"),
+    ("ABO", 1, "ABO: expected one of A, B, AB, O"),
+    ("HIV", "maybe", "HIV: expected true/false"),
+    ("NOTE", "x" * 11, "NOTE: longer than 10 characters"),
+    ("NOTE", 5, "NOTE: expected text"),
+    ("MCV", 90, "MCV: not an analyte of this test"),
+])
+def test_errors(analyte, value, error):
+    normalized, errors = validate({**VALID, analyte: value})
+    assert errors == [error]
+    assert analyte not in normalized
+
+def test_required_analytes():
+    _, errors = validate({"HGB": 13.2, "RBC": None})
+    assert errors == ["RBC: value is required", "ABO: value is required", "HIV: value is required"]
+
+def test_optional_analyte_may_be_left_out():
+    normalized, errors = validate({**VALID, "NOTE": None})
+    assert errors == []
+    assert "NOTE" not in normalized
+
+def test_extra_analytes_when_allowed():
+    normalized, errors = validate({**VALID, "MCV": {"value": 90}}, {**SCHEMA, "allow_extra": True})
+    assert errors == []
+    assert normalized["MCV"] == {"value": 90}
+
+def test_unknown_type_is_refused_when_compiling():
+    with pytest.raises(ValueError):
+        ResultValidator({"analytes": {"X": {"type": "date"}}})
+
+def test_validator_is_reusable():
+    validator = ResultValidator(SCHEMA)
+    first = validator.validate({**VALID, "HGB": {"value": "1"}})
+    assert validator.validate({**VALID, "HGB": {"value": "1"}}) == first
+
+def test_cache_is_keyed_by_version_and_bounded():
+    cache = ValidatorCache(2)
+    v1, v2, other = ResultValidator(SCHEMA), ResultValidator(SCHEMA), ResultValidator(SCHEMA)
+    cache.set("cbc", 1, v1)
+    cache.set("cbc", 2, v2)
+    assert cache.get("cbc", 1) is v1  # now the most recently used
+    cache.set("lft", 1, other)
+    assert cache.get("cbc", 2) is None
+    assert cache.get("cbc", 1) is v1
+    assert cache.stats() == {"entries": 2, "hits": 2, "misses": 1}
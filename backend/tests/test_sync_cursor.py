@@ -0,0 +1,97 @@
+import json
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.v1.api.sync.controller import SyncController
+from app.v1.api.sync.cursor import SyncToken
+
+def now() -> int:
+    return int(datetime.utcnow().timestamp())
+
+def test_token_round_trip():
+    token = SyncToken(1234, 56, 1700000000)
+    assert token.encode() == "1234-56-1700000000"
+    assert SyncToken.decode(token.encode()) == token
+
+@pytest.mark.parametrize("token", ["", "1-2", "1-2-3-4", "a-2-3", "-1-2-3", "1--3", "1.5-2-3", "1-²-3", "١-2-3"])
+def test_malformed_tokens(token):
+    assert SyncToken.decode(token) is None
+
+def test_initial_token_starts_now():
+    token = SyncToken.initial()
+    assert (token.txid, token.seq) == (0, 0)
+    assert abs(token.started - now()) <= 1
+
+def test_expiry_follows_tombstone_retention():
+    retention = timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+    assert not SyncToken(1, 1, now()).expired()
+    assert SyncToken(1, 1, int((datetime.utcnow() - retention - timedelta(hours=1)).timestamp())).expired()
+
+class FakeSyncCRUD:
+    """The two reads get_changes makes, with rows already filtered to the horizon"""
+
+    def __init__(self, horizon, rows):
+        self.horizon = horizon
+        self.rows = rows
+        self.calls = []
+
+    async def get_horizon(self):
+        return self.horizon
+
+    async def get_changes(self, after, horizon, limit):
+        self.calls.append((after, horizon, limit))
+        return [row for row in self.rows if (row.change_txid, row.change_seq) > (after.txid, after.seq)][:limit]
+
+def change(txid, seq):
+    return SimpleNamespace(change_txid=txid, change_seq=seq, change=json.dumps({"id": f"{txid}-{seq}"}))
+
+async def get_page(crud, token=None, limit=None):
+    controller = SyncController(None)
+    controller.crud = crud
+    return json.loads(await controller.get_changes(token, limit))
+
+@pytest.mark.asyncio
+async def test_a_full_page_continues_after_its_last_row():
+    started = now() - 60
+    crud = FakeSyncCRUD(100, [change(10, 1), change(10, 2), change(12, 3)])
+    page = await get_page(crud, SyncToken(5, 0, started).encode(), limit=2)
+    assert page["has_more"] is True
+    assert [item["id"] for item in page["changes"]] == ["10-1", "10-2"]
+    # One extra row is read to tell whether there is more; the sync keeps its start time
+    assert crud.calls[0][2] == 3
+    assert SyncToken.decode(page["token"]) == SyncToken(10, 2, started)
+
+@pytest.mark.asyncio
+async def test_caught_up_moves_the_token_to_the_horizon():
+    crud = FakeSyncCRUD(100, [change(10, 1)])
+    page = await get_page(crud, SyncToken(5, 0, now() - 60).encode(), limit=10)
+    token = SyncToken.decode(page["token"])
+    assert page["has_more"] is False
+    assert (token.txid, token.seq) == (100, 0)
+    assert abs(token.started - now()) <= 1
+
+@pytest.mark.asyncio
+async def test_token_past_the_horizon_stays_put():
+    # A long transaction holds the horizon back: never move the client backwards
+    crud = FakeSyncCRUD(50, [])
+    page = await get_page(crud, SyncToken(80, 7, now() - 60).encode())
+    token = SyncToken.decode(page["token"])
+    assert page["changes"] == []
+    assert (token.txid, token.seq) == (80, 7)
+
+@pytest.mark.asyncio
+async def test_limit_is_capped():
+    crud = FakeSyncCRUD(100, [])
+    await get_page(crud, limit=settings.SYNC_MAX_BATCH_SIZE * 10)
+    assert crud.calls[0][2] == settings.SYNC_MAX_BATCH_SIZE + 1
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("token, status_code", [("bogus", 400), ("1-1-1", 410)])
+async def test_rejected_tokens(token, status_code):
+    with pytest.raises(HTTPException) as raised:
+        await get_page(FakeSyncCRUD(100, []), token)
+    assert raised.value.status_code == status_code
@@ -0,0 +1,38 @@
+import pytest
+
+from app.core.config import settings
+from app.core.tracing import start_trace
+from app.middleware.tracing import TracingMiddleware
+
+TRACEPARENT = b"00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+
+async def call(middleware, headers):
+    """Run one GET through `middleware`, returning the response start message"""
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/health", "headers": headers}
+    await middleware(scope, receive, send)
+    return sent[0]
+
+async def app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+@pytest.mark.asyncio
+async def test_propagated_sampling_is_continued(monkeypatch):
+    monkeypatch.setattr(settings, "TRACING_ENABLED", True)
+    start = await call(TracingMiddleware(app), [(b"traceparent", TRACEPARENT)])
+    assert (b"x-trace-id", b"0af7651916cd43dd8448eb211c80319c") in start["headers"]
+
+@pytest.mark.asyncio
+async def test_disabled_tracing_ignores_propagated_sampling(monkeypatch):
+    monkeypatch.setattr(settings, "TRACING_ENABLED", False)
+    start = await call(TracingMiddleware(app), [(b"traceparent", TRACEPARENT)])
+    assert start["headers"] == []
+    assert start_trace("job", sampled=True) is None